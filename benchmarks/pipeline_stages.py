@@ -0,0 +1,237 @@
+'''
+Time the stage functions of the pipeline one at a time, on the test
+fixtures and on the full standard, and compare the results with a baseline:
+
+    $ PYTHONPATH=. python3 benchmarks/pipeline_stages.py --output baseline.json
+    $ PYTHONPATH=. python3 benchmarks/pipeline_stages.py --baseline baseline.json
+
+The full standard is read from the cleaned pages in `dicom_standard/tmp`
+(`--standard-dir`), which `make` writes; it is skipped if PS3.3 is missing.
+
+The inputs of each stage function are built by running the earlier stages
+once, untimed. Functions modifying their input are given a fresh copy on
+every run. Each function is timed `--repeat` times, and the fastest time
+is compared with the baseline, since it is the least affected by other load.
+'''
+from collections import OrderedDict
+from copy import deepcopy
+from typing import Any, Callable, Dict, List, Tuple
+import argparse
+import glob
+import os
+import platform
+import statistics
+import sys
+import time
+
+import bs4
+from bs4 import BeautifulSoup
+
+from dicom_standard import json_io
+from dicom_standard import parse_lib as pl
+from dicom_standard import extract_modules_with_attributes as module_data
+from dicom_standard import extract_macros as macro_data
+from dicom_standard.extract_sections import extract_section_ids, normalize_sections, unique_sections
+from dicom_standard.hierarchy_utils import record_hierarchy_for_module
+from dicom_standard.macro_utils import expand_macro_rows
+from dicom_standard.postprocess_mark_references import record_references_inside_pairs
+from dicom_standard.postprocess_save_references import find_reference_html_in_sections
+from dicom_standard.postprocess_update_reference_links import update_sourceurls
+from dicom_standard.preprocess_modules_with_attributes import preprocess_single_table
+from dicom_standard.process_module_attribute_relationship import module_attr_relationship_table
+from dicom_standard.table_utils import expand_spans, tdiv_to_table_list
+import tests.html_snippets as html_snippets
+import tests.standard_snippets as standard_snippets
+
+DEFAULT_STANDARD_DIR = os.path.join(pl.PACKAGE_DIR, 'tmp')
+DATASETS = ['snippets', 'standard']
+DEFAULT_REPEATS = OrderedDict([('snippets', 5), ('standard', 3)])
+MIN_BATCH_TIME = 0.05
+DEFAULT_TOLERANCE = 1.25
+RESULTS_VERSION = 1
+
+PagesType = Dict[str, str]
+# The name of a stage function, a function returning its input, and a
+# function running the stage on that input.
+BenchmarkType = Tuple[str, Callable[[], Any], Callable[[Any], Any]]
+
+
+def snippet_pages() -> PagesType:
+    return OrderedDict([('part03.html', standard_snippets.part03_excerpt)])
+
+
+def standard_pages(standard_dir: str) -> PagesType:
+    pages = OrderedDict()  # type: PagesType
+    for page_path in sorted(glob.glob(os.path.join(standard_dir, '*.html'))):
+        with open(page_path, 'r') as page_file:
+            pages[os.path.basename(page_path)] = page_file.read()
+    return pages
+
+
+def snippet_tables() -> List[List[Any]]:
+    # The span layouts covered by the table tests.
+    table_htmls = [html_snippets.flat, html_snippets.with_links, html_snippets.rowspan, html_snippets.colspan,
+                   html_snippets.bothspan, html_snippets.staggered_rowspan]
+    return [tdiv_to_table_list(BeautifulSoup(table_html, pl.HTML_PARSER).div) for table_html in table_htmls]
+
+
+def stage_benchmarks(pages: PagesType, extra_tables: List[List[Any]] = None) -> List[BenchmarkType]:
+    '''
+    Build the input of every stage function from `pages` (`{filename: html}`,
+    including `part03.html`) and return the benchmarks, in pipeline order.
+    '''
+    standard = pl.parse_html(pages['part03.html'])
+    module_tables, module_tdivs = module_data.get_module_tables(standard)
+    macro_tables, macro_tdivs = macro_data.get_macro_tables(standard)
+    table_lists = module_tables + macro_tables + (extra_tables or [])
+    raw_module_tables = module_data.tables_to_json(module_tables, module_tdivs)
+    macros = macro_data.tables_to_json(macro_tables, macro_tdivs)
+    expanded_tables = deepcopy(raw_module_tables)
+    resolved_macros = {}  # type: Dict[str, Any]
+    for table in expanded_tables:
+        table['attributes'] = expand_macro_rows(table, macros, resolved_macros)
+    preprocessed_tables = [preprocess_single_table(table) for table in expanded_tables]
+    hierarchy_tables = [record_hierarchy_for_module(table) for table in deepcopy(preprocessed_tables)]
+    pairs = record_references_inside_pairs(module_attr_relationship_table(hierarchy_tables))
+    descriptions = list(OrderedDict.fromkeys(table['description'] for table in raw_module_tables))
+    descriptions += list(OrderedDict.fromkeys(pair['description'] for pair in pairs))
+    parsed_pages = {page: pl.parse_html(page_html) for page, page_html in pages.items()}
+    section_anchors = extract_section_ids(parsed_pages)
+    sections = {page: dict(unique_sections(page_html)) for page, page_html in pages.items()}
+    references = find_reference_html_in_sections(pairs, sections)
+
+    def expand_all_macro_rows(tables):
+        resolved_macros = {}  # type: Dict[str, Any]
+        return [expand_macro_rows(table, macros, resolved_macros) for table in tables]
+    return [
+        # Each run is given a new parse, since the table and chapter indexes
+        # are cached on the parsed page by the first run.
+        ('get_module_tables', lambda: pl.parse_html(pages['part03.html']), module_data.get_module_tables),
+        ('expand_spans', lambda: table_lists, lambda tables: list(map(expand_spans, tables))),
+        ('expand_macro_rows', lambda: raw_module_tables, expand_all_macro_rows),
+        ('record_hierarchy_for_module', lambda: deepcopy(preprocessed_tables),
+         lambda tables: list(map(record_hierarchy_for_module, tables))),
+        ('clean_html', lambda: descriptions, lambda descriptions: list(map(pl.clean_html, descriptions))),
+        ('normalize_sections', lambda: section_anchors,
+         lambda section_anchors: [normalize_sections(anchors) for anchors in section_anchors.values()]),
+        ('find_reference_html_in_sections', lambda: pairs,
+         lambda pairs: find_reference_html_in_sections(pairs, sections)),
+        ('update_sourceurls', lambda: deepcopy(pairs), lambda pairs: update_sourceurls(pairs, references)),
+    ]
+
+
+def run_benchmark(prepare: Callable[[], Any], run: Callable[[Any], Any], repeat: int) -> List[float]:
+    '''
+    Return the time of each of `repeat` runs. Fast functions are timed over
+    a batch of calls lasting at least `MIN_BATCH_TIME`, and the time per
+    call is returned, since single calls are too short to time reliably.
+    '''
+    batch_size = 1
+    while True:
+        batch_time = time_batch(prepare, run, batch_size)
+        if batch_time >= MIN_BATCH_TIME:
+            break
+        batch_size *= 2
+    run_times = [batch_time / batch_size]
+    for _ in range(repeat - 1):
+        run_times.append(time_batch(prepare, run, batch_size) / batch_size)
+    return run_times
+
+
+def time_batch(prepare: Callable[[], Any], run: Callable[[Any], Any], batch_size: int) -> float:
+    stage_inputs = [prepare() for _ in range(batch_size)]
+    start = time.perf_counter()
+    for stage_input in stage_inputs:
+        run(stage_input)
+    return time.perf_counter() - start
+
+
+def run_benchmarks(benchmarks: List[BenchmarkType], repeat: int) -> Dict[str, Dict[str, Any]]:
+    results = OrderedDict()  # type: Dict[str, Dict[str, Any]]
+    for name, prepare, run in benchmarks:
+        run_times = run_benchmark(prepare, run, repeat)
+        results[name] = {
+            'min': min(run_times),
+            'median': statistics.median(run_times),
+            'runs': run_times,
+        }
+    return results
+
+
+def environment() -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'bs4': bs4.__version__,
+        'parser': pl.HTML_PARSER,
+    }
+
+
+def compare_results(results: Dict[str, Any], baseline: Dict[str, Any],
+                    tolerance: float = DEFAULT_TOLERANCE) -> List[Tuple[str, str, float, float, bool]]:
+    '''
+    Compare the fastest run of each benchmark found in both results.
+    Returns `(dataset, name, baseline time, time, is regression)` tuples,
+    where a regression is a benchmark more than `tolerance` times slower.
+    '''
+    comparisons = []
+    for dataset, benchmarks in results['datasets'].items():
+        baseline_benchmarks = baseline['datasets'].get(dataset, {})
+        for name, result in benchmarks.items():
+            if name in baseline_benchmarks:
+                baseline_time = baseline_benchmarks[name]['min']
+                comparisons.append((dataset, name, baseline_time, result['min'],
+                                    result['min'] > baseline_time * tolerance))
+    return comparisons
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    for dataset, benchmarks in results['datasets'].items():
+        print('{}:'.format(dataset))
+        for name, result in benchmarks.items():
+            print('    {:<34}{:>12.6f}s (median {:.6f}s)'.format(name, result['min'], result['median']))
+
+
+def print_comparisons(comparisons: List[Tuple[str, str, float, float, bool]]) -> None:
+    for dataset, name, baseline_time, benchmark_time, is_regression in comparisons:
+        print('{:<10}{:<34}{:>12.6f}s -> {:.6f}s ({:.2f}x){}'.format(
+            dataset, name, baseline_time, benchmark_time, benchmark_time / baseline_time,
+            '  SLOWER' if is_regression else ''))
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Benchmark the stage functions of the pipeline.')
+    parser.add_argument('--datasets', nargs='+', choices=DATASETS, default=DATASETS,
+                        help='inputs to benchmark on')
+    parser.add_argument('--standard-dir', default=DEFAULT_STANDARD_DIR,
+                        help='directory holding the HTML pages of the full standard')
+    parser.add_argument('--repeat', type=int, help='runs of each benchmark (default: {})'.format(
+        ', '.join('{} for {}'.format(count, dataset) for dataset, count in DEFAULT_REPEATS.items())))
+    parser.add_argument('--output', help='JSON file the results are written to')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='slowdown relative to the baseline reported as a regression')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    results = {'version': RESULTS_VERSION, 'environment': environment(), 'datasets': OrderedDict()}
+    for dataset in args.datasets:
+        if dataset == 'snippets':
+            benchmarks = stage_benchmarks(snippet_pages(), snippet_tables())
+        elif os.path.exists(os.path.join(args.standard_dir, 'part03.html')):
+            benchmarks = stage_benchmarks(standard_pages(args.standard_dir))
+        else:
+            print('No part03.html in {}; skipping the full standard.'.format(args.standard_dir), file=sys.stderr)
+            continue
+        results['datasets'][dataset] = run_benchmarks(benchmarks, args.repeat or DEFAULT_REPEATS[dataset])
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json_io.write_json(results, 'pretty', output_file)
+    if args.baseline:
+        comparisons = compare_results(results, json_io.read_json_to_dict(args.baseline), args.tolerance)
+        print_comparisons(comparisons)
+        if any(is_regression for _, _, _, _, is_regression in comparisons):
+            sys.exit(1)
@@ -0,0 +1,71 @@
+'''
+Compare the indexed `update_sourceurls` with the original nested-loop
+implementation, either on the pipeline's own files:
+
+    $ PYTHONPATH=. python3 benchmarks/update_reference_links.py \
+        dicom_standard/tmp/modules_attributes_partial_references.json dicom_standard/dist/references.json
+
+or, without arguments, on synthetic data of a similar size.
+'''
+from copy import deepcopy
+import argparse
+import time
+
+from dicom_standard import json_io
+from dicom_standard.postprocess_update_reference_links import update_sourceurls
+
+SYNTHETIC_PAIR_COUNT = 10000
+SYNTHETIC_REFERENCE_COUNT = 2500
+REFERENCES_PER_PAIR = 2
+
+
+def nested_loop_update_sourceurls(module_attr_pairs, references):
+    for pair in module_attr_pairs:
+        for ref in pair['externalReferences']:
+            for source_url in references.keys():
+                reference_fragment = source_url.split('#')[-1]
+                pair_fragment = ref['sourceUrl'].split('#')[-1]
+                if pair_fragment == reference_fragment:
+                    ref['sourceUrl'] = source_url
+                    break
+    return module_attr_pairs
+
+
+def synthetic_data():
+    references = {'part03.html#sect_C.{}'.format(i): '<div></div>' for i in range(SYNTHETIC_REFERENCE_COUNT)}
+    module_attr_pairs = [{
+        'externalReferences': [{'sourceUrl': '#sect_C.{}'.format((i * 7 + j) % SYNTHETIC_REFERENCE_COUNT)}
+                               for j in range(REFERENCES_PER_PAIR)]
+    } for i in range(SYNTHETIC_PAIR_COUNT)]
+    return module_attr_pairs, references
+
+
+def timed(update, module_attr_pairs, references):
+    module_attr_pairs = deepcopy(module_attr_pairs)
+    start = time.perf_counter()
+    updated_pairs = update(module_attr_pairs, references)
+    return time.perf_counter() - start, updated_pairs
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Benchmark update_sourceurls.')
+    parser.add_argument('module_attribute_pairs', nargs='?', help='pairs with partial references')
+    parser.add_argument('references', nargs='?', help='saved references')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    if args.module_attribute_pairs and args.references:
+        module_attr_pairs = json_io.read_json_to_dict(args.module_attribute_pairs)
+        references = json_io.read_json_to_dict(args.references)
+    else:
+        module_attr_pairs, references = synthetic_data()
+    reference_count = sum(len(pair['externalReferences']) for pair in module_attr_pairs)
+    print('{} pairs, {} external references, {} saved references'.format(
+        len(module_attr_pairs), reference_count, len(references)))
+    nested_loop_time, expected_pairs = timed(nested_loop_update_sourceurls, module_attr_pairs, references)
+    indexed_time, updated_pairs = timed(update_sourceurls, module_attr_pairs, references)
+    assert updated_pairs == expected_pairs
+    print('nested loop: {:.3f}s'.format(nested_loop_time))
+    print('indexed:     {:.3f}s ({:.0f}x faster)'.format(indexed_time, nested_loop_time / indexed_time))
@@ -0,0 +1,64 @@
+'''
+Run all of the PS3.3 extraction stages in a single process.
+
+Parsing PS3.3 is by far the most expensive part of the extraction, so the
+HTML is parsed once and the same tree is handed to the CIOD, module and
+macro extractors. One JSON file is written per extractor, using the same
+names as the individual `extract_*.py` stages in the Makefile.
+'''
+from typing import Any, Dict
+from functools import partial
+import argparse
+import os
+
+from bs4 import BeautifulSoup
+
+from dicom_standard import cache
+from dicom_standard import json_io
+from dicom_standard import parse_lib as pl
+from dicom_standard import profiling
+from dicom_standard import extract_ciod_module_data as ciod_data
+from dicom_standard import extract_modules_with_attributes as module_data
+from dicom_standard import extract_macros as macro_data
+
+
+def extract_part03_tables(standard: BeautifulSoup, use_cache: bool = False) -> Dict[str, Any]:
+    '''
+    With `use_cache`, the tables that are unchanged since the last run
+    are not extracted again (see `cache.cached_table_extraction`).
+    '''
+    return {
+        'raw_ciod_module_tables.json': ciod_data.extract_tables(standard, use_cache),
+        'raw_module_attribute_tables.json': module_data.extract_tables(standard, use_cache),
+        'raw_macro_tables.json': macro_data.extract_tables(standard, use_cache),
+    }
+
+
+def extract_part03_file(filepath: str, use_cache: bool = False) -> Dict[str, Any]:
+    return extract_part03_tables(pl.parse_html_file(filepath), use_cache)
+
+
+def write_outputs(outputs: Dict[str, Any], output_dir: str, output_format: str = 'pretty') -> None:
+    for filename, data in outputs.items():
+        with open(os.path.join(output_dir, filename), 'w') as output_file:
+            json_io.write_json(data, output_format, output_file)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Extract the CIOD, module and macro tables from PS3.3.')
+    parser.add_argument('standard', help='PS3.3 of the DICOM Standard')
+    parser.add_argument('output_dir', help='directory the JSON files are written to')
+    cache.add_cache_argument(parser)
+    json_io.add_format_argument(parser)
+    profiling.add_profile_argument(parser)
+    return profiling.parse_arguments(parser)
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    if args.profile and profiling.PROFILER.report_path is None:
+        # The tables are written to several files, so the report goes in their directory.
+        profiling.PROFILER.report_path = os.path.join(args.output_dir, 'part03_tables' + profiling.REPORT_SUFFIX)
+    outputs = cache.cached_extraction('part03_tables', args.standard,
+                                      partial(extract_part03_file, use_cache=args.use_cache), args.use_cache)
+    write_outputs(outputs, args.output_dir, args.format)
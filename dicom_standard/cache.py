@@ -0,0 +1,293 @@
+'''
+Caches of the results extracted from the standard's HTML files and of the
+results of the processing stages, kept on disk between runs.
+'''
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional
+from functools import partial
+import argparse
+import glob
+import hashlib
+import itertools
+import json
+import os
+import pickle
+
+import bs4
+from bs4 import Tag
+
+from dicom_standard import json_io
+from dicom_standard import parse_lib as pl
+from dicom_standard import parse_relations as pr
+from dicom_standard import profiling
+
+# Results extracted from the standard's HTML files are cached on disk,
+# keyed by the content of the file rather than its timestamp. Bump
+# `CACHE_VERSION` if the layout of the cached data changes.
+CACHE_VERSION = 1
+CACHE_DIR = os.environ.get('DICOM_STANDARD_CACHE_DIR', os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')), 'dicom-standard'))
+CACHE_SIZE_LIMIT = int(os.environ.get('DICOM_STANDARD_CACHE_SIZE_MB', 1024)) * 2**20
+STAGE_PREFIXES = ('preprocess_', 'process_', 'postprocess_')
+
+
+def file_digest(filepath: str) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as data_file:
+        for block in iter(lambda: data_file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extraction_code_digest() -> str:
+    '''
+    Digest of the source of every module that can affect extracted data,
+    i.e. everything except the JSON-to-JSON processing stages.
+    '''
+    digest = hashlib.sha256()
+    for module_path in sorted(glob.glob(os.path.join(pl.PACKAGE_DIR, '*.py'))):
+        if not os.path.basename(module_path).startswith(STAGE_PREFIXES):
+            digest.update(file_digest(module_path).encode())
+    return digest.hexdigest()
+
+
+def parser_version() -> str:
+    parser_module_version = ''
+    if pl.HTML_PARSER == 'lxml':
+        from lxml import etree
+        parser_module_version = etree.__version__
+    return '-'.join([str(CACHE_VERSION), bs4.__version__, pl.HTML_PARSER, parser_module_version])
+
+
+def extraction_version() -> str:
+    return content_digest(parser_version(), extraction_code_digest())
+
+
+def extraction_cache_key(stage_name: str, filepath: str) -> str:
+    key_parts = [stage_name, file_digest(filepath), parser_version(), extraction_code_digest()]
+    return hashlib.sha256('\n'.join(key_parts).encode()).hexdigest()
+
+
+def cache_entry_path(stage_name: str, filepath: str) -> str:
+    return os.path.join(CACHE_DIR, extraction_cache_key(stage_name, filepath) + '.pickle')
+
+
+def cached_extraction(stage_name: str, filepath: str, extract: Callable[[str], Any], use_cache: bool = True) -> Any:
+    '''
+    Return `extract(filepath)`, reusing the result stored by a previous
+    run if the file, the parser and the extraction code are all unchanged.
+    '''
+    if not use_cache:
+        return extract(filepath)
+    cache_path = cache_entry_path(stage_name, filepath)
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            data = pickle.load(cache_file)
+        # The modification time records when an entry was last used.
+        os.utime(cache_path)
+        return data
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
+    data = extract(filepath)
+    store_cache_entry(cache_path, data)
+    return data
+
+
+def cached_extraction_stream(stage_name: str, filepath: str, extract: Callable[[str], Iterable[Any]],
+                             use_cache: bool = True) -> Iterator[Any]:
+    '''
+    Like `cached_extraction`, for extractors that yield their results. Items
+    are pickled one at a time, so neither a cache hit nor a miss needs to
+    hold all of them in memory.
+    '''
+    if not use_cache:
+        yield from extract(filepath)
+        return
+    cache_path = cache_entry_path(stage_name, filepath)
+    if os.path.exists(cache_path):
+        os.utime(cache_path)
+        with open(cache_path, 'rb') as cache_file:
+            while True:
+                try:
+                    yield pickle.load(cache_file)
+                except EOFError:
+                    return
+    temporary_path = temporary_cache_path(cache_path)
+    try:
+        with open(temporary_path, 'wb') as cache_file:
+            for item in extract(filepath):
+                pickle.dump(item, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+                yield item
+    except BaseException:
+        # Never store the items of an extraction that did not run to the end.
+        os.remove(temporary_path)
+        raise
+    commit_cache_entry(temporary_path, cache_path)
+
+
+def temporary_cache_path(cache_path: str) -> str:
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    return '{}.{}.tmp'.format(cache_path, os.getpid())
+
+
+def commit_cache_entry(temporary_path: str, cache_path: str) -> None:
+    os.replace(temporary_path, cache_path)
+    evict_cache_entries(os.path.dirname(cache_path), CACHE_SIZE_LIMIT)
+
+
+def store_cache_entry(cache_path: str, data: Any) -> None:
+    temporary_path = temporary_cache_path(cache_path)
+    with open(temporary_path, 'wb') as cache_file:
+        pickle.dump(data, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+    commit_cache_entry(temporary_path, cache_path)
+
+
+def evict_cache_entries(cache_dir: str, size_limit: int) -> None:
+    '''
+    Remove the least recently used entries until the cache fits in `size_limit` bytes.
+    '''
+    entries = []
+    for entry_path in glob.glob(os.path.join(cache_dir, '*.pickle')):
+        try:
+            entry_stat = os.stat(entry_path)
+        except OSError:
+            continue
+        entries.append((entry_stat.st_mtime, entry_stat.st_size, entry_path))
+    cache_size = sum(size for _, size, _ in entries)
+    for _, size, entry_path in sorted(entries):
+        if cache_size <= size_limit:
+            break
+        try:
+            os.remove(entry_path)
+        except OSError:
+            pass
+        cache_size -= size
+
+
+def package_code_digest() -> str:
+    '''
+    Digest of the source of every module of the package, for caching the
+    results of the processing stages.
+    '''
+    digest = hashlib.sha256()
+    for module_path in sorted(glob.glob(os.path.join(pl.PACKAGE_DIR, '*.py'))):
+        digest.update(file_digest(module_path).encode())
+    return digest.hexdigest()
+
+
+def processing_version() -> str:
+    '''
+    Version of the processing stages' results. The stages clean HTML, so
+    their results also depend on the parser.
+    '''
+    return content_digest(parser_version(), package_code_digest())
+
+
+def content_digest(*parts: str) -> str:
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+
+def json_digest(data: Any) -> str:
+    return content_digest(json.dumps(data, sort_keys=True, separators=(',', ':')))
+
+
+def table_fingerprint(table_div: Tag, *context: Optional[Tag]) -> str:
+    '''
+    Digest of a table of the standard: its ID, the page it is on, its
+    content and any elements outside of it (`context`) that its extracted
+    data depends on.
+    '''
+    context_digests = ['' if tag is None else tree_digest(tag) for tag in context]
+    return content_digest(pr.table_id(table_div), pl.table_parent_page(table_div), tree_digest(table_div),
+                          *context_digests)
+
+
+def tree_digest(tag: Tag) -> str:
+    '''
+    Digest of the elements, attributes and strings under `tag`. Walking the
+    tree is an order of magnitude faster than serializing it to HTML, which
+    takes about as long as extracting a table.
+    '''
+    nodes = [(node.name, sorted(node.attrs.items()), len(node.contents)) if isinstance(node, Tag)
+             else (type(node).__name__, str(node))
+             for node in itertools.chain([tag], tag.descendants)]
+    return content_digest(repr(nodes))
+
+
+class ResultCache:
+    '''
+    The result of a computation for each of the items a stage processes,
+    such as the tables of the standard, keyed by a fingerprint of the item
+    and of everything else the result depends on.
+
+    A new release of the standard only changes a few tables, so a rebuild
+    only computes the results of items with a new fingerprint. Each stage
+    stores its results as one cache entry, which only keeps the results
+    used by the latest run, and which is discarded if `code_version`
+    changes.
+    '''
+    def __init__(self, stage_name: str, code_version: str, use_cache: bool = True) -> None:
+        self.cache_path = os.path.join(CACHE_DIR, stage_name + '-results.pickle')
+        self.code_version = code_version
+        self.use_cache = use_cache
+        self.stored_results = self.load() if use_cache else {}  # type: Dict[str, Any]
+        self.results = {}  # type: Dict[str, Any]
+        self.computed_count = 0
+
+    def load(self) -> Dict[str, Any]:
+        try:
+            with open(self.cache_path, 'rb') as cache_file:
+                code_version, results = pickle.load(cache_file)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return {}
+        return results if code_version == self.code_version else {}
+
+    def result(self, fingerprint: str, compute: Callable[[], Any]) -> Any:
+        '''
+        Return the result stored for `fingerprint`, or `compute()` if there
+        is none. Results are shared between items with the same
+        fingerprint, so callers must not modify them before `save`.
+        '''
+        if fingerprint not in self.results:
+            if fingerprint in self.stored_results:
+                self.results[fingerprint] = self.stored_results[fingerprint]
+            else:
+                self.results[fingerprint] = compute()
+                self.computed_count += 1
+        return self.results[fingerprint]
+
+    def save(self) -> None:
+        if self.use_cache:
+            store_cache_entry(self.cache_path, (self.code_version, self.results))
+
+
+def cached_table_extraction(stage_name: str, table_divs: List[Tag], extract_table: Callable[[Tag], Any],
+                            table_context: Callable[[Tag], Optional[Tag]], use_cache: bool = True) -> List[Any]:
+    '''
+    Return `extract_table(table_div)` for each of `table_divs`, reusing the
+    results of previous runs for the tables that are unchanged.
+    `table_context(table_div)` is the element outside of the table that its
+    result depends on, such as its description.
+    '''
+    with profiling.step('table extraction'):
+        if not use_cache:
+            return list(map(extract_table, table_divs))
+        table_cache = ResultCache(stage_name, extraction_version(), use_cache)
+        results = [table_cache.result(table_fingerprint(table_div, table_context(table_div)),
+                                      partial(extract_table, table_div))
+                   for table_div in table_divs]
+        table_cache.save()
+        return results
+
+
+def add_cache_argument(parser: argparse.ArgumentParser,
+                       help: str = 'always re-parse the HTML instead of using the extraction cache') -> None:
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false', help=help)
+
+
+def parse_extraction_arguments(description: str) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('standard', help='HTML page of the DICOM Standard')
+    add_cache_argument(parser)
+    json_io.add_format_argument(parser)
+    profiling.add_profile_argument(parser)
+    return profiling.parse_arguments(parser)
@@ -0,0 +1,19 @@
+'''
+Re-encode a JSON file produced by any stage in another output format,
+e.g. to publish gzip-compressed copies of the files in `dist`.
+'''
+import argparse
+
+from dicom_standard import json_io
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('input', help='JSON file, optionally gzip-compressed')
+    json_io.add_format_argument(parser, default='gzip')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    json_io.write_json(json_io.read_json_to_dict(args.input), args.format)
@@ -0,0 +1,176 @@
+'''
+A binary form of the PS3.6 data dictionary (`attributes.json`) that is read
+in place through `mmap`, so that processes sharing it load nothing at
+startup and share its pages.
+
+The file holds, in order:
+
+- a header: magic number, format version, record count and the offset of
+  the string pool;
+- one fixed-width record per attribute, sorted by numeric tag: the tag, a
+  mask of its fixed digits (repeating groups such as `(60xx,3000)` store
+  their `x` digits as 0), the VR and VM padded with NUL bytes, the retired
+  flag, and the offset and length of the name and keyword in the string
+  pool;
+- the record numbers sorted by keyword, for keyword lookups;
+- the string pool, holding each distinct name and keyword once as UTF-8.
+
+All integers are little-endian.
+'''
+from collections import namedtuple
+from typing import Any, Callable, Dict, Iterator, Optional
+import bisect
+import mmap
+import struct
+
+from dicom_standard.tag_utils import FULL_TAG_MASK, MaskedTagMatcher, TagType, tag_slug, tag_value_and_mask
+
+MAGIC_NUMBER = b'DCMDICT\x00'
+FORMAT_VERSION = 1
+HEADER_STRUCT = struct.Struct('<8sIII')
+RECORD_STRUCT = struct.Struct('<II16s16sB3xIIII')
+INDEX_STRUCT = struct.Struct('<I')
+
+DataElement = namedtuple('DataElement', ['tag', 'mask', 'valueRepresentation', 'valueMultiplicity',
+                                         'retired', 'name', 'keyword'])
+
+
+def data_dictionary_bytes(attributes: Dict[str, Dict[str, Any]]) -> bytes:
+    '''
+    Encode the attributes of `attributes.json` (keyed by tag slug).
+    '''
+    entries = sorted((tag_value_and_mask(slug) + (attribute,) for slug, attribute in attributes.items()),
+                     key=lambda entry: (entry[0], FULL_TAG_MASK ^ entry[1]))
+    string_pool = bytearray()
+    string_offsets = {}  # type: Dict[bytes, int]
+
+    def pooled(string):
+        encoded_string = string.encode('utf-8')
+        if encoded_string not in string_offsets:
+            string_offsets[encoded_string] = len(string_pool)
+            string_pool.extend(encoded_string)
+        return string_offsets[encoded_string], len(encoded_string)
+    records = bytearray()
+    for value, mask, attribute in entries:
+        records.extend(RECORD_STRUCT.pack(
+            value, mask, fixed_width_field(attribute['valueRepresentation']),
+            fixed_width_field(attribute['valueMultiplicity']), attribute['retired'],
+            *(pooled(attribute['name']) + pooled(attribute['keyword']))))
+    keyword_order = sorted(range(len(entries)), key=lambda index: entries[index][2]['keyword'].encode('utf-8'))
+    keyword_index = b''.join(INDEX_STRUCT.pack(index) for index in keyword_order)
+    string_pool_offset = HEADER_STRUCT.size + len(records) + len(keyword_index)
+    header = HEADER_STRUCT.pack(MAGIC_NUMBER, FORMAT_VERSION, len(entries), string_pool_offset)
+    return header + bytes(records) + keyword_index + bytes(string_pool)
+
+
+def fixed_width_field(string: str) -> bytes:
+    encoded_string = string.encode('ascii')
+    if len(encoded_string) > 16:
+        raise ValueError('"{}" does not fit in a data dictionary record.'.format(string))
+    return encoded_string
+
+
+class SortedRecordField:
+    '''
+    A read-only sequence of one field of the records, in the order they
+    are sorted by, so that they can be searched with `bisect` without
+    reading them all.
+    '''
+    def __init__(self, data_dictionary: 'DataDictionary', read_field: Callable[[int], Any]) -> None:
+        self.data_dictionary = data_dictionary
+        self.read_field = read_field
+
+    def __len__(self) -> int:
+        return len(self.data_dictionary)
+
+    def __getitem__(self, index: int) -> Any:
+        return self.read_field(index)
+
+
+class DataDictionary:
+    '''
+    Look up the attributes of a binary data dictionary file by tag or
+    keyword, reading only the records visited by a binary search.
+    '''
+    def __init__(self, filepath: str) -> None:
+        with open(filepath, 'rb') as dictionary_file:
+            self.buffer = mmap.mmap(dictionary_file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self.buffer[:HEADER_STRUCT.size]
+        if len(header) < HEADER_STRUCT.size or HEADER_STRUCT.unpack(header)[:2] != (MAGIC_NUMBER, FORMAT_VERSION):
+            self.buffer.close()
+            raise ValueError('{} is not a version {} data dictionary file.'.format(filepath, FORMAT_VERSION))
+        _, _, self.record_count, self.string_pool_offset = HEADER_STRUCT.unpack(header)
+        self.keyword_index_offset = HEADER_STRUCT.size + self.record_count * RECORD_STRUCT.size
+        self.tag_values = SortedRecordField(self, self.tag_value)
+        self.keywords = SortedRecordField(self, lambda position: self.encoded_keyword(self.keyword_record(position)))
+        self.masked_tags = None  # type: Optional[MaskedTagMatcher]
+
+    def __len__(self) -> int:
+        return self.record_count
+
+    def __iter__(self) -> Iterator[DataElement]:
+        return (self.element(index) for index in range(self.record_count))
+
+    def __enter__(self) -> 'DataDictionary':
+        return self
+
+    def __exit__(self, *exception_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.buffer.close()
+
+    def record_offset(self, index: int) -> int:
+        return HEADER_STRUCT.size + index * RECORD_STRUCT.size
+
+    def tag_value(self, index: int) -> int:
+        return INDEX_STRUCT.unpack_from(self.buffer, self.record_offset(index))[0]
+
+    def keyword_record(self, position: int) -> int:
+        return INDEX_STRUCT.unpack_from(self.buffer, self.keyword_index_offset + position * INDEX_STRUCT.size)[0]
+
+    def encoded_keyword(self, index: int) -> bytes:
+        keyword_offset, keyword_length = RECORD_STRUCT.unpack_from(self.buffer, self.record_offset(index))[-2:]
+        return self.pooled_bytes(keyword_offset, keyword_length)
+
+    def pooled_bytes(self, offset: int, length: int) -> bytes:
+        start = self.string_pool_offset + offset
+        return self.buffer[start:start + length]
+
+    def element(self, index: int) -> DataElement:
+        value, mask, vr, vm, retired, name_offset, name_length, keyword_offset, keyword_length = \
+            RECORD_STRUCT.unpack_from(self.buffer, self.record_offset(index))
+        return DataElement(value, mask, vr.rstrip(b'\x00').decode('ascii'), vm.rstrip(b'\x00').decode('ascii'),
+                           bool(retired), self.pooled_bytes(name_offset, name_length).decode('utf-8'),
+                           self.pooled_bytes(keyword_offset, keyword_length).decode('utf-8'))
+
+    def lookup(self, tag: TagType) -> Optional[DataElement]:
+        '''
+        Return the attribute with the tag given, e.g. `(0010,0010)` or
+        0x00100010, or the repeating group attribute it belongs to, e.g.
+        `(60xx,3000)` for 0x60023000. Returns None if there is neither.
+        '''
+        tag_value = int(tag_slug(tag), 16)
+        index = bisect.bisect_left(self.tag_values, tag_value)
+        if index < self.record_count and self.tag_value(index) == tag_value:
+            element = self.element(index)
+            if element.mask == FULL_TAG_MASK:
+                return element
+        masked_index = self.masked_tag_matcher().match(tag_value)
+        return None if masked_index is None else self.element(masked_index)
+
+    def masked_tag_matcher(self) -> MaskedTagMatcher:
+        # Built on the first lookup of a tag missing from the records, so
+        # that opening the file still reads nothing but the header.
+        if self.masked_tags is None:
+            self.masked_tags = MaskedTagMatcher((element.tag, element.mask, index)
+                                                for index, element in enumerate(self)
+                                                if element.mask != FULL_TAG_MASK)
+        return self.masked_tags
+
+    def lookup_keyword(self, keyword: str) -> Optional[DataElement]:
+        encoded_keyword = keyword.encode('utf-8')
+        position = bisect.bisect_left(self.keywords, encoded_keyword)
+        if keyword and position < self.record_count and self.keywords[position] == encoded_keyword:
+            return self.element(self.keyword_record(position))
+        return None
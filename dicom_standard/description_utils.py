@@ -0,0 +1,68 @@
+'''
+Utility functions for storing the descriptions of the module-attribute
+relationships once each.
+
+Expanding macros copies the description of each macro attribute into every
+module including the macro, so most descriptions are repeated many times.
+Each distinct description is identified by a hash of its HTML, which lets
+separate stages agree on the ID of a description without sharing any state.
+'''
+from collections import OrderedDict
+from typing import Dict, List, Any
+import hashlib
+
+DESCRIPTION_ID_LENGTH = 16
+DESCRIPTION_MODES = ['inline', 'reference']
+
+PairType = Dict[str, Any]
+
+
+def description_id(description: str) -> str:
+    return hashlib.sha256(description.encode('utf-8')).hexdigest()[:DESCRIPTION_ID_LENGTH]
+
+
+def description_ids(pairs: List[PairType]) -> Dict[str, str]:
+    '''
+    Map each distinct description of the pairs to its ID, in the order the
+    descriptions first appear.
+    '''
+    ids = OrderedDict()  # type: Dict[str, str]
+    for pair in pairs:
+        if pair['description'] not in ids:
+            ids[pair['description']] = description_id(pair['description'])
+    return ids
+
+
+def description_table(pairs: List[PairType]) -> Dict[str, str]:
+    return OrderedDict((unique_id, description) for description, unique_id in description_ids(pairs).items())
+
+
+def reference_descriptions(pairs: List[PairType]) -> List[PairType]:
+    '''
+    Replace the `description` of each pair with the `descriptionId` of its
+    entry in the description table.
+    '''
+    ids = description_ids(pairs)
+    return [replace_field(pair, 'description', 'descriptionId', ids[pair['description']]) for pair in pairs]
+
+
+def reference_description(pair: PairType) -> PairType:
+    '''
+    `reference_descriptions` for a single pair, for stages handling the pairs
+    one at a time.
+    '''
+    return replace_field(pair, 'description', 'descriptionId', description_id(pair['description']))
+
+
+def inline_descriptions(pairs: List[PairType], descriptions: Dict[str, str]) -> List[PairType]:
+    '''
+    Undo `reference_descriptions`, using the description table.
+    '''
+    return [replace_field(pair, 'descriptionId', 'description', descriptions[pair['descriptionId']])
+            if 'descriptionId' in pair else pair for pair in pairs]
+
+
+def replace_field(pair: PairType, old_key: str, new_key: str, value: Any) -> PairType:
+    # The new field takes the place of the old one, so that the fields of
+    # the pair stay in the same order.
+    return OrderedDict((new_key, value) if key == old_key else (key, pair[key]) for key in pair)
@@ -0,0 +1,124 @@
+'''
+Indexes over a parsed part of the DICOM Standard.
+
+Each extractor used to scan the whole document for the tables or
+chapters it needs. The indexes are built once per parsed document, and
+every later query is a dictionary lookup. They are stored on the parsed
+document itself, so they live exactly as long as the document does; they
+do not notice changes made to the tree after they were built.
+'''
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import re
+
+from bs4 import BeautifulSoup, Tag
+
+from dicom_standard import parse_relations as pr
+
+INDEX_ATTRIBUTE_PREFIX = '_dicom_standard_'
+
+# Annexes are chapters lettered instead of numbered, e.g. `chapter_A`.
+ANNEX_ID_RE = re.compile(r'chapter_[A-Z]+$')
+
+TagsByKeyType = Dict[str, Tag]
+TablesByKeyType = Dict[str, List[Tag]]
+
+
+class TableIndex:
+    '''
+    All `div.table` elements of a document, in document order, keyed by
+    their HTML ID and by their title. If an ID or title is repeated, the
+    first table wins.
+    '''
+    def __init__(self, standard: BeautifulSoup) -> None:
+        self.tables = standard.find_all('div', class_='table')
+        self.by_id = {}  # type: TagsByKeyType
+        self.by_title = {}  # type: TagsByKeyType
+        for table_div in self.tables:
+            self.by_id.setdefault(pr.table_id(table_div), table_div)
+            title = table_title(table_div)
+            if title is not None:
+                self.by_title.setdefault(title, table_div)
+
+    def table(self, table_id: str) -> Optional[Tag]:
+        return self.by_id.get(table_id)
+
+    def table_with_title(self, title: str) -> Optional[Tag]:
+        return self.by_title.get(title)
+
+
+class ChapterIndex:
+    '''
+    The chapters (including annexes) and sections of a document, in
+    document order, keyed by the ID of their title anchor, along with the
+    tables each of them contains.
+    '''
+    def __init__(self, standard: BeautifulSoup) -> None:
+        self.chapters = OrderedDict((chapter_id(chapter_div), chapter_div)
+                                    for chapter_div in standard.find_all('div', class_='chapter'))
+        self.sections = OrderedDict((section_id(section_div), section_div)
+                                    for section_div in standard.find_all('div', class_='section'))
+        self.tables_by_chapter = {chapter_id: [] for chapter_id in self.chapters}  # type: TablesByKeyType
+        self.tables_by_section = {section_id: [] for section_id in self.sections}  # type: TablesByKeyType
+        for table_div in table_index(standard).tables:
+            self.record_table(table_div)
+
+    def record_table(self, table_div: Tag) -> None:
+        for ancestor in table_div.parents:
+            classes = ancestor.get('class', []) if ancestor.name == 'div' else []
+            if 'section' in classes:
+                self.tables_by_section[section_id(ancestor)].append(table_div)
+            elif 'chapter' in classes:
+                self.tables_by_chapter[chapter_id(ancestor)].append(table_div)
+                return
+
+    def chapter(self, chapter_id: str) -> Optional[Tag]:
+        return self.chapters.get(chapter_id)
+
+    def annex_ids(self) -> List[str]:
+        return [chapter_id for chapter_id in self.chapters if ANNEX_ID_RE.match(chapter_id)]
+
+    def section(self, section_id: str) -> Optional[Tag]:
+        return self.sections.get(section_id)
+
+    def tables_in_chapter(self, chapter_id: str) -> List[Tag]:
+        return self.tables_by_chapter.get(chapter_id, [])
+
+    def tables_in_section(self, section_id: str) -> List[Tag]:
+        '''
+        Tables anywhere inside the section, including its subsections.
+        '''
+        return self.tables_by_section.get(section_id, [])
+
+
+def table_index(standard: BeautifulSoup) -> TableIndex:
+    return cached_index(standard, TableIndex)
+
+
+def chapter_index(standard: BeautifulSoup) -> ChapterIndex:
+    return cached_index(standard, ChapterIndex)
+
+
+def cached_index(standard, index_class):
+    # BeautifulSoup resolves unknown attributes to child tags, so the
+    # cached index is read from the instance dictionary directly.
+    index_attribute = INDEX_ATTRIBUTE_PREFIX + index_class.__name__
+    index = vars(standard).get(index_attribute)
+    if index is None:
+        index = index_class(standard)
+        vars(standard)[index_attribute] = index
+    return index
+
+
+def table_title(table_div: Tag) -> Optional[str]:
+    title = table_div.p.strong if table_div.p is not None else None
+    return title.get_text() if title is not None else None
+
+
+def chapter_id(chapter_div: Tag) -> str:
+    return chapter_div.div.div.div.h1.a.get('id')
+
+
+def section_id(section_div: Tag) -> str:
+    titlepage = section_div.find('div', class_='titlepage', recursive=False)
+    return titlepage.find('a', id=True).get('id')
@@ -0,0 +1,211 @@
+'''
+Load the CIOD, module and attribute JSON files of `dist` into a single
+SQLite database. The relationships between them are stored with foreign
+keys, and the descriptions are indexed for full-text search (when SQLite
+is built with FTS5).
+'''
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Tuple
+import argparse
+import os
+import sqlite3
+import sys
+
+from dicom_standard import json_io
+from dicom_standard import parse_lib as pl
+from dicom_standard.description_utils import inline_descriptions
+
+RecordType = Dict[str, Any]
+
+SCHEMA = '''
+CREATE TABLE ciods (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    link_to_standard TEXT NOT NULL
+);
+
+CREATE TABLE modules (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    link_to_standard TEXT NOT NULL
+);
+
+CREATE TABLE attributes (
+    id TEXT PRIMARY KEY,
+    tag TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    value_representation TEXT NOT NULL,
+    value_multiplicity TEXT NOT NULL,
+    retired INTEGER NOT NULL
+);
+CREATE INDEX attributes_keyword ON attributes (keyword);
+
+CREATE TABLE ciod_modules (
+    ciod TEXT NOT NULL REFERENCES ciods (id),
+    module TEXT NOT NULL REFERENCES modules (id),
+    position INTEGER NOT NULL,
+    usage TEXT NOT NULL,
+    conditional_statement TEXT,
+    information_entity TEXT NOT NULL,
+    PRIMARY KEY (ciod, module)
+);
+CREATE INDEX ciod_modules_module ON ciod_modules (module);
+
+CREATE TABLE module_attributes (
+    path TEXT PRIMARY KEY,
+    module TEXT NOT NULL REFERENCES modules (id),
+    attribute TEXT NOT NULL REFERENCES attributes (id),
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    type TEXT NOT NULL,
+    link_to_standard TEXT NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE INDEX module_attributes_module ON module_attributes (module, position);
+CREATE INDEX module_attributes_attribute ON module_attributes (attribute);
+CREATE INDEX module_attributes_tag ON module_attributes (tag);
+
+CREATE TABLE external_references (
+    path TEXT NOT NULL REFERENCES module_attributes (path),
+    position INTEGER NOT NULL,
+    source_url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    PRIMARY KEY (path, position)
+);
+'''
+
+# The text of each description, along with the kind and ID of the record it
+# describes. Search with e.g.
+#   SELECT kind, id FROM description_search WHERE description_search MATCH 'pixel spacing'
+SEARCH_SCHEMA = '''
+CREATE VIRTUAL TABLE description_search USING fts5 (description, kind UNINDEXED, id UNINDEXED);
+'''
+
+
+def export_standard(connection: sqlite3.Connection, ciods: Dict[str, RecordType], modules: Dict[str, RecordType],
+                    attributes: Dict[str, RecordType], ciod_to_modules: List[RecordType],
+                    module_to_attributes: List[RecordType]) -> None:
+    '''
+    Raises a ValueError, before writing anything, if two CIOD-module pairs or
+    two module-attribute pairs have the same key.
+    '''
+    check_unique_keys(ciod_to_modules, ['ciod', 'module'], 'ciod_to_modules')
+    check_unique_keys(module_to_attributes, ['path'], 'module_to_attributes')
+    connection.executescript(SCHEMA)
+    connection.executemany('INSERT INTO ciods VALUES (?, ?, ?, ?)', map(definition_row, ciods.values()))
+    connection.executemany('INSERT INTO modules VALUES (?, ?, ?, ?)', map(definition_row, modules.values()))
+    connection.executemany('INSERT INTO attributes VALUES (?, ?, ?, ?, ?, ?, ?)', (
+        (attribute_id, a['tag'], a['name'], a['keyword'], a['valueRepresentation'],
+         a['valueMultiplicity'], a['retired'])
+        for attribute_id, a in attributes.items()))
+    connection.executemany('INSERT INTO ciod_modules VALUES (?, ?, ?, ?, ?, ?)', (
+        (r['ciod'], r['module'], position, r['usage'], r['conditionalStatement'], r['informationEntity'])
+        for position, r in enumerate(ciod_to_modules)))
+    connection.executemany('INSERT INTO module_attributes VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (
+        (p['path'], p['module'], p['path'].split(':')[-1], position, p['tag'], p['type'],
+         p['linkToStandard'], p['description'])
+        for position, p in enumerate(module_to_attributes)))
+    connection.executemany('INSERT INTO external_references VALUES (?, ?, ?, ?)', (
+        (p['path'], position, reference['sourceUrl'], reference['title'])
+        for p in module_to_attributes
+        for position, reference in enumerate(p['externalReferences'])))
+    if has_fts5(connection):
+        connection.executescript(SEARCH_SCHEMA)
+        connection.executemany('INSERT INTO description_search VALUES (?, ?, ?)',
+                               description_rows(ciods, modules, module_to_attributes))
+    else:
+        print('SQLite was built without FTS5; descriptions are not indexed for search.', file=sys.stderr)
+    connection.commit()
+
+
+def check_unique_keys(records: List[RecordType], key_fields: List[str], table_name: str) -> None:
+    key_counts = Counter(tuple(record[field] for field in key_fields) for record in records)
+    duplicate_keys = sorted(':'.join(key) for key, count in key_counts.items() if count > 1)
+    if duplicate_keys:
+        raise ValueError('{} has more than one row for {}'.format(table_name, ', '.join(duplicate_keys)))
+
+
+def definition_row(definition: RecordType) -> Tuple[str, str, str, str]:
+    return definition['id'], definition['name'], definition['description'], definition['linkToStandard']
+
+
+def description_rows(ciods: Dict[str, RecordType], modules: Dict[str, RecordType],
+                     module_to_attributes: List[RecordType]) -> Iterator[Tuple[str, str, str]]:
+    # Attributes included through a macro share its descriptions, so the
+    # text of each distinct description is only extracted once.
+    description_texts = {}  # type: Dict[str, str]
+
+    def text(description):
+        if description not in description_texts:
+            description_texts[description] = pl.text_from_html_string(description)
+        return description_texts[description]
+    for ciod in ciods.values():
+        yield text(ciod['description']), 'ciod', ciod['id']
+    for module in modules.values():
+        yield text(module['description']), 'module', module['id']
+    for pair in module_to_attributes:
+        yield text(pair['description']), 'module_attribute', pair['path']
+
+
+def has_fts5(connection: sqlite3.Connection) -> bool:
+    try:
+        connection.execute('CREATE VIRTUAL TABLE temp.fts5_check USING fts5 (text)')
+    except sqlite3.OperationalError:
+        return False
+    connection.execute('DROP TABLE temp.fts5_check')
+    return True
+
+
+def foreign_key_violations(connection: sqlite3.Connection) -> Dict[Tuple[str, str], int]:
+    '''
+    Count the rows of each table referencing a missing row of another.
+    '''
+    violations = {}  # type: Dict[Tuple[str, str], int]
+    for table, _, parent_table, _ in connection.execute('PRAGMA foreign_key_check'):
+        violations[(table, parent_table)] = violations.get((table, parent_table), 0) + 1
+    return violations
+
+
+def write_database(database_path: str, *json_data: Any) -> None:
+    '''
+    Build the database in a temporary file, so that a failed or interrupted
+    export never leaves a partial database at `database_path`.
+    '''
+    temporary_path = database_path + '.tmp'
+    if os.path.exists(temporary_path):
+        os.remove(temporary_path)
+    try:
+        connection = sqlite3.connect(temporary_path)
+        try:
+            export_standard(connection, *json_data)
+            for (table, parent_table), count in sorted(foreign_key_violations(connection).items()):
+                print('{} rows of {} reference missing {}.'.format(count, table, parent_table), file=sys.stderr)
+        finally:
+            connection.close()
+        os.replace(temporary_path, database_path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    for input_name in ['ciods', 'modules', 'attributes', 'ciod_to_modules', 'module_to_attributes']:
+        parser.add_argument(input_name, help='{}.json file, optionally gzip-compressed'.format(input_name))
+    parser.add_argument('database', help='SQLite database to write')
+    parser.add_argument('--descriptions', help='descriptions.json file, needed if module_to_attributes '
+                                               'refers to descriptions by ID')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    ciods, modules, attributes, ciod_to_modules, module_to_attributes = map(json_io.read_json_to_dict, [
+        args.ciods, args.modules, args.attributes, args.ciod_to_modules, args.module_to_attributes])
+    if args.descriptions is not None:
+        module_to_attributes = inline_descriptions(module_to_attributes, json_io.read_json_to_dict(args.descriptions))
+    write_database(args.database, ciods, modules, attributes, ciod_to_modules, module_to_attributes)
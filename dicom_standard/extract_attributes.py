@@ -1,10 +1,13 @@
 '''
 Extract the listing of all attributes given in PS3.6 of the DICOM Standard.
 '''
-import sys
 
+from dicom_standard import cache
+from dicom_standard import json_io
 from dicom_standard import parse_lib as pl
+from dicom_standard import profiling
 from dicom_standard import parse_relations as pr
+from dicom_standard.document_index import table_index
 from dicom_standard.table_utils import table_to_dict
 
 COLUMN_TITLES = ['tag', 'name', 'keyword', 'valueRepresentation', 'valueMultiplicity', 'retired']
@@ -12,8 +15,7 @@ ATTR_TABLE_ID = 'table_6-1'
 
 
 def get_attribute_table(standard):
-    all_tables = standard.find_all('div', class_='table')
-    html_table = pl.find_tdiv_by_id(all_tables, ATTR_TABLE_ID)
+    html_table = table_index(standard).table(ATTR_TABLE_ID)
     list_table = attribute_table_to_list(html_table)
     return table_to_dict(list_table, COLUMN_TITLES)
 
@@ -33,8 +35,17 @@ def attribute_table_to_json(table):
     return attribute_dict
 
 
+def extract_attributes_file(filepath):
+    return extract_attributes(pl.parse_html_file(filepath))
+
+
+def extract_attributes(standard):
+    with profiling.step('table extraction'):
+        table = get_attribute_table(standard)
+        return attribute_table_to_json(table)
+
+
 if __name__ == '__main__':
-    standard = pl.parse_html_file(sys.argv[1])
-    table = get_attribute_table(standard)
-    parsed_table_data = attribute_table_to_json(table)
-    pl.write_pretty_json(parsed_table_data)
+    args = cache.parse_extraction_arguments(__doc__)
+    parsed_table_data = cache.cached_extraction('attributes', args.standard, extract_attributes_file, args.use_cache)
+    json_io.write_json(parsed_table_data, args.format)
@@ -3,10 +3,13 @@ Load the CIOD module tables from DICOM Standard PS3.3, Annex A.
 All CIOD tables are defined in chapter A of the DICOM Standard.
 Output the tables in JSON format, one entry per CIOD.
 '''
-import sys
+from functools import partial
 import re
 
+from dicom_standard import cache
+from dicom_standard import json_io
 from dicom_standard import parse_lib as pl
+from dicom_standard import profiling
 from dicom_standard import parse_relations as pr
 from dicom_standard.table_utils import expand_spans, table_to_dict, stringify_table, tdiv_to_table_list
 
@@ -16,10 +19,14 @@ COLUMN_TITLES = ['informationEntity', 'module', 'reference_fragment', 'usage']
 
 
 def get_ciod_tables(standard):
+    table_divs = ciod_table_divs(standard)
+    ciod_table_lists = list(map(tdiv_to_table_list, table_divs))
+    return (ciod_table_lists, table_divs)
+
+
+def ciod_table_divs(standard):
     chapter_A_table_divs = pl.all_tdivs_in_chapter(standard, CHAPTER_ID)
-    ciod_table_divs = list(filter(is_valid_ciod_table, chapter_A_table_divs))
-    ciod_table_lists = list(map(tdiv_to_table_list, ciod_table_divs))
-    return (ciod_table_lists, ciod_table_divs)
+    return list(filter(is_valid_ciod_table, chapter_A_table_divs))
 
 
 def is_valid_ciod_table(table_div):
@@ -33,6 +40,17 @@ def tables_to_json(tables, tdivs):
     return list(map(get_table_with_metadata, zip(table_dicts, tdivs)))
 
 
+def extract_tables(standard, use_cache=False):
+    return cache.cached_table_extraction('ciod_module_tables', ciod_table_divs(standard), table_div_to_json,
+                                         get_ciod_description, use_cache)
+
+
+def table_div_to_json(tdiv):
+    with profiling.step('span expansion'):
+        table = expand_spans(tdiv_to_table_list(tdiv))
+    return get_table_with_metadata((ciod_table_to_dict(stringify_table(table)), tdiv))
+
+
 def ciod_table_to_dict(table):
     return table_to_dict(table, COLUMN_TITLES)
 
@@ -63,8 +81,12 @@ def get_ciod_description(tdiv):
         return None
 
 
+def extract_tables_file(filepath, use_cache=False):
+    return extract_tables(pl.parse_html_file(filepath), use_cache)
+
+
 if __name__ == "__main__":
-    standard = pl.parse_html_file(sys.argv[1])
-    tables, tdivs = get_ciod_tables(standard)
-    parsed_table_data = tables_to_json(tables, tdivs)
-    pl.write_pretty_json(parsed_table_data)
+    args = cache.parse_extraction_arguments(__doc__)
+    parsed_table_data = cache.cached_extraction('ciod_module_tables', args.standard,
+                                                partial(extract_tables_file, use_cache=args.use_cache), args.use_cache)
+    json_io.write_json(parsed_table_data, args.format)
@@ -3,29 +3,37 @@ Load the macro tables specified throughout PS3.3 in the DICOM Standard.
 These tables are of the same form as the module-attribute tables and
 are used to expand macro references in Annex C.
 '''
-from typing import Tuple, List, Dict, Iterator
-import sys
+from typing import Tuple, List, Dict, Iterable
+from functools import partial
 import re
 
 from bs4 import BeautifulSoup, Tag
 
+from dicom_standard import cache
+from dicom_standard import json_io
 from dicom_standard import parse_lib as pl
 from dicom_standard import parse_relations as pr
-from dicom_standard.table_utils import expand_spans, stringify_table, tdiv_to_table_list, TableListType
+from dicom_standard.document_index import table_index
+from dicom_standard.table_utils import expand_spans, tdiv_to_table_list, TableListType
 from dicom_standard.macro_utils import get_id_from_link, MetadataTableType
 
 # Macros and modules require the same metadata and formatting,
-# so they can share these two functions.
-from extract_modules_with_attributes import module_table_to_dict, get_table_with_metadata
+# so they share these functions.
+from dicom_standard.extract_modules_with_attributes import (module_table_to_dict, get_table_with_metadata,
+                                                            table_div_to_json)
 
 TABLE_SUFFIX_RE = re.compile("(.*Macro Attributes$)|(.*Macro Attributes Description$)")
 
 
 def get_macro_tables(standard: BeautifulSoup) -> Tuple[List[TableListType], List[Tag]]:
-    all_table_divs = standard.find_all('div', class_='table')
-    macro_table_divs = list(filter(is_valid_macro_table, all_table_divs))
-    macro_table_lists = list(map(tdiv_to_table_list, macro_table_divs))
-    return (macro_table_lists, macro_table_divs)
+    table_divs = macro_table_divs(standard)
+    macro_table_lists = list(map(tdiv_to_table_list, table_divs))
+    return (macro_table_lists, table_divs)
+
+
+def macro_table_divs(standard: BeautifulSoup) -> List[Tag]:
+    all_table_divs = table_index(standard).tables
+    return list(filter(is_valid_macro_table, all_table_divs))
 
 
 def is_valid_macro_table(table_div: Tag) -> bool:
@@ -34,21 +42,29 @@ def is_valid_macro_table(table_div: Tag) -> bool:
 
 def tables_to_json(tables: List[TableListType], tdivs: List[Tag]) -> Dict[str, MetadataTableType]:
     expanded_tables = map(expand_spans, tables)
-    stringified_tables = map(stringify_table, expanded_tables)
-    table_dicts = map(module_table_to_dict, stringified_tables)
+    table_dicts = map(module_table_to_dict, expanded_tables)
     list_of_tables = map(get_table_with_metadata, zip(table_dicts, tdivs))
     return key_tables_by_id(list_of_tables)
 
 
-def key_tables_by_id(list_of_tables: Iterator[MetadataTableType]) -> Dict[str, MetadataTableType]:
+def extract_tables(standard: BeautifulSoup, use_cache: bool = False) -> Dict[str, MetadataTableType]:
+    return key_tables_by_id(cache.cached_table_extraction('macro_tables', macro_table_divs(standard),
+                                                          table_div_to_json, pr.table_description, use_cache))
+
+
+def key_tables_by_id(list_of_tables: Iterable[MetadataTableType]) -> Dict[str, MetadataTableType]:
     dict_of_tables = {}
     for table in list_of_tables:
         dict_of_tables[get_id_from_link(table['linkToStandard'])] = table
     return dict_of_tables
 
 
+def extract_tables_file(filepath: str, use_cache: bool = False) -> Dict[str, MetadataTableType]:
+    return extract_tables(pl.parse_html_file(filepath), use_cache)
+
+
 if __name__ == '__main__':
-    standard = pl.parse_html_file(sys.argv[1])
-    tables, tdivs = get_macro_tables(standard)
-    parsed_table_data = tables_to_json(tables, tdivs)
-    pl.write_pretty_json(parsed_table_data)
+    args = cache.parse_extraction_arguments(__doc__)
+    parsed_table_data = cache.cached_extraction('macro_tables', args.standard,
+                                                partial(extract_tables_file, use_cache=args.use_cache), args.use_cache)
+    json_io.write_json(parsed_table_data, args.format)
@@ -3,24 +3,34 @@ Load the module-attribute tables from DICOM Standard PS3.3, Annex C.
 Expand out macros in-line for each module. Output the tables in JSON
 format, one entry per attribute.
 '''
-import sys
 import re
+from copy import copy
+from functools import partial
 
+from dicom_standard import cache
+from dicom_standard import json_io
 from dicom_standard import parse_lib as pl
+from dicom_standard import profiling
 from dicom_standard import parse_relations as pr
-from dicom_standard.table_utils import expand_spans, table_to_dict, stringify_table, tdiv_to_table_list
+from dicom_standard.table_utils import expand_spans, tdiv_to_table_list
+from dicom_standard.macro_utils import macro_id_from_name_cell
 
 CHAPTER_ID = 'chapter_C'
 TABLE_SUFFIX = re.compile("(.*Module Attributes$)|(.*Module Table$)")
 COLUMN_TITLES_WITH_TYPE = ['name', 'tag', 'type', 'description']
 COLUMN_TITLES_NO_TYPE = ['name', 'tag', 'description']
+TEXT_COLUMNS = ['name', 'tag', 'type']
 
 
 def get_module_tables(standard):
+    table_divs = module_table_divs(standard)
+    module_table_lists = list(map(tdiv_to_table_list, table_divs))
+    return (module_table_lists, table_divs)
+
+
+def module_table_divs(standard):
     chapter_C_table_divs = pl.all_tdivs_in_chapter(standard, CHAPTER_ID)
-    module_table_divs = list(filter(is_valid_module_table, chapter_C_table_divs))
-    module_table_lists = list(map(tdiv_to_table_list, module_table_divs))
-    return (module_table_lists, module_table_divs)
+    return list(filter(is_valid_module_table, chapter_C_table_divs))
 
 
 def is_valid_module_table(table_div):
@@ -29,15 +39,45 @@ def is_valid_module_table(table_div):
 
 def tables_to_json(tables, tdivs):
     expanded_tables = map(expand_spans, tables)
-    stringified_tables = map(stringify_table, expanded_tables)
-    table_dicts = map(module_table_to_dict, stringified_tables)
+    table_dicts = map(module_table_to_dict, expanded_tables)
     return list(map(get_table_with_metadata, zip(table_dicts, tdivs)))
 
 
+def extract_tables(standard, use_cache=False):
+    return cache.cached_table_extraction('module_attribute_tables', module_table_divs(standard),
+                                         table_div_to_json, pr.table_description, use_cache)
+
+
+def table_div_to_json(tdiv):
+    with profiling.step('span expansion'):
+        table = expand_spans(tdiv_to_table_list(tdiv))
+    return get_table_with_metadata((module_table_to_dict(table), tdiv))
+
+
 def module_table_to_dict(table):
     has_type_column = len(table[0]) > 3
     column_titles = COLUMN_TITLES_WITH_TYPE if has_type_column else COLUMN_TITLES_NO_TYPE
-    return table_to_dict(table, column_titles)
+    return [attribute_row_to_dict(row, column_titles) for row in table]
+
+
+def attribute_row_to_dict(row, column_titles):
+    '''
+    Along with the HTML of each cell, record the fields that later stages
+    need from it while the cells are still parsed: the text of the name,
+    tag and type cells, and the ID of the macro an include row refers to.
+    '''
+    cells = dict(zip(column_titles, row))
+    attribute = {column: str(cell) for column, cell in cells.items()}
+    for column in TEXT_COLUMNS:
+        if column in cells:
+            attribute[column + 'Text'] = cell_text(cells[column])
+    attribute['macroId'] = macro_id_from_name_cell(cells['name'])
+    return attribute
+
+
+def cell_text(cell):
+    # Cells covered by a colspan are stringified as 'None'.
+    return str(cell) if cell is None else cell.get_text()
 
 
 def get_table_with_metadata(table_with_tdiv):
@@ -58,6 +98,9 @@ def get_short_standard_link(tdiv):
 
 
 def clean_table_description(description):
+    # The description paragraph is copied so that the parse tree is left
+    # untouched for any other extractor sharing it (see `build.py`).
+    description = copy(description)
     table_link = description.find('a', class_='xref')
     if table_link is not None:
         table_link.href = ''
@@ -66,8 +109,12 @@ def clean_table_description(description):
     return description
 
 
+def extract_tables_file(filepath, use_cache=False):
+    return extract_tables(pl.parse_html_file(filepath), use_cache)
+
+
 if __name__ == '__main__':
-    standard = pl.parse_html_file(sys.argv[1])
-    tables, tdivs = get_module_tables(standard)
-    parsed_table_data = tables_to_json(tables, tdivs)
-    pl.write_pretty_json(parsed_table_data)
+    args = cache.parse_extraction_arguments(__doc__)
+    parsed_table_data = cache.cached_extraction('module_attribute_tables', args.standard,
+                                                partial(extract_tables_file, use_cache=args.use_cache), args.use_cache)
+    json_io.write_json(parsed_table_data, args.format)
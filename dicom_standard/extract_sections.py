@@ -1,11 +1,39 @@
+'''
+Extract the HTML of every referenceable section (sections, tables, figures,
+bibliography entries and notes) from the DICOM Standard pages.
+
+Pages are scanned with a streaming tokenizer instead of being parsed into a
+full BeautifulSoup tree. Only the open elements of the page are tracked, and
+the source of each section enclosing a referenced ID is emitted as soon as
+the section is closed.
+'''
+from functools import partial
+from html.parser import HTMLParser
+from multiprocessing import Pool
+from typing import Iterator, List, TextIO, Tuple
+import argparse
+import json
 import sys
 import re
 import os
 
-from dicom_standard.parse_lib import parse_html_file, write_pretty_json
+from bs4.builder import HTMLTreeBuilder
+
+from dicom_standard import cache
+from dicom_standard import json_io
+from dicom_standard import profiling
 
 REFERENCED_IDS_RE = re.compile(r'(sect.*)|(figure.*)|(biblio.*)|(table.*)|(note.*)')
 
+# Number of parent elements between an ID anchor and the section it names.
+ENCLOSING_SECTION_LEVELS = [('sect', 5), ('biblio', 3), ('table', 2), ('note', 6)]
+DEFAULT_ENCLOSING_SECTION_LEVEL = 2
+
+EMPTY_ELEMENT_TAGS = HTMLTreeBuilder().empty_element_tags
+FEED_CHUNK_SIZE = 1 << 16
+
+SectionType = Tuple[str, str]
+
 
 def extract_section_ids(standard):
     return {page: referenced_id_anchors(html) for page, html in standard.items()}
@@ -26,26 +54,204 @@ def normalize_sections(all_sections):
     return {section['id']: str(section_html_from_id_anchor(section)) for section in all_sections}
 
 
+def enclosing_section_levels(section_id: str) -> int:
+    for prefix, levels in ENCLOSING_SECTION_LEVELS:
+        if section_id.startswith(prefix):
+            return levels
+    return DEFAULT_ENCLOSING_SECTION_LEVEL
+
+
 def enclosing_section_from_id(id_div):
-    # TODO: put example from the standard here
-    if re.match(r'sect.*', id_div['id']):
-        return id_div.parent.parent.parent.parent.parent
-    elif re.match(r'biblio.*', id_div['id']):
-        return id_div.parent.parent.parent
-    elif re.match(r'table.*', id_div['id']):
-        return id_div.parent.parent
-    elif re.match(r'note.*', id_div['id']):
-        return id_div.parent.parent.parent.parent.parent.parent
-    else:
-        return id_div.parent.parent
+    # Example: a section title anchor is nested as
+    # div.section > div.titlepage > div > div > h2 > a#sect_A.2
+    enclosing_section = id_div
+    for _ in range(enclosing_section_levels(id_div['id'])):
+        enclosing_section = enclosing_section.parent
+    return enclosing_section
+
+
+class OpenElement:
+    __slots__ = ('name', 'start', 'section_ids')
+
+    def __init__(self, name: str, start: int) -> None:
+        self.name = name
+        self.start = start
+        self.section_ids = []  # type: List[str]
+
+
+class SectionStreamParser(HTMLParser):
+    '''
+    Tracks the stack of open elements the same way BeautifulSoup's
+    `html.parser` tree builder does, so that the element enclosing an
+    ID anchor can be located without building a parse tree. Once that
+    element is closed, its source is queued in `completed_sections`.
+    '''
+    def __init__(self, page_html: str) -> None:
+        super().__init__(convert_charrefs=True)
+        self.page_html = page_html
+        self.open_elements = []  # type: List[OpenElement]
+        self.document_section_ids = []  # type: List[str]
+        self.completed_sections = []  # type: List[SectionType]
+        self.buffer_offset = 0
+        self.fed_length = 0
+        self.position = 0
+
+    def feed(self, data: str) -> None:
+        self.buffer_offset = self.fed_length - len(self.rawdata)
+        self.fed_length += len(data)
+        super().feed(data)
+
+    def updatepos(self, i: int, j: int) -> int:
+        # Keep the absolute offset of the token being handled, since
+        # `getpos` only reports line and column numbers.
+        self.position = self.buffer_offset + j
+        return super().updatepos(i, j)
+
+    def handle_starttag(self, tag, attrs):
+        self.record_id_anchor(tag, attrs)
+        if tag not in EMPTY_ELEMENT_TAGS:
+            self.open_elements.append(OpenElement(tag, self.position))
+
+    def handle_startendtag(self, tag, attrs):
+        self.record_id_anchor(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if not any(element.name == tag for element in self.open_elements):
+            return
+        end_tag_start = self.position
+        while True:
+            element = self.open_elements.pop()
+            if element.name == tag:
+                self.complete_element(element, self.page_html.index('>', end_tag_start) + 1)
+                return
+            # Unclosed elements end where their ancestor is closed.
+            self.complete_element(element, end_tag_start)
+
+    def close(self) -> None:
+        super().close()
+        while self.open_elements:
+            self.complete_element(self.open_elements.pop(), len(self.page_html))
+        self.complete_sections(self.document_section_ids, self.page_html)
+
+    def record_id_anchor(self, tag, attrs):
+        anchor_id = dict(attrs).get('id') if tag == 'a' else None
+        if anchor_id is None or not REFERENCED_IDS_RE.search(anchor_id):
+            return
+        enclosing_index = len(self.open_elements) - enclosing_section_levels(anchor_id)
+        if enclosing_index >= 0:
+            self.open_elements[enclosing_index].section_ids.append(anchor_id)
+        elif enclosing_index == -1:
+            self.document_section_ids.append(anchor_id)
+        else:
+            raise Exception(anchor_id + " has no enclosing section.")
+
+    def complete_element(self, element: OpenElement, end: int) -> None:
+        if element.section_ids:
+            self.complete_sections(element.section_ids, self.page_html[element.start:end])
+
+    def complete_sections(self, section_ids: List[str], section_html: str) -> None:
+        self.completed_sections.extend((section_id, section_html) for section_id in section_ids)
+
+    def pop_completed_sections(self) -> List[SectionType]:
+        sections, self.completed_sections = self.completed_sections, []
+        return sections
+
+
+def stream_sections(page_html: str) -> Iterator[SectionType]:
+    '''
+    Yield `(id, html)` pairs for each referenced section of the page, in the
+    order the sections are closed. The HTML is the section's source markup,
+    which parses to the same tree as the `normalize_sections` output.
+    '''
+    parser = SectionStreamParser(page_html)
+    for chunk_start in range(0, len(page_html), FEED_CHUNK_SIZE):
+        parser.feed(page_html[chunk_start:chunk_start + FEED_CHUNK_SIZE])
+        yield from parser.pop_completed_sections()
+    parser.close()
+    yield from parser.pop_completed_sections()
+
+
+def stream_page_sections(filepath: str, use_cache: bool = False) -> Iterator[SectionType]:
+    return cache.cached_extraction_stream('sections', filepath, stream_unique_sections, use_cache)
+
+
+def stream_unique_sections(filepath: str) -> Iterator[SectionType]:
+    # Only the page source is kept in memory; it is needed to slice out
+    # sections which, like chapter-level ones, may span most of the page.
+    with open(filepath, 'r') as html_file:
+        page_html = html_file.read()
+    yield from unique_sections(page_html)
+
+
+def unique_sections(page_html: str) -> Iterator[SectionType]:
+    '''
+    The sections of the page, keeping the first of several with the same ID.
+    '''
+    seen_ids = set()
+    for section_id, section_html in stream_sections(page_html):
+        if section_id not in seen_ids:
+            seen_ids.add(section_id)
+            yield section_id, section_html
+
+
+def write_sections_json(pages: Iterator[Tuple[str, Iterator[SectionType]]], output: TextIO,
+                        output_format: str = 'pretty') -> None:
+    '''
+    Write `{page: {id: html}}` incrementally, in the same layout as
+    `json_io.write_json`, so the sections of a page are never collected.
+    '''
+    page_indent, section_indent = ('\n    ', '\n        ') if output_format == 'pretty' else ('', '')
+    with json_io.json_output_stream(output, output_format) as json_output:
+        json_output.write('{')
+        page_count = 0
+        for page, sections in pages:
+            json_output.write(',' if page_count > 0 else '')
+            json_output.write(page_indent + json.dumps(page) + ':{')
+            section_count = 0
+            for section_id, section_html in sections:
+                json_output.write(',' if section_count > 0 else '')
+                json_output.write(section_indent + json.dumps(section_id) + ':' + json.dumps(section_html))
+                section_count += 1
+            json_output.write(page_indent + '}' if section_count > 0 else '}')
+            page_count += 1
+        json_output.write(page_indent[:1] + '}' if page_count > 0 else '}')
+
+
+def extract_page_sections(filepath: str, use_cache: bool = False) -> Tuple[str, List[SectionType]]:
+    return os.path.basename(filepath), list(stream_page_sections(filepath, use_cache))
+
+
+def extract_pages_in_parallel(filepaths: List[str], jobs: int,
+                              use_cache: bool = False) -> Iterator[Tuple[str, List[SectionType]]]:
+    '''
+    Extract each page in a separate worker process. Pages are yielded in the
+    order given, regardless of which worker finishes first.
+    '''
+    with Pool(jobs) as pool:
+        yield from pool.imap(partial(extract_page_sections, use_cache=use_cache), filepaths)
+
+
+def extract_pages(filepaths: List[str], jobs: int = 1,
+                  use_cache: bool = False) -> Iterator[Tuple[str, Iterator[SectionType]]]:
+    if jobs > 1 and len(filepaths) > 1:
+        return extract_pages_in_parallel(filepaths, min(jobs, len(filepaths)), use_cache)
+    return ((os.path.basename(f), stream_page_sections(f, use_cache)) for f in filepaths)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Extract referenced sections from DICOM Standard pages.')
+    parser.add_argument('pages', nargs='+', help='HTML pages of the DICOM Standard')
+    parser.add_argument('--jobs', type=int, default=1, help='number of pages to process in parallel')
+    cache.add_cache_argument(parser)
+    json_io.add_format_argument(parser)
+    profiling.add_profile_argument(parser)
+    return profiling.parse_arguments(parser)
 
 
 if __name__ == '__main__':
-    # TODO: figure out a way to speed up the parsing; since we only need a
-    # small portion of the parse tree, we may be able to use:
-    # https://docs.python.org/3/library/html.parser.html to avoid building the
-    # full parse tree.
-    standard = {os.path.basename(f): parse_html_file(f) for f in sys.argv[1:]}
-    section_ids = extract_section_ids(standard)
-    sections = {page: normalize_sections(html) for page, html in section_ids.items()}
-    write_pretty_json(sections)
+    args = parse_arguments()
+    # Sections are written as they are extracted, so serialization is part
+    # of this step. Pages extracted by worker processes (--jobs) are not
+    # profiled.
+    with profiling.step('section extraction'):
+        write_sections_json(extract_pages(args.pages, args.jobs, args.use_cache), sys.stdout, args.format)
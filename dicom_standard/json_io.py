@@ -0,0 +1,187 @@
+'''
+Reading and writing the JSON files passed between the stages, in each of
+the formats they can be written in.
+'''
+from typing import Any, Dict, Iterable, Iterator, List, TextIO
+from contextlib import contextmanager
+import argparse
+import gzip
+import io
+import itertools
+import json
+import re
+import sys
+
+from dicom_standard import profiling
+
+# Pretty-printed JSON is kept for the files people read; intermediates
+# that are only read by the next stage can be written compactly.
+JSON_FORMAT_OPTIONS = {
+    'pretty': {'indent': 4, 'separators': (',', ':')},
+    'compact': {'separators': (',', ':')},
+    'gzip': {'separators': (',', ':')},
+}  # type: Dict[str, Dict[str, Any]]
+JSON_FORMATS = ['pretty', 'compact', 'gzip']
+# Lists of records, such as the module-attribute pairs, can also be written
+# as JSON Lines, with one compact record per line.
+RECORD_FORMATS = JSON_FORMATS + ['jsonl']
+GZIP_MAGIC_NUMBER = b'\x1f\x8b'
+JSON_READ_SIZE = 1 << 16
+JSON_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+JSON_ITEM_FOLLOWERS = set(' \t\n\r,]')
+
+
+def write_pretty_json(data: Any, output: TextIO = None) -> None:
+    write_json(data, 'pretty', output)
+
+
+def write_json(data: Any, output_format: str = 'pretty', output: TextIO = None) -> None:
+    output = sys.stdout if output is None else output
+    with profiling.step('serialization'), json_output_stream(output, output_format) as json_output:
+        json.dump(data, json_output, sort_keys=False, **JSON_FORMAT_OPTIONS[output_format])
+
+
+def write_json_records(records: Iterable[Any], output_format: str = 'pretty', output: TextIO = None) -> None:
+    '''
+    Write `records` as `write_json` writes a list, or as JSON Lines, one
+    record at a time, so that the records never all need to be in memory.
+    '''
+    output = sys.stdout if output is None else output
+    if output_format == 'jsonl':
+        for record in records:
+            output.write(json_line(record))
+        return
+    format_options = JSON_FORMAT_OPTIONS[output_format]
+    # Each record is indented one level deeper than by `json.dumps` alone.
+    record_indent = '\n' + ' ' * format_options['indent'] if 'indent' in format_options else ''
+    with json_output_stream(output, output_format) as json_output:
+        json_output.write('[')
+        record_count = 0
+        for record in records:
+            json_output.write(',' if record_count > 0 else '')
+            json_output.write(record_indent + json.dumps(record, **format_options).replace('\n', record_indent))
+            record_count += 1
+        json_output.write(record_indent[:1] + ']' if record_count > 0 else ']')
+
+
+def json_line(record: Any) -> str:
+    # Non-ASCII characters are escaped, so a line never holds a line break
+    # and its length in characters is its length in bytes.
+    return json.dumps(record, separators=(',', ':')) + '\n'
+
+
+@contextmanager
+def json_output_stream(output: TextIO, output_format: str) -> Iterator[TextIO]:
+    '''
+    Text stream for writing JSON in `output_format` to `output`. For `gzip`,
+    the compressed bytes are written to the binary buffer underlying `output`.
+    '''
+    if output_format != 'gzip':
+        yield output
+        return
+    output.flush()
+    # A fixed timestamp keeps the compressed output reproducible.
+    gzip_file = gzip.GzipFile(fileobj=output.buffer, mode='wb', mtime=0)
+    with io.TextIOWrapper(gzip_file, encoding='utf-8') as json_output:
+        yield json_output
+
+
+def add_format_argument(parser: argparse.ArgumentParser, default: str = 'pretty',
+                        formats: List[str] = JSON_FORMATS) -> None:
+    format_help = 'pretty-printed, compact or gzip-compressed compact JSON output'
+    if 'jsonl' in formats:
+        format_help += ', or JSON Lines'
+    parser.add_argument('--format', choices=formats, default=default, help=format_help)
+
+
+def stage_argument_parser(description: str, input_names: List[str],
+                          formats: List[str] = JSON_FORMATS) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    for input_name in input_names:
+        parser.add_argument(input_name, help='JSON output of an earlier stage')
+    add_format_argument(parser, formats=formats)
+    profiling.add_profile_argument(parser)
+    return parser
+
+
+def parse_stage_arguments(description: str, input_names: List[str],
+                          formats: List[str] = JSON_FORMATS) -> argparse.Namespace:
+    return profiling.parse_arguments(stage_argument_parser(description, input_names, formats))
+
+
+def read_json_to_dict(filepath: str) -> Dict[Any, Any]:
+    with profiling.step('read json'), open_json_file(filepath) as json_file:
+        json_string = json_file.read()
+        json_dict = json.loads(json_string)
+        return json_dict
+
+
+def open_json_file(filepath: str) -> TextIO:
+    with open(filepath, 'rb') as json_file:
+        is_compressed = json_file.read(len(GZIP_MAGIC_NUMBER)) == GZIP_MAGIC_NUMBER
+    open_json = gzip.open if is_compressed else open
+    return open_json(filepath, 'rt')
+
+
+def read_json_records(filepath: str) -> Iterator[Any]:
+    '''
+    Yield the records of a JSON array or JSON Lines file, as written by
+    `write_json_records`, decoding one record at a time.
+    '''
+    with open_json_file(filepath) as json_file:
+        first_char = json_file.read(1)
+        while first_char.isspace():
+            first_char = json_file.read(1)
+        if first_char == '[':
+            yield from decode_json_array(json_file)
+        else:
+            for line in itertools.chain([first_char + json_file.readline()], json_file):
+                if line.strip():
+                    yield json.loads(line)
+
+
+def decode_json_array(json_file: TextIO) -> Iterator[Any]:
+    '''
+    Yield the items of the JSON array read from `json_file`, after its
+    opening bracket, reading the file in blocks of `JSON_READ_SIZE`.
+    '''
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    at_end_of_file = False
+    expecting_item = True
+    item_count = 0
+    while True:
+        position = JSON_WHITESPACE_RE.match(buffer, position).end()
+        if position < len(buffer):
+            char = buffer[position]
+            # The array may end after its opening bracket or an item, but not after a comma.
+            if char == ']' and not (expecting_item and item_count > 0):
+                return
+            if not expecting_item:
+                if char != ',':
+                    raise ValueError('Expected "," or "]" in JSON array, found {!r}'.format(char))
+                position += 1
+                expecting_item = True
+                continue
+            try:
+                item, item_end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if at_end_of_file:
+                    raise
+                item_end = None
+            # A number cut by the end of the block decodes as its prefix (e.g.
+            # `12` of `12.5`), so an item is only complete once it is followed
+            # by what may follow an item in the array.
+            if item_end is not None and (at_end_of_file or buffer[item_end:item_end + 1] in JSON_ITEM_FOLLOWERS):
+                yield item
+                item_count += 1
+                position = item_end
+                expecting_item = False
+                continue
+        elif at_end_of_file:
+            raise ValueError('Unterminated JSON array')
+        block = json_file.read(JSON_READ_SIZE)
+        at_end_of_file = not block
+        buffer = buffer[position:] + block
+        position = 0
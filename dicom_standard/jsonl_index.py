@@ -0,0 +1,89 @@
+'''
+JSON Lines copies of the relationship tables (`ciod_to_modules.json` and
+`module_to_attributes.json`), with an index of the byte ranges holding the
+rows of each CIOD or module, so that the rows of a few of them are read
+without parsing the whole file:
+
+    >>> rows = read_rows('dicom_standard/dist/module_to_attributes.jsonl', 'module', 'patient')
+    >>> next(rows)['path']
+    'patient:00100010'
+
+The rows are in the order of the JSON file, one compact JSON record per
+line, so the file can also be streamed with `json_io.read_json_records`.
+
+The index is written next to the file, as `<file>.index.json`:
+
+    {"version": 1, "size": <size of the file>,
+     "fields": {"module": {"patient": [[start, end], ...], ...}}}
+
+Each range covers consecutive rows with the same value of the field, so the
+rows of a module in `module_to_attributes.jsonl` are a single range. An
+index not matching the size of its file is rejected as out of date.
+'''
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List
+import json
+import os
+
+from dicom_standard import json_io
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.index.json'
+
+RecordType = Dict[str, Any]
+IndexType = Dict[str, Any]
+
+
+def index_path(jsonl_path: str) -> str:
+    return jsonl_path + INDEX_SUFFIX
+
+
+def write_indexed_jsonl(records: Iterable[RecordType], jsonl_path: str, index_fields: List[str]) -> IndexType:
+    '''
+    Write `records` as JSON Lines to `jsonl_path`, one at a time, and their
+    index by each of `index_fields` next to it.
+    '''
+    field_ranges = OrderedDict((field, OrderedDict()) for field in index_fields)  # type: Dict[str, Dict[str, List[List[int]]]]
+    offset = 0
+    # Line endings are not translated, so that offsets are byte offsets.
+    with open(jsonl_path, 'w', newline='') as jsonl_file:
+        for record in records:
+            line = json_io.json_line(record)
+            jsonl_file.write(line)
+            for field, ranges in field_ranges.items():
+                add_row_range(ranges.setdefault(str(record[field]), []), offset, offset + len(line))
+            offset += len(line)
+    index = OrderedDict([('version', INDEX_VERSION), ('size', offset), ('fields', field_ranges)])
+    with open(index_path(jsonl_path), 'w') as index_file:
+        json.dump(index, index_file, separators=(',', ':'))
+    return index
+
+
+def add_row_range(ranges: List[List[int]], start: int, end: int) -> None:
+    if ranges and ranges[-1][1] == start:
+        ranges[-1][1] = end
+    else:
+        ranges.append([start, end])
+
+
+def read_index(jsonl_path: str) -> IndexType:
+    with open(index_path(jsonl_path), 'r') as index_file:
+        index = json.load(index_file)
+    if index.get('version') != INDEX_VERSION or index.get('size') != os.path.getsize(jsonl_path):
+        raise ValueError('The index of {} is out of date'.format(jsonl_path))
+    return index
+
+
+def read_rows(jsonl_path: str, field: str, value: str, index: IndexType = None) -> Iterator[RecordType]:
+    '''
+    Yield the rows of `jsonl_path` whose `field` is `value`, in file order.
+    Pass the `index` read by `read_index` when looking up many values.
+    Fields without an index raise a KeyError.
+    '''
+    index = read_index(jsonl_path) if index is None else index
+    ranges = index['fields'][field].get(value, [])
+    with open(jsonl_path, 'rb') as jsonl_file:
+        for start, end in ranges:
+            jsonl_file.seek(start)
+            for line in jsonl_file.read(end - start).splitlines():
+                yield json.loads(line.decode('utf-8'))
@@ -2,56 +2,126 @@
 Utility functions for expanding macros in the module-attribute
 relationship tables.
 '''
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from copy import copy
+import html
 import re
-from copy import deepcopy
 
-from bs4 import BeautifulSoup, Tag
+from bs4 import Tag
 
+from dicom_standard import parse_lib as pl
 from dicom_standard.hierarchy_utils import get_hierarchy_markers
 
 MetadataTableType = Dict[str, Any]
 MacrosType = Dict[str, MetadataTableType]
+ResolvedMacrosType = Dict[str, List[Dict[str, str]]]
 
-
-def expand_macro_rows(table: Tag, macros: MacrosType) -> List[Dict[str, str]]:
-    # This variable is used to stop an infinite macro reference
-    # loop in the standard at the SR Document Content module.
-    table_id = get_id_from_link(table['linkToStandard'])
-    attribute_insertion_lists = [get_attributes_to_insert(attr, macros, table_id)
-                                 for attr in table['attributes']]
-    new_table = flatten_one_layer(attribute_insertion_lists)
-    # Removes divider or stylistic rows
-    return [attribute for attribute in new_table if attribute['tag'] != 'None']
+OPENING_TD_TAG_RE = re.compile(r'<td(\s[^<>]*)?>')
 
 
-def get_attributes_to_insert(attribute: Dict[str, str], macros: MacrosType, table_id: str) -> List[Dict[str, str]]:
-    if is_macro_row(attribute):
-        new_attributes = get_macro_attributes(attribute, macros, table_id)
-        return new_attributes if new_attributes is not None else []
-    else:
-        return [attribute]
+def expand_macro_rows(table: Tag, macros: MacrosType,
+                      resolved_macros: ResolvedMacrosType = None) -> List[Dict[str, str]]:
+    '''
+    Replace each macro include row of the table with the macro's attributes.
+    Pass the same `resolved_macros` dictionary when expanding several tables
+    so that each macro is only expanded once.
+    '''
+    resolved_macros = {} if resolved_macros is None else resolved_macros
+    table_id = get_id_from_link(table['linkToStandard'])
+    new_table, _ = expand_attributes(table['attributes'], macros, resolved_macros, [table_id])
+    return remove_divider_rows(new_table)
+
+
+def macro_dependencies(table: MetadataTableType, macros: MacrosType) -> List[str]:
+    '''
+    Return the IDs of the macros included by the table, directly or
+    through other macros, i.e. the macros its expansion depends on.
+    '''
+    dependencies = set()
+    pending_attribute_lists = [table['attributes']]
+    while pending_attribute_lists:
+        for attribute in pending_attribute_lists.pop():
+            if not is_macro_row(attribute):
+                continue
+            macro_id = included_macro_id(attribute)
+            if macro_id not in dependencies:
+                dependencies.add(macro_id)
+                if macro_id in macros:
+                    pending_attribute_lists.append(macros[macro_id]['attributes'])
+    return sorted(dependencies)
+
+
+def remove_divider_rows(attributes: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    return [attribute for attribute in attributes if attribute['tag'] != 'None']
+
+
+def expand_attributes(attributes: List[Dict[str, str]], macros: MacrosType, resolved_macros: ResolvedMacrosType,
+                      expansion_stack: List[str]) -> Tuple[List[Dict[str, str]], int]:
+    '''
+    Returns the expanded attributes, and the position in `expansion_stack` of
+    the outermost table whose include was skipped to break a reference loop
+    (or the stack's length if no include was skipped).
+    '''
+    expanded_attributes = []
+    loop_start = len(expansion_stack)
+    for attribute in attributes:
+        if not is_macro_row(attribute):
+            expanded_attributes.append(attribute)
+            continue
+        macro_id = included_macro_id(attribute)
+        if macro_id in expansion_stack:
+            # Stops infinite macro reference loops, such as the one in
+            # the standard at the SR Document Content module.
+            loop_start = min(loop_start, expansion_stack.index(macro_id))
+            continue
+        macro_attributes, macro_loop_start = resolve_macro(macro_id, macros, resolved_macros, expansion_stack)
+        loop_start = min(loop_start, macro_loop_start)
+        hierarchy_marker = get_hierarchy_markers(pl.text_from_attribute_field(attribute, 'name'))
+        expanded_attributes.extend(update_attribute_hierarchy_markers(macro_attributes, hierarchy_marker))
+    return expanded_attributes, loop_start
+
+
+def resolve_macro(macro_id: str, macros: MacrosType, resolved_macros: ResolvedMacrosType,
+                  expansion_stack: List[str]) -> Tuple[List[Dict[str, str]], int]:
+    if macro_id in resolved_macros:
+        return resolved_macros[macro_id], len(expansion_stack)
+    depth = len(expansion_stack)
+    expansion_stack.append(macro_id)
+    attributes, loop_start = expand_attributes(macros[macro_id]['attributes'], macros,
+                                               resolved_macros, expansion_stack)
+    expansion_stack.pop()
+    attributes = remove_divider_rows(attributes)
+    # An expansion cut short by a loop back to an enclosing table only
+    # holds when the macro is included through that same table.
+    if loop_start >= depth:
+        resolved_macros[macro_id] = attributes
+    return attributes, loop_start
 
 
 def is_macro_row(attribute: Dict[str, str]) -> bool:
     is_abnormal_row = attribute['tag'] == 'None'
-    reference_anchor_tag = BeautifulSoup(attribute['name'], 'html.parser').find('a', class_='xref')
-    contains_link = reference_anchor_tag is not None
-    # This line guards against a one-off reference in the standard
-    # where a link actually points to prose instead of a table.
-    is_table = re.match("Table.*", reference_anchor_tag.get_text()) if contains_link else False
-    return bool(is_abnormal_row and contains_link and is_table)
+    return is_abnormal_row and included_macro_id(attribute) is not None
 
 
-# Note that this function *recursively expands* macro references using
-# the `expand_macro_rows` function.
-def get_macro_attributes(attribute: Dict[str, str], macros: MacrosType, table_id: str) -> List[Dict[str, str]]:
-    macro_id = referenced_macro_id_from_include_statement(attribute['name'])
-    parsed_name = BeautifulSoup(attribute['name'], 'html.parser').get_text()
-    hierarchy_marker = get_hierarchy_markers(parsed_name)
-    if table_id != macro_id:
-        return expand_macro_rows(get_macros_by_id(macro_id, macros, hierarchy_marker), macros)
-    return []
+def included_macro_id(attribute: Dict[str, str]) -> Optional[str]:
+    if 'macroId' in attribute:
+        return attribute['macroId']
+    # Macros are included through a cross-reference anchor, so cells without
+    # one are not parsed.
+    if 'xref' not in attribute['name']:
+        return None
+    return macro_id_from_name_cell(pl.parse_html(attribute['name']))
+
+
+def macro_id_from_name_cell(name_cell: Tag) -> Optional[str]:
+    reference_anchor_tag = name_cell.find('a', class_='xref')
+    if reference_anchor_tag is None:
+        return None
+    # This line guards against a one-off reference in the standard
+    # where a link actually points to prose instead of a table.
+    if not re.match("Table.*", reference_anchor_tag.get_text()):
+        return None
+    return reference_anchor_tag.get('href')[1:]  # Remove the first '#' character
 
 
 def flatten_one_layer(nested_element_list: List[List[Any]]) -> List[Any]:
@@ -60,32 +130,34 @@ def flatten_one_layer(nested_element_list: List[List[Any]]) -> List[Any]:
 
 
 def referenced_macro_id_from_include_statement(macro_reference_html: str) -> str:
-    parsed_reference = BeautifulSoup(macro_reference_html, 'html.parser')
+    parsed_reference = pl.parse_html(macro_reference_html)
     id_anchor = parsed_reference.find('a', class_='xref')
     return id_anchor.get('href')[1:]  # Remove the first '#' character
 
 
-def get_macros_by_id(macro_id: str, macros: MacrosType, hierarchy_marker: str) -> MetadataTableType:
-    # A copy is required so that local modifications to attributes
-    # (i.e. hierarchy marker modifications) don't persist.
-    macro = deepcopy(macros[macro_id])
-    macro['attributes'] = update_attribute_hierarchy_markers(macro['attributes'], hierarchy_marker)
-    return macro
-
-
 def update_attribute_hierarchy_markers(attributes: List[Dict[str, str]], marker: str) -> List[Dict[str, str]]:
     return [add_marker_to_attr(attribute, marker) for attribute in attributes]
 
 
 def add_marker_to_attr(attribute: Dict[str, str], marker: str) -> Dict[str, str]:
-    parsed_attribute_name = BeautifulSoup(attribute['name'], 'html.parser').find('td')
-    attribute['name'] = prepend_marker_to_attribute_name(parsed_attribute_name, marker)
-    return attribute
-
-
-def prepend_marker_to_attribute_name(new_attr_to_insert: Tag, marker: str) -> str:
-    new_attr_to_insert.insert(0, marker)
-    return str(new_attr_to_insert)
+    # Expanded macro attributes are shared between every table including
+    # the macro, so the attribute is copied rather than modified.
+    marked_attribute = copy(attribute)
+    marked_attribute['name'] = prepend_marker_to_attribute_name(attribute['name'], marker)
+    if 'nameText' in attribute:
+        marked_attribute['nameText'] = marker + attribute['nameText']
+    return marked_attribute
+
+
+def prepend_marker_to_attribute_name(attribute_name: str, marker: str) -> str:
+    if marker == '':
+        return attribute_name
+    opening_tag = OPENING_TD_TAG_RE.match(attribute_name)
+    if opening_tag is not None:
+        return opening_tag.group() + html.escape(marker, quote=False) + attribute_name[opening_tag.end():]
+    parsed_attribute_name = pl.parse_html(attribute_name).find('td')
+    parsed_attribute_name.insert(0, marker)
+    return str(parsed_attribute_name)
 
 
 def get_id_from_link(link: str) -> str:
@@ -3,14 +3,17 @@ Common functions for extracting information from the
 DICOM standard HTML file.
 '''
 
-from typing import Dict, List, Any
-import json
+from typing import Dict, List, Optional, Tuple
+import html.entities
+import itertools
+import os
 import re
-import sys
+import warnings
 
 from bs4 import BeautifulSoup, NavigableString, Tag
 
-from dicom_standard import parse_relations as pr
+from dicom_standard import profiling
+from dicom_standard.document_index import chapter_index
 
 BASE_DICOM_URL = "http://dicom.nema.org/medical/dicom/current/output/html/"
 BASE_SHORT_DICOM_SECTION_URL = "http://dicom.nema.org/medical/dicom/current/output/chtml/"
@@ -18,33 +21,94 @@ SHORT_DICOM_URL_PREFIX = "http://dicom.nema.org/medical/dicom/current/output/cht
 
 allowed_attributes = ["href", "src", "type", "data", "colspan", "rowspan"]
 
+# Whitespace handling of BeautifulSoup's tree builders.
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+PRESERVE_WHITESPACE_TAGS = ['pre', 'textarea']
+
+# Fragments made only of text and of these well-nested tags read the same
+# with every parser, so their text is extracted without a parse tree.
+SIMPLE_TAG_RE = re.compile(r'<(/?)([a-z][a-z0-9]*)(\s[^<>]*|/)?>')
+SIMPLE_CONTAINER_TAGS = {'a', 'b', 'code', 'dd', 'div', 'dl', 'dt', 'em', 'i', 'li', 'ol',
+                         'p', 'span', 'strong', 'sub', 'sup', 'td', 'th', 'u', 'ul', 'var'}
+SIMPLE_VOID_TAGS = {'br', 'img'}
+CHARACTER_REFERENCE_RE = re.compile(r'&(?:([a-zA-Z][a-zA-Z0-9]*)|#([0-9]{1,7})|#[xX]([0-9a-fA-F]{1,6}));')
+# Control characters and carriage returns are normalised differently by
+# each parser.
+UNSAFE_TEXT_CHARACTERS_RE = re.compile('[\x00-\x08\x0b-\x1f\x7f-\x9f]')
+
+# html5lib is not offered: its HTML5 tree construction drops table cells
+# parsed outside of a table and keeps whitespace-only strings verbatim, so
+# it cannot reproduce the JSON output of the other two parsers.
+HTML_PARSERS = ['lxml', 'html.parser']
+
+
+def default_html_parser() -> str:
+    try:
+        import lxml  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
+
+
+def set_html_parser(parser_name: str) -> None:
+    '''
+    Select the BeautifulSoup tree builder used for every HTML parse.
+    '''
+    global HTML_PARSER
+    if parser_name not in HTML_PARSERS:
+        raise ValueError('Unsupported HTML parser "{}", expected one of {}'.format(parser_name, HTML_PARSERS))
+    HTML_PARSER = parser_name
+
+
+HTML_PARSER = default_html_parser()
+set_html_parser(os.environ.get('DICOM_STANDARD_HTML_PARSER', HTML_PARSER))
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 
 def parse_html_file(filepath: str) -> BeautifulSoup:
     with open(filepath, 'r') as html_file:
-        return BeautifulSoup(html_file, 'html.parser')
+        return parse_html_page(html_file.read())
 
 
-def write_pretty_json(data: Any) -> None:
-    json.dump(data, sys.stdout, sort_keys=False, indent=4, separators=(',', ':'))
+def parse_html_page(page_html: str) -> BeautifulSoup:
+    '''
+    Parse a whole page of the standard, unlike `parse_html`.
+    '''
+    with warnings.catch_warnings():
+        # The standard is XHTML, which lxml warns about but parses correctly.
+        warnings.filterwarnings('ignore', message='.*XML document')
+        with profiling.step('parse'):
+            return BeautifulSoup(page_html, HTML_PARSER)
+
+
+def parse_html(html: str) -> BeautifulSoup:
+    '''
+    Parse an HTML fragment (e.g. a single table cell) with the configured
+    parser. Use `fragment_root` to reach the fragment's top-level nodes.
+    '''
+    return BeautifulSoup(html, HTML_PARSER)
 
 
-def read_json_to_dict(filepath: str) -> Dict[Any, Any]:
-    with open(filepath, 'r') as json_file:
-        json_string = json_file.read()
-        json_dict = json.loads(json_string)
-        return json_dict
+def fragment_root(parsed_html: BeautifulSoup) -> Tag:
+    '''
+    Return the element containing the top-level nodes of a parsed fragment,
+    since lxml wraps fragments in `<html><body>` elements.
+    '''
+    if HTML_PARSER == 'html.parser' or parsed_html.body is None:
+        return parsed_html
+    return parsed_html.body
+
+
+def fragment_to_html(parsed_html: BeautifulSoup) -> str:
+    return fragment_root(parsed_html).decode_contents()
 
 
 def all_tdivs_in_chapter(standard: BeautifulSoup, chapter_name: str) -> List[Tag]:
     '''
     Find all HTML tables in a given chapter of the DICOM Standard.
     '''
-    chapter_divs = standard.find_all('div', class_='chapter')
-    for chapter in chapter_divs:
-        if chapter.div.div.div.h1.a.get('id') == chapter_name:
-            table_divs = chapter.find_all('div', class_='table')
-            return table_divs
-    return None
+    return chapter_index(standard).tables_in_chapter(chapter_name)
 
 
 def create_slug(title: str) -> str:
@@ -52,15 +116,6 @@ def create_slug(title: str) -> str:
     return re.sub(r'[\(\),\']+', '', first_pass)
 
 
-def find_tdiv_by_id(all_tables: List[Tag], table_id: str) -> Tag:
-    '''
-    Find a given table tag by its HTML ID
-    '''
-    matching_table = (lambda table: pr.table_id(table) == table_id)
-    table_with_id = list(filter(matching_table, all_tables))
-    return None if table_with_id == [] else table_with_id[0]
-
-
 def clean_table_name(name: str) -> str:
     '''
     Remove table name prefixes and suffixes.
@@ -74,24 +129,46 @@ def clean_table_name(name: str) -> str:
     return clean_title.strip()
 
 
-def clean_html(html: str) -> str:
+def clean_html(html: str, new_tab_links: bool = True) -> str:
     '''
     Removes unused attributes and empty tags from
     the HTML. Also updates relative resource URLs
     to absolute URLs.
     '''
-    parsed_html = BeautifulSoup(html, 'html.parser')
+    if '<' not in html:
+        # Plain text is returned unescaped, as the parsed string would be.
+        # Leading whitespace is left to the parser, since lxml drops it.
+        text = simple_html_text(html)
+        if text is not None and text[:1].strip(ASCII_SPACES) != '':
+            return text
+    parsed_html = parse_html(html)
+    if not fragment_root(parsed_html).contents:
+        # lxml keeps no node of a whitespace-only fragment, while html.parser
+        # keeps its whitespace collapsed to a space or a newline.
+        return simple_html_text(html) or ''
+    return clean_parsed_html(parsed_html, new_tab_links)
+
+
+def clean_parsed_html(parsed_html: BeautifulSoup, new_tab_links: bool = True) -> str:
     top_level_tag = get_top_level_tag(parsed_html)
     if isinstance(top_level_tag, NavigableString):
         return str(top_level_tag)
-    else:
-        remove_attributes_from_html_tags(top_level_tag)
-        remove_empty_children(top_level_tag)
-        return resolve_relative_resource_urls(str(top_level_tag))
+    return clean_tag(top_level_tag, new_tab_links)
+
+
+def clean_tag(top_level_tag: Tag, new_tab_links: bool = True) -> str:
+    '''
+    Clean an element already in a parse tree, in place. This gives the same
+    result as `clean_html(str(top_level_tag))` without parsing it again.
+    With `new_tab_links=False`, links are not set to open in a new tab.
+    '''
+    remove_attributes_from_html_tags(top_level_tag)
+    remove_empty_children(top_level_tag)
+    return str(resolve_resource_urls(top_level_tag, new_tab_links))
 
 
 def get_top_level_tag(parsed_html: BeautifulSoup) -> Tag:
-    return next(parsed_html.descendants)
+    return next(fragment_root(parsed_html).descendants)
 
 
 def remove_attributes_from_html_tags(top_level_tag: Tag) -> None:
@@ -108,29 +185,82 @@ def clean_tag_attributes(tag: Tag) -> None:
 def remove_empty_children(top_level_tag: Tag) -> None:
     empty_anchor_tags = filter((lambda a: a.text == ''), top_level_tag.find_all('a'))
     for anchor in empty_anchor_tags:
+        parent = anchor.parent
         anchor.decompose()
+        if parent is not None:
+            join_adjacent_strings(parent)
+
+
+def join_adjacent_strings(tag: Tag) -> None:
+    '''
+    Removing an element can leave two strings next to each other. Parsing
+    the HTML again would join them, and collapse the result to a single
+    newline or space if it is all whitespace; do the same here, so that a
+    cleaned tree matches the one a re-parse of its HTML would produce.
+    '''
+    if any(t.name in PRESERVE_WHITESPACE_TAGS for t in itertools.chain([tag], tag.parents)):
+        return
+    adjacent_strings = []  # type: List[NavigableString]
+    for child in tag.contents + [None]:
+        if type(child) is NavigableString:
+            adjacent_strings.append(child)
+            continue
+        if len(adjacent_strings) > 1:
+            collapse_whitespace_strings(adjacent_strings)
+        adjacent_strings = []
+
+
+def collapse_whitespace_strings(adjacent_strings: List[NavigableString]) -> None:
+    joined_string = ''.join(adjacent_strings)
+    if joined_string.strip(ASCII_SPACES) != '':
+        return
+    adjacent_strings[0].replace_with('\n' if '\n' in joined_string else ' ')
+    for string in adjacent_strings[1:]:
+        string.extract()
 
 
 def resolve_relative_resource_urls(html_string: str) -> str:
-    html = BeautifulSoup(html_string, 'html.parser')
-    anchors = html.find_all('a', href=True)
+    html = parse_html(html_string)
+    return resolve_resource_urls(fragment_root(html)).decode_contents()
+
+
+def resolve_resource_urls(root: Tag, new_tab_links: bool = True) -> Tag:
+    '''
+    Make the links and image sources inside `root` (including `root` itself)
+    absolute, and replace SVG objects with images. Returns `root`, or the
+    image replacing it if `root` is itself an SVG object.
+    '''
+    resources = root.find_all(['a', 'img', 'object'])
+    if root.name in ['a', 'img', 'object']:
+        resources.insert(0, root)
+    anchors = [r for r in resources if r.name == 'a' and r.has_attr('href')]
     for a in anchors:
-        update_anchor_href(a)
-    imgs = html.find_all("img", src=True)
-    svg_objects = html.find_all("object", data=True, type="image/svg+xml")
-    svgs_as_imgs = [convert_svg_obj_to_img(html, s) for s in svg_objects]
+        update_anchor_href(a, new_tab_links)
+    imgs = [r for r in resources if r.name == 'img' and r.has_attr('src')]
+    svg_objects = [r for r in resources if r.name == 'object' and r.has_attr('data') and r.get('type') == 'image/svg+xml']
+    document = root_document(root)
+    svgs_as_imgs = [convert_svg_obj_to_img(document, s) for s in svg_objects]
     for obj, img in zip(svg_objects, svgs_as_imgs):
         obj.replaceWith(img)
+        if obj is root:
+            root = img
     imgs.extend(svgs_as_imgs)
     for img in imgs:
         resolve_img_src(img)
-    return str(html)
+    return root
+
 
+def root_document(tag: Tag) -> BeautifulSoup:
+    for parent in tag.parents:
+        tag = parent
+    return tag
 
-def update_anchor_href(anchor: Tag) -> None:
+
+def update_anchor_href(anchor: Tag, new_tab_links: bool = True) -> None:
     if not has_protocol_prefix(anchor, 'href'):
         anchor['href'] = resolve_href_url(anchor['href'])
-        anchor['target'] = '_blank'
+        if new_tab_links:
+            anchor['target'] = '_blank'
 
 
 def convert_svg_obj_to_img(html: BeautifulSoup, svg: Tag):
@@ -194,8 +324,76 @@ def resolve_img_src(resource: Tag) -> None:
 
 
 def text_from_html_string(html_string: str) -> str:
-    parsed_html = BeautifulSoup(html_string, 'html.parser')
-    return parsed_html.text.strip()
+    text = text_from_simple_html(html_string)
+    if text is None:
+        text = fragment_root(parse_html(html_string)).text
+    return text.strip()
+
+
+def text_from_simple_html(html_string: str) -> Optional[str]:
+    '''
+    Return the text BeautifulSoup would read from a fragment made only of
+    text and well-nested simple tags, such as most table cells, without
+    parsing it. Returns None if the fragment needs a parser.
+    '''
+    strings = []
+    open_tags = []  # type: List[str]
+    position = 0
+    for tag in SIMPLE_TAG_RE.finditer(html_string):
+        strings.append(html_string[position:tag.start()])
+        position = tag.end()
+        is_end_tag, name, attributes = tag.group(1) == '/', tag.group(2), tag.group(3)
+        if name in SIMPLE_VOID_TAGS and not is_end_tag:
+            continue
+        if name not in SIMPLE_CONTAINER_TAGS or attributes == '/':
+            return None
+        if not is_end_tag:
+            open_tags.append(name)
+        elif not open_tags or open_tags.pop() != name:
+            return None
+    strings.append(html_string[position:])
+    if open_tags:
+        return None
+    texts = [simple_html_text(string) for string in strings]
+    return None if None in texts else ''.join(texts)
+
+
+def simple_html_text(string: str) -> Optional[str]:
+    '''
+    Return the text of a string of HTML without tags, collapsing it to a
+    single newline or space if it is all whitespace like BeautifulSoup does.
+    Returns None if any parser could read it differently.
+    '''
+    if '<' in string or '>' in string or UNSAFE_TEXT_CHARACTERS_RE.search(string):
+        return None
+    if '&' in string:
+        references = CHARACTER_REFERENCE_RE.findall(string)
+        if len(references) != string.count('&') or not all(map(is_simple_reference, references)):
+            return None
+        string = html.unescape(string)
+    if string != '' and string.strip(ASCII_SPACES) == '':
+        return '\n' if '\n' in string else ' '
+    return string
+
+
+def is_simple_reference(reference: Tuple[str, str, str]) -> bool:
+    name, decimal, hexadecimal = reference
+    if name:
+        return name in html.entities.name2codepoint
+    codepoint = int(decimal) if decimal else int(hexadecimal, 16)
+    return codepoint in (0x09, 0x0a) or 0x20 <= codepoint < 0x7f or 0xa0 <= codepoint < 0xd800 \
+        or 0xe000 <= codepoint <= 0xfffd
+
+
+def text_from_attribute_field(attribute: Dict[str, str], field: str) -> str:
+    '''
+    Return the text of an HTML field of an attribute row, using the text
+    recorded at extraction time (as `<field>Text`) when it is available.
+    '''
+    text_field = field + 'Text'
+    if text_field in attribute:
+        return attribute[text_field].strip()
+    return text_from_html_string(attribute[field])
 
 
 def table_parent_page(table_div: Tag) -> str:
@@ -0,0 +1,451 @@
+'''
+Build the files of `dist` from the pages of the standard in a single
+process, instead of through `make`:
+
+    $ PYTHONPATH=. python3 -m dicom_standard.pipeline
+
+The stages are the same as in the Makefile, but their results are handed
+to the next stages in memory rather than through the JSON files of `tmp`,
+and stages on independent branches (the CIODs, modules, attributes and
+sections) run concurrently in worker processes (`--jobs`).
+
+The result of each stage is cached, keyed by a digest of its inputs, the
+parser version and the source of the package, rather than by timestamps.
+Touching a page, or rebuilding after a change that does not affect a
+stage's inputs, therefore runs nothing again. A file of `dist` is only
+rewritten if the result it holds changed, or if the file itself did.
+'''
+from collections import OrderedDict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import glob
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+
+from dicom_standard import cache
+from dicom_standard import json_io
+from dicom_standard import parse_lib as pl
+from dicom_standard import profiling
+from dicom_standard import build
+from dicom_standard.data_dictionary import data_dictionary_bytes
+from dicom_standard.description_utils import DESCRIPTION_MODES, description_table, reference_descriptions
+from dicom_standard.extract_attributes import extract_attributes
+from dicom_standard.extract_sections import unique_sections
+from dicom_standard.postprocess_mark_references import record_references_inside_pairs
+from dicom_standard.postprocess_save_references import find_reference_html_in_sections
+from dicom_standard.postprocess_update_reference_links import update_sourceurls
+from dicom_standard.preprocess_modules_with_attributes import preprocess_tables
+from dicom_standard.process_ciod_module_relationship import define_all_relationships
+from dicom_standard.process_ciods import ciods_from_extracted_list
+from dicom_standard.process_module_attribute_relationship import module_attr_relationship_table
+from dicom_standard.process_modules import modules_from_tables
+
+DEFAULT_STANDARD_DIR = os.path.join(pl.PACKAGE_DIR, 'standard')
+DEFAULT_OUTPUT_DIR = os.path.join(pl.PACKAGE_DIR, 'dist')
+MANIFEST_FILENAME = '.pipeline_manifest.json'
+REQUIRED_PAGES = ['part03.html', 'part06.html']
+PAGE_PREFIX = 'page:'
+SECTIONS_PREFIX = 'sections:'
+
+# `run(options, *inputs)` computes the result of a stage from the results
+# of the stages named in `inputs`, and from the `options` named in
+# `key_options`. Stages that modify their inputs are given their own copy.
+# The result is written to `output_file` in `dist`, if any.
+Stage = namedtuple('Stage', ['name', 'inputs', 'run', 'modifies_inputs', 'output_file', 'key_options'])
+Stage.__new__.__defaults__ = ((),)
+
+
+def clean_page(page_html: str) -> str:
+    # The same clean-up as the `tmp/%.html` rule of the Makefile.
+    return page_html.replace('&nbps;', ' ').replace('\u200b', '')
+
+
+def page_stage_name(page: str) -> str:
+    return PAGE_PREFIX + page
+
+
+def section_stage_name(page: str) -> str:
+    return SECTIONS_PREFIX + page
+
+
+def run_part03_tables(options, part03_html):
+    return build.extract_part03_tables(pl.parse_html_page(part03_html), options['use_cache'])
+
+
+def run_attributes(options, part06_html):
+    return extract_attributes(pl.parse_html_page(part06_html))
+
+
+def run_sections(options, page_html):
+    return dict(unique_sections(page_html))
+
+
+def run_ciods(options, part03_tables):
+    return ciods_from_extracted_list(part03_tables['raw_ciod_module_tables.json'])
+
+
+def run_ciod_to_modules(options, part03_tables):
+    return define_all_relationships(part03_tables['raw_ciod_module_tables.json'])
+
+
+def run_preprocessing(options, part03_tables):
+    return preprocess_tables(part03_tables['raw_module_attribute_tables.json'],
+                             part03_tables['raw_macro_tables.json'], options['use_cache'])
+
+
+def run_modules(options, module_attr_tables):
+    return modules_from_tables(module_attr_tables)
+
+
+def run_module_attribute_pairs(options, module_attr_tables):
+    return module_attr_relationship_table(module_attr_tables)
+
+
+def run_reference_marking(options, module_attr_pairs):
+    return record_references_inside_pairs(module_attr_pairs, options['use_cache'])
+
+
+def run_references(options, module_attr_pairs, *page_sections):
+    return find_reference_html_in_sections(module_attr_pairs, dict(zip(options['pages'], page_sections)))
+
+
+def run_reference_links(options, module_attr_pairs, references):
+    updated_pairs = update_sourceurls(module_attr_pairs, references)
+    if options['descriptions'] == 'reference':
+        updated_pairs = reference_descriptions(updated_pairs)
+    return updated_pairs
+
+
+def run_descriptions(options, module_attr_pairs):
+    return description_table(module_attr_pairs)
+
+
+def run_data_dictionary(options, attributes):
+    return data_dictionary_bytes(attributes)
+
+
+def pipeline_stages(pages: List[str]) -> List[Stage]:
+    '''
+    The stages building `dist` from `pages`, the filenames of the pages of
+    the standard, in an order where every stage follows its inputs.
+    '''
+    page_stages = [Stage(page_stage_name(page), [], None, False, None) for page in pages]
+    # The sections of each page are extracted separately, so that pages are
+    # extracted concurrently, and only the pages that changed again.
+    section_stages = [Stage(section_stage_name(page), [page_stage_name(page)], run_sections, False, None)
+                      for page in pages]
+    partial_references = 'modules_attributes_partial_references'
+    return page_stages + [
+        Stage('part03_tables', [page_stage_name('part03.html')], run_part03_tables, False, None),
+        Stage('attributes', [page_stage_name('part06.html')], run_attributes, False, 'attributes.json'),
+    ] + section_stages + [
+        Stage('ciods', ['part03_tables'], run_ciods, False, 'ciods.json'),
+        Stage('ciod_to_modules', ['part03_tables'], run_ciod_to_modules, False, 'ciod_to_modules.json'),
+        Stage('preprocessed_modules_attributes', ['part03_tables'], run_preprocessing, True, None),
+        Stage('modules', ['preprocessed_modules_attributes'], run_modules, False, 'modules.json'),
+        Stage('modules_attributes_no_references', ['preprocessed_modules_attributes'],
+              run_module_attribute_pairs, False, None),
+        Stage(partial_references, ['modules_attributes_no_references'], run_reference_marking, True, None),
+        Stage('references', [partial_references] + list(map(section_stage_name, pages)), run_references, False,
+              'references.json', ['pages']),
+        Stage('module_to_attributes', [partial_references, 'references'], run_reference_links, True,
+              'module_to_attributes.json', ['descriptions']),
+        Stage('descriptions', [partial_references], run_descriptions, False, 'descriptions.json'),
+        Stage('data_dictionary', ['attributes'], run_data_dictionary, False, 'data_dictionary.bin'),
+    ]
+
+
+def result_digest(value: Any) -> str:
+    '''
+    Digest of the content of a stage result. Pickles of equal results may
+    differ, e.g. in which objects they share, so the result is digested as
+    JSON, keeping the order of its keys, which the files of `dist` keep.
+    '''
+    if isinstance(value, bytes):
+        return hashlib.sha256(value).hexdigest()
+    return cache.content_digest(json.dumps(value, separators=(',', ':')))
+
+
+class StageResult:
+    '''
+    The result of a stage, kept as pickled bytes, from which the stages
+    modifying it get their own copy. Results read from the cache are only
+    loaded if a stage needs them.
+    '''
+    def __init__(self, digest: str, data: Optional[bytes] = None, cache_path: Optional[str] = None) -> None:
+        self.digest = digest
+        self.data = data
+        self.cache_path = cache_path
+        self.value_loaded = False
+        self.loaded_value = None  # type: Any
+
+    @classmethod
+    def from_value(cls, value: Any) -> 'StageResult':
+        result = cls(result_digest(value), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        result.value_loaded = True
+        result.loaded_value = value
+        return result
+
+    def pickled(self) -> bytes:
+        if self.data is None:
+            self.data = read_cache_data(self.cache_path)
+        return self.data
+
+    def value(self) -> Any:
+        if not self.value_loaded:
+            self.loaded_value = pickle.loads(self.pickled())
+            self.value_loaded = True
+        return self.loaded_value
+
+    def copy(self) -> Any:
+        return pickle.loads(self.pickled())
+
+
+class PageResult(StageResult):
+    '''
+    A page of the standard, read from `page_path` only if a stage needs it.
+    Its digest is that of the file, which is cheaper than reading the page.
+    '''
+    def __init__(self, page_path: str) -> None:
+        super().__init__(cache.file_digest(page_path))
+        self.page_path = page_path
+
+    def value(self) -> str:
+        if not self.value_loaded:
+            with open(self.page_path, 'r') as page_file:
+                self.loaded_value = clean_page(page_file.read())
+            self.value_loaded = True
+        return self.loaded_value
+
+    def pickled(self) -> bytes:
+        if self.data is None:
+            self.data = pickle.dumps(self.value(), protocol=pickle.HIGHEST_PROTOCOL)
+        return self.data
+
+    def copy(self) -> str:
+        # Strings are immutable.
+        return self.value()
+
+
+def stage_cache_path(key: str) -> str:
+    return os.path.join(cache.CACHE_DIR, 'stage-' + key + '.pickle')
+
+
+def read_cache_data(cache_path: str) -> bytes:
+    # An entry holds the header written by `store_stage_result`, followed
+    # by the pickled result.
+    with open(cache_path, 'rb') as cache_file:
+        pickle.load(cache_file)
+        return cache_file.read()
+
+
+def load_stage_result(key: str) -> Optional[StageResult]:
+    cache_path = stage_cache_path(key)
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            header = pickle.load(cache_file)
+        # The modification time records when an entry was last used.
+        os.utime(cache_path)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+    return StageResult(header['digest'], cache_path=cache_path)
+
+
+def store_stage_result(key: str, result: StageResult) -> None:
+    cache_path = stage_cache_path(key)
+    temporary_path = cache.temporary_cache_path(cache_path)
+    with open(temporary_path, 'wb') as cache_file:
+        pickle.dump({'digest': result.digest}, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        cache_file.write(result.pickled())
+    cache.commit_cache_entry(temporary_path, cache_path)
+
+
+def stage_key(stage: Stage, results: Dict[str, StageResult], code_version: str, options: Dict[str, Any]) -> str:
+    input_digests = [results[input_name].digest for input_name in stage.inputs]
+    stage_options = {name: options[name] for name in stage.key_options}
+    return cache.content_digest(stage.name, code_version, cache.parser_version(), cache.json_digest(stage_options),
+                                *input_digests)
+
+
+def stage_inputs(stage: Stage, results: Dict[str, StageResult]) -> List[Any]:
+    if stage.modifies_inputs:
+        return [results[input_name].copy() for input_name in stage.inputs]
+    return [results[input_name].value() for input_name in stage.inputs]
+
+
+def run_pickled_stage(run: Callable[..., Any], options: Dict[str, Any], inputs_data: List[bytes]) -> Tuple[str, bytes]:
+    '''
+    Run a stage in a worker process, which is given its inputs pickled, as
+    they are kept by `StageResult`, and returns the digest of its result and
+    the pickled result.
+    '''
+    result = run(options, *(pickle.loads(data) for data in inputs_data))
+    return result_digest(result), pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def run_stages(stages: List[Stage], results: Dict[str, StageResult], options: Dict[str, Any], jobs: int = 1,
+               use_cache: bool = True) -> Dict[str, Optional[str]]:
+    '''
+    Run the stages whose results are not in the cache, adding every result
+    to `results`. Stages run as soon as all of their inputs are available,
+    up to `jobs` at a time. Returns the cache key of each stage (None
+    without `use_cache`).
+    '''
+    code_version = cache.package_code_digest()
+    keys = OrderedDict()  # type: Dict[str, Optional[str]]
+    pending = [stage for stage in stages if stage.name not in results]
+    running = {}  # type: Dict[Any, Stage]
+    executor = ProcessPoolExecutor(jobs) if jobs > 1 else None
+    try:
+        while pending or running:
+            ready = [stage for stage in pending if is_ready(stage, results)]
+            if not ready and not running:
+                raise ValueError('Stages with missing inputs: {}'.format(', '.join(s.name for s in pending)))
+            for stage in ready:
+                pending.remove(stage)
+                keys[stage.name] = stage_key(stage, results, code_version, options) if use_cache else None
+                cached_result = load_stage_result(keys[stage.name]) if use_cache else None
+                if cached_result is not None:
+                    results[stage.name] = cached_result
+                    report_stage(stage, 'cached')
+                elif executor is None:
+                    start = time.perf_counter()
+                    with profiling.step(stage.name):
+                        results[stage.name] = StageResult.from_value(stage.run(options, *stage_inputs(stage, results)))
+                    complete_stage(stage, results[stage.name], keys[stage.name], start)
+                else:
+                    inputs_data = [results[input_name].pickled() for input_name in stage.inputs]
+                    future = executor.submit(run_pickled_stage, stage.run, options, inputs_data)
+                    future.start_time = time.perf_counter()
+                    running[future] = stage
+            # Cached results may have made more stages ready without waiting.
+            if running and not any(is_ready(stage, results) for stage in pending):
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    results[stage.name] = StageResult(*future.result())
+                    complete_stage(stage, results[stage.name], keys[stage.name], future.start_time)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return keys
+
+
+def is_ready(stage: Stage, results: Dict[str, StageResult]) -> bool:
+    return all(input_name in results for input_name in stage.inputs)
+
+
+def complete_stage(stage: Stage, result: StageResult, key: Optional[str], start_time: float) -> None:
+    if key is not None:
+        store_stage_result(key, result)
+    report_stage(stage, '{:.1f}s'.format(time.perf_counter() - start_time))
+
+
+def report_stage(stage: Stage, status: str) -> None:
+    print('{:<40}{:>10}'.format(stage.name, status), file=sys.stderr)
+
+
+def write_output_file(output_path: str, data: Any, output_format: str) -> None:
+    # Written to a temporary file first, so that an interrupted build
+    # never leaves a partial file in `dist`.
+    temporary_path = output_path + '.tmp'
+    if isinstance(data, bytes):
+        with open(temporary_path, 'wb') as output_file:
+            output_file.write(data)
+    else:
+        with open(temporary_path, 'w') as output_file:
+            json_io.write_json(data, output_format, output_file)
+    os.replace(temporary_path, output_path)
+
+
+def read_manifest(output_dir: str) -> Dict[str, Dict[str, str]]:
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILENAME), 'r') as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def is_up_to_date(output_path: str, manifest_entry: Dict[str, str], result_digest: str, output_format: str) -> bool:
+    if manifest_entry.get('resultDigest') != result_digest or manifest_entry.get('format') != output_format:
+        return False
+    return os.path.exists(output_path) and cache.file_digest(output_path) == manifest_entry.get('fileDigest')
+
+
+def write_outputs(stages: List[Stage], results: Dict[str, StageResult], output_dir: str,
+                  output_format: str = 'pretty') -> List[str]:
+    '''
+    Write the results of the stages with an output file, skipping the files
+    holding the same result, in the same format, as when they were last
+    written. The digests of the result and of the file are recorded in the
+    manifest of `output_dir`. Returns the filenames written.
+    '''
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = read_manifest(output_dir)
+    written_files = []
+    for stage in stages:
+        if stage.output_file is None:
+            continue
+        output_path = os.path.join(output_dir, stage.output_file)
+        result = results[stage.name]
+        if is_up_to_date(output_path, manifest.get(stage.output_file, {}), result.digest, output_format):
+            continue
+        write_output_file(output_path, result.value(), output_format)
+        written_files.append(stage.output_file)
+        manifest[stage.output_file] = {'resultDigest': result.digest, 'format': output_format,
+                                       'fileDigest': cache.file_digest(output_path)}
+    with open(os.path.join(output_dir, MANIFEST_FILENAME), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=4, sort_keys=True)
+    return written_files
+
+
+def standard_pages(standard_dir: str) -> List[str]:
+    pages = sorted(os.path.basename(page_path) for page_path in glob.glob(os.path.join(standard_dir, '*.html')))
+    missing_pages = [page for page in REQUIRED_PAGES if page not in pages]
+    if missing_pages:
+        raise FileNotFoundError('Missing from {}: {}'.format(standard_dir, ', '.join(missing_pages)))
+    return pages
+
+
+def build_standard(standard_dir: str = DEFAULT_STANDARD_DIR, output_dir: str = DEFAULT_OUTPUT_DIR,
+                   jobs: int = 1, use_cache: bool = True, output_format: str = 'pretty',
+                   descriptions: str = 'inline') -> Dict[str, Any]:
+    '''
+    Build the files of `output_dir` from the pages in `standard_dir`.
+    Returns the cache keys of the stages, and the files written.
+    '''
+    pages = standard_pages(standard_dir)
+    stages = pipeline_stages(pages)
+    results = OrderedDict((page_stage_name(page), PageResult(os.path.join(standard_dir, page)))
+                          for page in pages)  # type: Dict[str, StageResult]
+    options = {'pages': pages, 'use_cache': use_cache, 'descriptions': descriptions}
+    keys = run_stages(stages, results, options, jobs, use_cache)
+    written_files = write_outputs(stages, results, output_dir, output_format)
+    return {'keys': keys, 'writtenFiles': written_files}
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Build the JSON files of the standard in a single process.')
+    parser.add_argument('--standard-dir', default=DEFAULT_STANDARD_DIR,
+                        help='directory holding the HTML pages of the standard')
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR, help='directory the files are written to')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='stages run concurrently (default: the number of CPUs)')
+    parser.add_argument('--descriptions', choices=DESCRIPTION_MODES, default='inline',
+                        help='write each description in full, or as the ID of its entry in descriptions.json')
+    cache.add_cache_argument(parser, help='run every stage instead of using the cached results')
+    json_io.add_format_argument(parser)
+    profiling.add_profile_argument(parser)
+    return profiling.parse_arguments(parser)
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    if args.profile and profiling.PROFILER.report_path is None:
+        profiling.PROFILER.report_path = os.path.join(args.output_dir, 'pipeline' + profiling.REPORT_SUFFIX)
+    build_standard(args.standard_dir, args.output_dir, args.jobs, args.use_cache, args.format, args.descriptions)
@@ -2,12 +2,13 @@
 Find and mark references to external sections in attribute descriptions.
 Each reference is keyed by its source URL.
 '''
-import sys
+from functools import partial
 import re
 
-from bs4 import BeautifulSoup
-
+from dicom_standard import cache
+from dicom_standard import json_io
 from dicom_standard import parse_lib as pl
+from dicom_standard import profiling
 
 IGNORED_REFS_RE = re.compile(r'(.*ftp.*)|(.*http.*)|(.*part05.*)|(.*chapter.*)|(.*PS3.*)|(.*DCM.*)|(.*glossentry.*)')
 
@@ -17,25 +18,43 @@ def get_valid_reference_anchors(parsed_html):
     return [a for a in anchor_tags if not re.match(IGNORED_REFS_RE, a['href'])]
 
 
-def record_references_inside_pairs(module_attr_pairs):
-    updated_pairs = [record_reference_in_pair(pair) for pair in module_attr_pairs]
-    return updated_pairs
+def record_references_inside_pairs(module_attr_pairs, use_cache=False):
+    with profiling.step('reference marking'):
+        return list(stream_references_inside_pairs(module_attr_pairs, use_cache))
+
+
+def stream_references_inside_pairs(module_attr_pairs, use_cache=False):
+    # Attributes expanded from a macro share its descriptions, so each
+    # distinct description is only parsed and cleaned once, and with
+    # `use_cache` only the descriptions new since the last run are.
+    # Only the distinct descriptions are kept, not the pairs.
+    marked_descriptions = cache.ResultCache('marked_descriptions', cache.processing_version(), use_cache)
+    for pair in module_attr_pairs:
+        yield record_reference_in_pair(pair, marked_descriptions)
+    marked_descriptions.save()
+
+
+def record_reference_in_pair(pair, marked_descriptions=None):
+    if marked_descriptions is None:
+        description, external_references = mark_references_in_description(pair['description'])
+    else:
+        description, external_references = marked_descriptions.result(
+            cache.content_digest(pair['description']), partial(mark_references_in_description, pair['description']))
+    # Reference links are updated in place by a later stage, so every pair
+    # gets its own copies.
+    pair['externalReferences'] = [dict(ref) for ref in external_references]
+    pair['description'] = description
+    return pair
 
 
-def record_reference_in_pair(pair):
-    parsed_description = BeautifulSoup(pair['description'], 'html.parser')
+def mark_references_in_description(description):
+    parsed_description = pl.parse_html(description)
     references = get_valid_reference_anchors(parsed_description)
     external_references = list(map(reference_structure_from_anchor, references))
     for ref in references:
         mark_as_recorded(ref)
-    pair['externalReferences'] = [] if len(external_references) < 1 else external_references
-    pair['description'] = str(parsed_description)
-    finalize_descriptions(pair)
-    return pair
-
-
-def finalize_descriptions(pair):
-    pair['description'] = pl.clean_html(pair['description'])
+    with profiling.step('cleaning'):
+        return pl.clean_parsed_html(parsed_description), external_references
 
 
 def reference_structure_from_anchor(reference):
@@ -50,7 +69,15 @@ def mark_as_recorded(anchor):
     anchor.name = 'span'
 
 
+def parse_arguments():
+    parser = json_io.stage_argument_parser(__doc__, ['module_attribute_pairs'], json_io.RECORD_FORMATS)
+    cache.add_cache_argument(parser, help='always clean every description instead of reusing cached results')
+    return profiling.parse_arguments(parser)
+
+
 if __name__ == '__main__':
-    module_attr_pairs = pl.read_json_to_dict(sys.argv[1])
-    updated_pairs = record_references_inside_pairs(module_attr_pairs)
-    pl.write_pretty_json(updated_pairs)
+    args = parse_arguments()
+    # The pairs are read and written one at a time.
+    module_attr_pairs = json_io.read_json_records(args.module_attribute_pairs)
+    with profiling.step('reference marking'):
+        json_io.write_json_records(stream_references_inside_pairs(module_attr_pairs, args.use_cache), args.format)
@@ -0,0 +1,15 @@
+'''
+Save each distinct description of the module-attribute pairs into a
+separate JSON file, keyed by a hash of its HTML.
+'''
+from dicom_standard import json_io
+from dicom_standard import profiling
+from dicom_standard.description_utils import description_table
+
+
+if __name__ == '__main__':
+    args = json_io.parse_stage_arguments(__doc__, ['module_attribute_pairs'])
+    module_attr_pairs = json_io.read_json_records(args.module_attribute_pairs)
+    with profiling.step('description table'):
+        descriptions = description_table(module_attr_pairs)
+    json_io.write_json(descriptions, args.format)
@@ -1,12 +1,11 @@
 '''
 Save reference HTML into a separate JSON file.
 '''
-import sys
 import re
 
-from bs4 import BeautifulSoup
-
+from dicom_standard import json_io
 from dicom_standard import parse_lib as pl
+from dicom_standard import profiling
 
 
 def find_reference_html_in_sections(pairs, section_listing):
@@ -14,16 +13,14 @@ def find_reference_html_in_sections(pairs, section_listing):
     references = {}
     for chapter, page_and_fragment in refs_to_record:
         reference_id = page_and_fragment.split('#')[-1]
-        section_with_context = BeautifulSoup(section_listing[chapter + '.html'][reference_id], 'html.parser')
+        section_with_context = pl.parse_html(section_listing[chapter + '.html'][reference_id])
         enclosing_section = section_with_context.find('div').find('a', id=True)['id']
         short_dicom_url = (pl.BASE_SHORT_DICOM_SECTION_URL + chapter + '/' +
                            pl.get_standard_page(enclosing_section) + '.html#' + reference_id)
         reference_html = section_with_context.find('a', id=reference_id)
-        references[short_dicom_url] = str(reference_content_from_id(reference_html))
-    refs_with_resolved_resource_urls = {k: pl.resolve_relative_resource_urls(v)
-                                        for k, v in references.items()}
-    cleaned_references = {k: pl.clean_html(v) for k, v in refs_with_resolved_resource_urls.items()}
-    return cleaned_references
+        # Links in references were never set to open in a new tab.
+        references[short_dicom_url] = pl.clean_tag(reference_content_from_id(reference_html), new_tab_links=False)
+    return references
 
 
 def reference_content_from_id(ref_id):
@@ -57,7 +54,9 @@ def get_location_from_ref(ref):
 
 
 if __name__ == '__main__':
-    module_attr_pairs = pl.read_json_to_dict(sys.argv[1])
-    section_listing = pl.read_json_to_dict(sys.argv[2])
-    references = find_reference_html_in_sections(module_attr_pairs, section_listing)
-    pl.write_pretty_json(references)
+    args = json_io.parse_stage_arguments(__doc__, ['module_attribute_pairs', 'sections'])
+    module_attr_pairs = json_io.read_json_records(args.module_attribute_pairs)
+    section_listing = json_io.read_json_to_dict(args.sections)
+    with profiling.step('reference extraction'):
+        references = find_reference_html_in_sections(module_attr_pairs, section_listing)
+    json_io.write_json(references, args.format)
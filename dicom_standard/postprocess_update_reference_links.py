@@ -1,22 +1,68 @@
-import sys
+'''
+Point the source URL of each external reference of the module-attribute
+pairs at the matching entry of the saved references.
 
-from dicom_standard import parse_lib as pl
+With `--descriptions reference`, each description is replaced by the ID of
+its entry in `descriptions.json`.
+'''
+from typing import Dict
+
+from dicom_standard import json_io
+from dicom_standard import profiling
+from dicom_standard.description_utils import DESCRIPTION_MODES, reference_description
 
 
 def update_sourceurls(module_attr_pairs, references):
+    source_urls = source_urls_by_fragment(references)
     for pair in module_attr_pairs:
-        for ref in pair['externalReferences']:
-            for source_url in references.keys():
-                reference_fragment = source_url.split('#')[-1]
-                pair_fragment = ref['sourceUrl'].split('#')[-1]
-                if pair_fragment == reference_fragment:
-                    ref['sourceUrl'] = source_url
-                    break
+        update_pair_sourceurls(pair, source_urls)
     return module_attr_pairs
 
 
+def stream_updated_pairs(module_attr_pairs, references, descriptions='inline'):
+    '''
+    Update each of `module_attr_pairs` as `update_sourceurls` does, and with
+    `descriptions='reference'`, replace its description by its ID, one pair
+    at a time.
+    '''
+    source_urls = source_urls_by_fragment(references)
+    for pair in module_attr_pairs:
+        update_pair_sourceurls(pair, source_urls)
+        yield reference_description(pair) if descriptions == 'reference' else pair
+
+
+def update_pair_sourceurls(pair, source_urls):
+    for ref in pair['externalReferences']:
+        pair_fragment = url_fragment(ref['sourceUrl'])
+        ref['sourceUrl'] = source_urls.get(pair_fragment, ref['sourceUrl'])
+
+
+def source_urls_by_fragment(references: Dict[str, str]) -> Dict[str, str]:
+    '''
+    Map the fragment of each reference URL to the URL itself. If several
+    references share a fragment, the first one is used.
+    '''
+    source_urls = {}  # type: Dict[str, str]
+    for source_url in references.keys():
+        source_urls.setdefault(url_fragment(source_url), source_url)
+    return source_urls
+
+
+def url_fragment(url: str) -> str:
+    return url.split('#')[-1]
+
+
+def parse_arguments():
+    parser = json_io.stage_argument_parser(__doc__, ['module_attribute_pairs', 'references'], json_io.RECORD_FORMATS)
+    parser.add_argument('--descriptions', choices=DESCRIPTION_MODES, default='inline',
+                        help='write each description in full, or as the ID of its entry in descriptions.json')
+    return profiling.parse_arguments(parser)
+
+
 if __name__ == '__main__':
-    module_attr_pairs = pl.read_json_to_dict(sys.argv[1])
-    references = pl.read_json_to_dict(sys.argv[2])
-    updated_pairs = update_sourceurls(module_attr_pairs, references)
-    pl.write_pretty_json(updated_pairs)
+    args = parse_arguments()
+    # The pairs are read and written one at a time.
+    module_attr_pairs = json_io.read_json_records(args.module_attribute_pairs)
+    references = json_io.read_json_to_dict(args.references)
+    with profiling.step('reference links'):
+        json_io.write_json_records(stream_updated_pairs(module_attr_pairs, references, args.descriptions), args.format)
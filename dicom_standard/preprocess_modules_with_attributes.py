@@ -5,16 +5,55 @@ Specific processing steps are:
     1. Inline expansion of macros (preserving hierarchy markers)
     2. Expand out hierarchy markers and embed order in the attribute ID
     3. Clean up and format data fields
+
+The result for each module table is cached, keyed by the table and the
+macros it includes, so that a rebuild only processes the modules that
+changed or include a macro that changed.
 '''
-import sys
+from functools import partial
 
+from dicom_standard import cache
+from dicom_standard import json_io
 from dicom_standard import parse_lib as pl
-from dicom_standard.macro_utils import expand_macro_rows
+from dicom_standard import profiling
+from dicom_standard.macro_utils import expand_macro_rows, macro_dependencies
 from dicom_standard.hierarchy_utils import record_hierarchy_for_module
 
 
+def preprocess_tables(module_attr_tables, macros, use_cache=False):
+    with profiling.step('preprocessing'):
+        table_cache = cache.ResultCache('preprocessed_module_tables', cache.processing_version(), use_cache)
+        macro_digests = {}
+        resolved_macros = {}
+        tables = [table_cache.result(module_table_fingerprint(table, macros, macro_digests),
+                                     partial(preprocess_table, table, macros, resolved_macros))
+                  for table in module_attr_tables]
+        table_cache.save()
+        return tables
+
+
+def module_table_fingerprint(table, macros, macro_digests):
+    dependency_digests = []
+    for macro_id in macro_dependencies(table, macros):
+        if macro_id not in macro_digests:
+            macro_digests[macro_id] = cache.json_digest(macros.get(macro_id))
+        dependency_digests.append(macro_digests[macro_id])
+    return cache.content_digest(cache.json_digest(table), *dependency_digests)
+
+
+def preprocess_table(table, macros, resolved_macros):
+    with profiling.step('macro expansion'):
+        table['attributes'] = expand_macro_rows(table, macros, resolved_macros)
+    with profiling.step('cleaning'):
+        table = preprocess_single_table(table)
+    with profiling.step('hierarchy'):
+        return record_hierarchy_for_module(table)
+
+
 def expand_all_macros(module_attr_tables, macros):
-    expanded_attribute_lists = [expand_macro_rows(table, macros)
+    # Each macro is expanded once and shared by all of the modules including it.
+    resolved_macros = {}
+    expanded_attribute_lists = [expand_macro_rows(table, macros, resolved_macros)
                                 for table in module_attr_tables]
     return map(add_expanded_attributes_to_tables, zip(module_attr_tables, expanded_attribute_lists))
 
@@ -36,10 +75,10 @@ def preprocess_single_table(table):
 
 def preprocess_attribute(attr):
     cleaned_attribute = {
-        'name': pl.text_from_html_string(attr['name']),
-        'tag': pl.text_from_html_string(attr['tag']),
+        'name': pl.text_from_attribute_field(attr, 'name'),
+        'tag': pl.text_from_attribute_field(attr, 'tag'),
         'type': 'None' if 'type' not in attr.keys()
-                else pl.text_from_html_string(attr['type']),
+                else pl.text_from_attribute_field(attr, 'type'),
         'description': attr['description']
     }
     return cleaned_attribute
@@ -49,10 +88,15 @@ def expand_hierarchy(tables):
     return [record_hierarchy_for_module(table) for table in tables]
 
 
+def parse_arguments():
+    parser = json_io.stage_argument_parser(__doc__, ['module_attribute_tables', 'macro_tables'])
+    cache.add_cache_argument(parser, help='always process every table instead of reusing cached results')
+    return profiling.parse_arguments(parser)
+
+
 if __name__ == '__main__':
-    module_attr_tables = pl.read_json_to_dict(sys.argv[1])
-    macro_tables = pl.read_json_to_dict(sys.argv[2])
-    tables_with_macros = expand_all_macros(module_attr_tables, macro_tables)
-    preprocessed_tables = preprocess_attribute_fields(tables_with_macros)
-    tables_with_hierarchy = expand_hierarchy(preprocessed_tables)
-    pl.write_pretty_json(tables_with_hierarchy)
+    args = parse_arguments()
+    module_attr_tables = json_io.read_json_to_dict(args.module_attribute_tables)
+    macro_tables = json_io.read_json_to_dict(args.macro_tables)
+    tables_with_hierarchy = preprocess_tables(module_attr_tables, macro_tables, args.use_cache)
+    json_io.write_json(tables_with_hierarchy, args.format)
@@ -2,9 +2,10 @@
 Takes the extracted CIOD-Module table information to build a list of all
 CIOD-Module relationships defined in the DICOM Standard.
 '''
-import sys
 
+from dicom_standard import json_io
 from dicom_standard import parse_lib as pl
+from dicom_standard import profiling
 
 
 def define_all_relationships(ciod_module_list):
@@ -54,6 +55,8 @@ def extract_conditional_statement(usage_field):
 
 
 if __name__ == '__main__':
-    ciod_module_list = pl.read_json_to_dict(sys.argv[1])
-    ciod_module_relationships = define_all_relationships(ciod_module_list)
-    pl.write_pretty_json(ciod_module_relationships)
+    args = json_io.parse_stage_arguments(__doc__, ['ciod_module_tables'])
+    ciod_module_list = json_io.read_json_to_dict(args.ciod_module_tables)
+    with profiling.step('relationships'):
+        ciod_module_relationships = define_all_relationships(ciod_module_list)
+    json_io.write_json(ciod_module_relationships, args.format)
@@ -2,9 +2,10 @@
 Takes the extracted CIOD information and processes it to produce a
 dictionary of all CIODs in the DICOM Standard.
 '''
-import sys
 
+from dicom_standard import json_io
 from dicom_standard import parse_lib as pl
+from dicom_standard import profiling
 
 
 def ciods_from_extracted_list(ciod_module_list):
@@ -20,6 +21,8 @@ def ciods_from_extracted_list(ciod_module_list):
 
 
 if __name__ == '__main__':
-    ciod_module_list = pl.read_json_to_dict(sys.argv[1])
-    ciods = ciods_from_extracted_list(ciod_module_list)
-    pl.write_pretty_json(ciods)
+    args = json_io.parse_stage_arguments(__doc__, ['ciod_module_tables'])
+    ciod_module_list = json_io.read_json_to_dict(args.ciod_module_tables)
+    with profiling.step('cleaning'):
+        ciods = ciods_from_extracted_list(ciod_module_list)
+    json_io.write_json(ciods, args.format)
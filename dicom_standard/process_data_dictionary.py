@@ -0,0 +1,25 @@
+'''
+Write the attributes of PS3.6 as a binary data dictionary, which can be
+read through `mmap` with `data_dictionary.DataDictionary`.
+'''
+import argparse
+import sys
+
+from dicom_standard import json_io
+from dicom_standard import profiling
+from dicom_standard.data_dictionary import data_dictionary_bytes
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('attributes', help='attributes.json file, optionally gzip-compressed')
+    profiling.add_profile_argument(parser)
+    return profiling.parse_arguments(parser)
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    attributes = json_io.read_json_to_dict(args.attributes)
+    with profiling.step('encoding'):
+        data_dictionary = data_dictionary_bytes(attributes)
+    sys.stdout.buffer.write(data_dictionary)
@@ -0,0 +1,29 @@
+'''
+Write a relationship table of `dist` as JSON Lines, along with an index of
+the byte ranges holding the rows of each value of the given fields (see
+`jsonl_index.py`).
+'''
+import argparse
+
+from dicom_standard import json_io
+from dicom_standard import profiling
+from dicom_standard.jsonl_index import write_indexed_jsonl
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('table', help='JSON file of a relationship table, optionally gzip-compressed')
+    parser.add_argument('output', help='JSON Lines file to write; the index is written next to it')
+    parser.add_argument('--index-by', nargs='+', required=True, metavar='FIELD',
+                        help='fields to index the rows by, e.g. module')
+    profiling.add_profile_argument(parser)
+    return profiling.parse_arguments(parser)
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    if args.profile and profiling.PROFILER.report_path is None:
+        profiling.PROFILER.report_path = args.output + profiling.REPORT_SUFFIX
+    # The rows are read and written one at a time.
+    with profiling.step('indexing'):
+        write_indexed_jsonl(json_io.read_json_records(args.table), args.output, args.index_by)
@@ -1,21 +1,26 @@
-import sys
-
-from dicom_standard import parse_lib as pl
+'''
+Flatten the preprocessed module-attribute tables into a list of
+all module-attribute relationships in the DICOM Standard.
+'''
+from dicom_standard import json_io
+from dicom_standard import profiling
 
 
 def module_attr_relationship_table(module_attr_relationship_list):
-    entries = []
-    for module in module_attr_relationship_list:
+    return list(module_attr_relationships(module_attr_relationship_list))
+
+
+def module_attr_relationships(modules):
+    for module in modules:
         for attribute in module['attributes']:
-            entries.append({
+            yield {
                 'module': module['id'],
                 'path': attribute['id'],
                 'tag': attribute['tag'],
                 'type': attribute['type'],
                 'linkToStandard': get_standard_link(module, attribute),
                 'description': attribute['description']
-            })
-    return entries
+            }
 
 
 def get_standard_link(module, attribute):
@@ -26,6 +31,8 @@ def get_standard_link(module, attribute):
 
 
 if __name__ == "__main__":
-    module_attr_list = pl.read_json_to_dict(sys.argv[1])
-    module_attr_relationship_list = module_attr_relationship_table(module_attr_list)
-    pl.write_pretty_json(module_attr_relationship_list)
+    args = json_io.parse_stage_arguments(__doc__, ['module_attribute_tables'], json_io.RECORD_FORMATS)
+    # The tables are read and the pairs written one at a time.
+    module_attr_list = json_io.read_json_records(args.module_attribute_tables)
+    with profiling.step('relationships'):
+        json_io.write_json_records(module_attr_relationships(module_attr_list), args.format)
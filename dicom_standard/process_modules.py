@@ -2,9 +2,10 @@
 Convert the processed module-attribute JSON data into a
 normalized listing of all modules in the DICOM Standard.
 '''
-import sys
 
+from dicom_standard import json_io
 from dicom_standard import parse_lib as pl
+from dicom_standard import profiling
 
 
 def modules_from_tables(tables):
@@ -20,6 +21,8 @@ def modules_from_tables(tables):
 
 
 if __name__ == '__main__':
-    module_attr_tables = pl.read_json_to_dict(sys.argv[1])
-    modules = modules_from_tables(module_attr_tables)
-    pl.write_pretty_json(modules)
+    args = json_io.parse_stage_arguments(__doc__, ['module_attribute_tables'])
+    module_attr_tables = json_io.read_json_to_dict(args.module_attribute_tables)
+    with profiling.step('cleaning'):
+        modules = modules_from_tables(module_attr_tables)
+    json_io.write_json(modules, args.format)
@@ -0,0 +1,188 @@
+'''
+Optional profiling of the pipeline stages. Stages mark their logical steps
+(parsing, span expansion, macro expansion, cleaning, serialization, ...)
+with `step`, which does nothing unless the stage was run with `--profile`.
+
+When profiling, each step records its wall time, CPU time, the peak
+resident set size of the process when it ended, and the memory it
+allocated, as traced by `tracemalloc`. Steps that are not nested in another
+one also record their top allocating source lines. Steps with the same name
+are added together, however many times they run.
+
+The report is written as JSON when the stage exits, next to the stage's
+output file (`<output>.profile.json`) unless a path is given with
+`--profile-report`.
+Tracing allocations slows the stage down, so compare the times of profiled
+runs with each other rather than with normal runs.
+'''
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+import argparse
+import atexit
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where the peak RSS is not recorded.
+    resource = None
+
+TOP_ALLOCATION_COUNT = 10
+REPORT_SUFFIX = '.profile.json'
+
+
+class Profiler:
+    def __init__(self, report_path: Optional[str] = None) -> None:
+        self.report_path = report_path
+        self.steps = OrderedDict()  # type: Dict[str, Dict[str, Any]]
+        self.depth = 0
+        self.start_wall_time = time.perf_counter()
+        self.start_cpu_time = time.process_time()
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        start_snapshot = take_snapshot() if self.depth == 0 else None
+        start_traced_memory = tracemalloc.get_traced_memory()[0]
+        start_wall_time = time.perf_counter()
+        start_cpu_time = time.process_time()
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            step = self.steps.setdefault(name, new_step(name))
+            step['calls'] += 1
+            step['wallTime'] += time.perf_counter() - start_wall_time
+            step['cpuTime'] += time.process_time() - start_cpu_time
+            step['peakRss'] = peak_rss()
+            step['allocatedBytes'] += tracemalloc.get_traced_memory()[0] - start_traced_memory
+            if start_snapshot is not None:
+                add_top_allocations(step, take_snapshot().compare_to(start_snapshot, 'lineno'))
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'script': os.path.basename(sys.argv[0]),
+            'arguments': sys.argv[1:],
+            'wallTime': time.perf_counter() - self.start_wall_time,
+            'cpuTime': time.process_time() - self.start_cpu_time,
+            'peakRss': peak_rss(),
+            'steps': list(self.steps.values()),
+        }
+
+    def write_report(self) -> None:
+        report_path = self.report_path or default_report_path()
+        with open(report_path, 'w') as report_file:
+            json.dump(self.report(), report_file, indent=4)
+
+
+def new_step(name: str) -> Dict[str, Any]:
+    return OrderedDict([('name', name), ('calls', 0), ('wallTime', 0.0), ('cpuTime', 0.0), ('peakRss', None),
+                        ('allocatedBytes', 0), ('topAllocations', [])])
+
+
+def take_snapshot() -> tracemalloc.Snapshot:
+    # Leave out the memory used by the profiler itself.
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                                      tracemalloc.Filter(False, __file__)])
+
+
+def add_top_allocations(step: Dict[str, Any], statistics: List[tracemalloc.StatisticDiff]) -> None:
+    allocations = OrderedDict((allocation['location'], allocation) for allocation in step['topAllocations'])
+    for statistic in statistics:
+        frame = statistic.traceback[0]
+        location = '{}:{}'.format(frame.filename, frame.lineno)
+        allocation = allocations.setdefault(location, {'location': location, 'sizeBytes': 0, 'count': 0})
+        allocation['sizeBytes'] += statistic.size_diff
+        allocation['count'] += statistic.count_diff
+    top_allocations = sorted(allocations.values(), key=lambda allocation: -allocation['sizeBytes'])
+    step['topAllocations'] = top_allocations[:TOP_ALLOCATION_COUNT]
+
+
+def peak_rss() -> Optional[int]:
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def default_report_path() -> str:
+    '''
+    Return the path next to the file standard output is redirected to, as
+    in `make`, or else a path in the current directory named after the
+    script.
+    '''
+    try:
+        output_path = os.readlink('/proc/self/fd/{}'.format(sys.stdout.fileno()))
+    except (OSError, ValueError, AttributeError):
+        output_path = None
+    if output_path is not None and os.path.isfile(output_path):
+        return output_path + REPORT_SUFFIX
+    return os.path.splitext(os.path.basename(sys.argv[0]))[0] + REPORT_SUFFIX
+
+
+def step(name: str):
+    '''
+    Context manager recording a step of the stage when profiling.
+    '''
+    if PROFILER is None:
+        return NO_STEP
+    return PROFILER.step(name)
+
+
+class NoStep:
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exception_info) -> None:
+        pass
+
+
+NO_STEP = NoStep()
+PROFILER = None  # type: Optional[Profiler]
+
+
+def start_profiling(report_path: Optional[str] = None) -> Profiler:
+    '''
+    Profile the steps run from now on, and write the report when the
+    process exits.
+    '''
+    global PROFILER
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    PROFILER = Profiler(report_path)
+    atexit.register(PROFILER.write_report)
+    return PROFILER
+
+
+def stop_profiling() -> None:
+    global PROFILER
+    if PROFILER is not None:
+        atexit.unregister(PROFILER.write_report)
+        PROFILER = None
+    tracemalloc.stop()
+
+
+def add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--profile', action='store_true',
+                        help='write the time and memory used by each step to a report (by default, next '
+                             'to the output file)')
+    parser.add_argument('--profile-report', metavar='REPORT', help='path of the --profile report')
+
+
+def parse_arguments(parser: argparse.ArgumentParser, arguments: Optional[List[str]] = None) -> argparse.Namespace:
+    '''
+    Parse the arguments of a stage having `add_profile_argument`, and start
+    profiling with `--profile`. Profiling only starts once all of the
+    arguments are parsed, so a stage exiting on invalid arguments never
+    writes a report.
+    '''
+    args = parser.parse_args(arguments)
+    if args.profile:
+        start_profiling(args.profile_report)
+    return args
@@ -0,0 +1,157 @@
+'''
+Query the JSON files built into `dist` without re-implementing the joins
+between them.
+
+The files are read once by `load_standard`, which indexes them so that
+every lookup is a dictionary lookup, plus the size of the list returned:
+
+    >>> standard = load_standard('dicom_standard/dist')
+    >>> standard.attribute('(0010,0010)')['keyword']
+    'PatientName'
+    >>> standard.attribute_with_keyword('PatientName')['tag']
+    '(0010,0010)'
+    >>> standard.ciods_with_attribute(0x00100010)[:2]
+    ['cr-image', 'ct-image']
+
+Attribute tags may be given in any form accepted by `tag_utils.tag_slug`.
+Tags in repeating groups, such as 0x60023000, find the attribute of the
+group, `(60xx,3000)`.
+
+Lookups of a single record return None for unknown IDs, and lookups of a
+list return an empty list.
+'''
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import os
+
+from dicom_standard import json_io
+from dicom_standard import parse_lib as pl
+from dicom_standard.description_utils import inline_descriptions
+from dicom_standard.tag_utils import TagType, slug_matcher, tag_slug
+
+DEFAULT_DIST_DIR = os.path.join(pl.PACKAGE_DIR, 'dist')
+
+RecordType = Dict[str, Any]
+
+
+class Standard:
+    '''
+    The CIODs, modules and attributes of the standard, and the
+    relationships between them, as written in the files of `dist`.
+    '''
+    def __init__(self, ciods: Dict[str, RecordType], modules: Dict[str, RecordType],
+                 attributes: Dict[str, RecordType], ciod_to_modules: List[RecordType],
+                 module_to_attributes: List[RecordType]) -> None:
+        self.ciods = ciods
+        self.modules = modules
+        self.attributes = attributes
+        self.masked_tags = slug_matcher(attributes.keys())
+        self.attributes_by_keyword = {}  # type: Dict[str, RecordType]
+        for attribute in attributes.values():
+            if attribute['keyword']:
+                self.attributes_by_keyword.setdefault(attribute['keyword'], attribute)
+        self.modules_by_ciod = group_by(ciod_to_modules, lambda relationship: relationship['ciod'])
+        self.ciods_by_module = group_by(ciod_to_modules, lambda relationship: relationship['module'])
+        self.attributes_by_module = group_by(module_to_attributes, lambda pair: pair['module'])
+        self.attributes_by_path = {pair['path']: pair for pair in module_to_attributes}
+        self.usages_by_attribute = group_by(module_to_attributes, path_attribute_slug)
+        self.module_ids_by_attribute = {slug: unique(pair['module'] for pair in pairs)
+                                        for slug, pairs in self.usages_by_attribute.items()}
+        self.ciod_ids_by_attribute = {slug: unique(relationship['ciod'] for module_id in module_ids
+                                                   for relationship in self.ciods_by_module.get(module_id, []))
+                                      for slug, module_ids in self.module_ids_by_attribute.items()}
+
+    def ciod(self, ciod_id: str) -> Optional[RecordType]:
+        return self.ciods.get(ciod_id)
+
+    def module(self, module_id: str) -> Optional[RecordType]:
+        return self.modules.get(module_id)
+
+    def attribute(self, tag: TagType) -> Optional[RecordType]:
+        return self.attributes.get(self.attribute_slug(tag))
+
+    def attribute_slug(self, tag: TagType) -> str:
+        '''
+        Return the key of the attribute in `attributes.json`. Tags in a
+        repeating group resolve to the group's entry, e.g. `60xx3000` for
+        0x60023000.
+        '''
+        slug = tag_slug(tag)
+        if slug in self.attributes or 'x' in slug:
+            return slug
+        return self.masked_tags.match(int(slug, 16)) or slug
+
+    def attribute_with_keyword(self, keyword: str) -> Optional[RecordType]:
+        return self.attributes_by_keyword.get(keyword)
+
+    def ciod_modules(self, ciod_id: str) -> List[RecordType]:
+        '''
+        The `ciod_to_modules.json` entries of the CIOD, with the usage of
+        each module.
+        '''
+        return self.modules_by_ciod.get(ciod_id, [])
+
+    def module_ciods(self, module_id: str) -> List[RecordType]:
+        return self.ciods_by_module.get(module_id, [])
+
+    def module_attributes(self, module_id: str) -> List[RecordType]:
+        '''
+        The `module_to_attributes.json` entries of the module, in table
+        order. Attributes nested in sequences have one entry per path.
+        '''
+        return self.attributes_by_module.get(module_id, [])
+
+    def module_attribute(self, path: str) -> Optional[RecordType]:
+        return self.attributes_by_path.get(path)
+
+    def attribute_usages(self, tag: TagType) -> List[RecordType]:
+        '''
+        The `module_to_attributes.json` entries of every path to the
+        attribute, in any module.
+        '''
+        return self.usages_by_attribute.get(self.attribute_slug(tag), [])
+
+    def modules_with_attribute(self, tag: TagType) -> List[str]:
+        return self.module_ids_by_attribute.get(self.attribute_slug(tag), [])
+
+    def ciods_with_attribute(self, tag: TagType) -> List[str]:
+        return self.ciod_ids_by_attribute.get(self.attribute_slug(tag), [])
+
+
+def load_standard(dist_dir: str = DEFAULT_DIST_DIR) -> Standard:
+    '''
+    Load the JSON files of `dist_dir`. Files may be gzip-compressed, as
+    written by `make compressed`. Descriptions written as IDs (with
+    `DESCRIPTIONS=reference`) are read from `descriptions.json`.
+    '''
+    def load(filename):
+        return json_io.read_json_to_dict(standard_file_path(dist_dir, filename))
+    module_to_attributes = load('module_to_attributes.json')
+    if any('descriptionId' in pair for pair in module_to_attributes):
+        module_to_attributes = inline_descriptions(module_to_attributes, load('descriptions.json'))
+    return Standard(load('ciods.json'), load('modules.json'), load('attributes.json'),
+                    load('ciod_to_modules.json'), module_to_attributes)
+
+
+def standard_file_path(dist_dir: str, filename: str) -> str:
+    filepath = os.path.join(dist_dir, filename)
+    if not os.path.exists(filepath) and os.path.exists(filepath + '.gz'):
+        return filepath + '.gz'
+    return filepath
+
+
+def path_attribute_slug(pair: RecordType) -> str:
+    # The last ID of an attribute path is the attribute's key in
+    # `attributes.json`.
+    return pair['path'].split(':')[-1]
+
+
+def group_by(records: Iterable[RecordType], key: Callable[[RecordType], str]) -> Dict[str, List[RecordType]]:
+    groups = OrderedDict()  # type: Dict[str, List[RecordType]]
+    for record in records:
+        groups.setdefault(key(record), []).append(record)
+    return groups
+
+
+def unique(values: Iterable[str]) -> List[str]:
+    return list(OrderedDict.fromkeys(values))
@@ -2,8 +2,9 @@
 Functions for low-level manipulation of standard tables,
 represented by a list-of-lists.
 '''
-from typing import List, Tuple, Dict
+from typing import List, Dict
 from copy import copy
+import itertools
 from bs4 import Tag
 
 from dicom_standard import parse_relations as pr
@@ -38,31 +39,46 @@ def expand_rows(table: TableListType) -> TableListType:
     communicated between each row (the rowspan information).
     '''
     extended_table = []
-    row_expansion = []  # Format: [(bs_html_object, row_index)]
+    # Indexed by column: the copy of the cell spanning down that column,
+    # and the number of rows it has yet to fill.
+    spanning_cells = []  # type: List[Tag]
+    remaining_rows = []  # type: List[int]
     for row in table:
-        expanded_row, row_expansion = expand_rowspans(row, row_expansion)
+        expanded_row = expand_rowspans(row, spanning_cells, remaining_rows)
         extended_table.append(expanded_row)
     return extended_table
 
 
-def expand_rowspans(row: List[Tag], row_expansion: List[Tuple[Tag, int]]) -> Tuple[List[Tag], List[Tuple[Tag, int]]]:
-    updated_row = apply_rowspans_from_prev_row(row, row_expansion)
-    row_expansion = update_row_expansion_counter(updated_row, row_expansion)
-    return updated_row, row_expansion
-
-
-def apply_rowspans_from_prev_row(row: List[Tag], row_expansion: List[Tuple[Tag, int]]) -> List[Tag]:
-    updated_row = row
-    for cell, cell_idx in row_expansion:
-        cell = decrement_rowspan_counter(cell)
-        updated_row = add_row_cell(updated_row, cell, cell_idx)
-    return updated_row
-
-
-def add_row_cell(row: List[Tag], cell: Tag, cell_idx: int) -> List[Tag]:
-    updated_row = slide_down(cell_idx, row)
-    updated_row[cell_idx] = cell
-    return updated_row
+def expand_rowspans(row: List[Tag], spanning_cells: List[Tag], remaining_rows: List[int]) -> List[Tag]:
+    '''
+    Fill the columns still spanned by cells of previous rows, in column
+    order, and record the rowspans that start in this row.
+    '''
+    expanded_row = []
+    row_cells = iter(row)
+    for idx in itertools.count():
+        if idx < len(remaining_rows) and remaining_rows[idx] > 0:
+            remaining_rows[idx] -= 1
+            expanded_row.append(decrement_rowspan_counter(spanning_cells[idx]))
+            continue
+        cell = next(row_cells, None)
+        if cell is None:
+            if any(remaining_rows[idx:]):
+                raise ValueError('Cell spans beyond table!')
+            return expanded_row
+        if has_rowspans_to_expand(cell):
+            record_rowspan(cell, idx, spanning_cells, remaining_rows)
+        expanded_row.append(cell)
+
+
+def record_rowspan(cell: Tag, idx: int, spanning_cells: List[Tag], remaining_rows: List[int]) -> None:
+    missing_columns = idx + 1 - len(remaining_rows)
+    if missing_columns > 0:
+        spanning_cells.extend([None] * missing_columns)
+        remaining_rows.extend([0] * missing_columns)
+    spanning_cells[idx] = copy(cell)
+    remaining_rows[idx] = int(cell['rowspan']) - 1
+    clear_rowspan_counter(cell)
 
 
 def slide_down(start_idx: int, row: List[Tag], num_slides: int = 1) -> List[Tag]:
@@ -91,25 +107,6 @@ def clear_rowspan_counter(cell: Tag) -> None:
     cell['rowspan'] = 1
 
 
-def update_row_expansion_counter(row: List[Tag], row_expansion: List[Tuple[Tag, int]]) -> List[Tuple[Tag, int]]:
-    row_expansion = remove_completed_rowspans(row_expansion)
-    for idx, cell in enumerate(row):
-        if is_new_rowspan_cell(cell, idx, row_expansion):
-            row_expansion.append((copy(cell), idx))
-            clear_rowspan_counter(cell)
-    return row_expansion
-
-
-def is_new_rowspan_cell(cell: Tag, idx: int, row_expansion: List[Tuple[Tag, int]]) -> bool:
-    is_not_recorded = (cell, idx) not in row_expansion
-    return has_rowspans_to_expand(cell) and is_not_recorded
-
-
-def remove_completed_rowspans(row_expansion: List[Tuple[Tag, int]]) -> List[Tuple[Tag, int]]:
-    return [(cell, idx) for (cell, idx) in row_expansion
-            if has_rowspans_to_expand(cell)]
-
-
 def has_rowspans_to_expand(cell: Tag) -> bool:
     rowspan_attr = cell.get('rowspan')
     return int(cell.get('rowspan')) > 1 if rowspan_attr is not None else None
@@ -0,0 +1,81 @@
+'''
+Utility functions for reading DICOM attribute tags in the forms they are
+written in, and in the forms the JSON files key them by.
+'''
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+import re
+
+# Group and element numbers, e.g. `(0010,0010)`, `0010,0010` or `00100010`.
+# Repeating groups are written with `x` digits, e.g. `(60xx,3000)`.
+TAG_RE = re.compile(r'([0-9a-fA-FxX]{4})\s*,?\s*([0-9a-fA-FxX]{4})')
+
+TagType = Union[str, int]
+ValuesByMaskType = Dict[int, Dict[int, Any]]
+
+FULL_TAG_MASK = 0xFFFFFFFF
+GROUP_MASK = 0xFFFF0000
+
+
+def tag_slug(tag: TagType) -> str:
+    '''
+    Return the key of `tag` in `attributes.json`: its eight hexadecimal
+    digits in lower case, e.g. `00100010` for `(0010,0010)` or 0x00100010.
+    '''
+    if isinstance(tag, int):
+        if not 0 <= tag <= 0xFFFFFFFF:
+            raise ValueError('{} is not a 32-bit attribute tag.'.format(tag))
+        return '{:08x}'.format(tag)
+    tag_digits = tag.strip()
+    if tag_digits.startswith('(') and tag_digits.endswith(')'):
+        tag_digits = tag_digits[1:-1].strip()
+    match = TAG_RE.fullmatch(tag_digits)
+    if match is None:
+        raise ValueError('"{}" is not an attribute tag.'.format(tag))
+    group, element = match.groups()
+    return (group + element).lower()
+
+
+def tag_value_and_mask(slug: str) -> Tuple[int, int]:
+    '''
+    Return the numeric tag of a slug, with its `x` digits set to 0, and the
+    mask of its other digits, e.g. `(0x60000010, 0xFF00FFFF)` for `60xx0010`.
+    '''
+    value = int(slug.replace('x', '0'), 16)
+    mask = int(''.join('0' if digit == 'x' else 'f' for digit in slug), 16)
+    return value, mask
+
+
+class MaskedTagMatcher:
+    '''
+    Find the masked tag, such as `(60xx,0010)`, that a concrete tag belongs
+    to. Masked tags are grouped by mask, so that a lookup takes one
+    dictionary access per distinct mask (a handful in PS3.6), however many
+    masked tags there are.
+
+    Masks are tried from the most to the least specific. Masked groups only
+    match even groups, since odd groups hold private attributes.
+    '''
+    def __init__(self, masked_tags: Iterable[Tuple[int, int, Any]]) -> None:
+        values_by_mask = {}  # type: ValuesByMaskType
+        for value, mask, key in masked_tags:
+            values_by_mask.setdefault(mask, {}).setdefault(value, key)
+        self.masks = sorted(values_by_mask.items(), key=lambda item: (-bin(item[0]).count('1'), item[0]))
+
+    def match(self, tag: int) -> Optional[Any]:
+        '''
+        Return the key given for the masked tag matching `tag`, or None.
+        '''
+        for mask, values in self.masks:
+            if tag & 0x10000 and mask & GROUP_MASK != GROUP_MASK:
+                continue
+            key = values.get(tag & mask)
+            if key is not None:
+                return key
+        return None
+
+
+def slug_matcher(slugs: Iterable[str]) -> MaskedTagMatcher:
+    '''
+    Match concrete tags to the masked slugs among `slugs`.
+    '''
+    return MaskedTagMatcher(tag_value_and_mask(slug) + (slug,) for slug in slugs if 'x' in slug)
@@ -39,6 +39,7 @@ setup(
 
     install_requires=[
         'beautifulsoup4',
+        'lxml',
         'py',
     ],
 
@@ -0,0 +1,60 @@
+from bs4 import BeautifulSoup
+
+import dicom_standard.build as b
+import dicom_standard.cache as cache
+import dicom_standard.extract_ciod_module_data as ciod_data
+import dicom_standard.extract_modules_with_attributes as module_data
+import dicom_standard.extract_macros as macro_data
+import tests.standard_snippets as snippets
+
+
+def parse_excerpt():
+    return BeautifulSoup(snippets.part03_excerpt, 'html.parser')
+
+
+def test_single_parse_matches_separate_extractions():
+    separate_outputs = {
+        'raw_ciod_module_tables.json': ciod_data.tables_to_json(*ciod_data.get_ciod_tables(parse_excerpt())),
+        'raw_module_attribute_tables.json': module_data.tables_to_json(*module_data.get_module_tables(parse_excerpt())),
+        'raw_macro_tables.json': macro_data.tables_to_json(*macro_data.get_macro_tables(parse_excerpt())),
+    }
+    shared_outputs = b.extract_part03_tables(parse_excerpt())
+    assert shared_outputs == separate_outputs
+    assert len(shared_outputs['raw_ciod_module_tables.json']) == 1
+    assert len(shared_outputs['raw_module_attribute_tables.json']) == 1
+    assert list(shared_outputs['raw_macro_tables.json'].keys()) == ['table_10-18', 'table_C.7.1.4-1']
+
+
+def test_attribute_rows_record_extracted_text():
+    macros = b.extract_part03_tables(parse_excerpt())['raw_macro_tables.json']
+    attribute = macros['table_10-18']['attributes'][0]
+    assert attribute['nameText'] == 'Issuer of Patient ID'
+    assert attribute['tagText'] == '(0010,0021)'
+    assert attribute['typeText'] == '3'
+    assert attribute['macroId'] is None
+
+
+def counting(function, calls):
+    def count_calls(*args):
+        calls.append(args)
+        return function(*args)
+    return count_calls
+
+
+def test_table_cache_only_extracts_changed_tables(tmpdir, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmpdir))
+    calls = []
+    monkeypatch.setattr(module_data, 'table_div_to_json', counting(module_data.table_div_to_json, calls))
+    monkeypatch.setattr(macro_data, 'table_div_to_json', counting(macro_data.table_div_to_json, calls))
+    uncached_outputs = b.extract_part03_tables(parse_excerpt())
+    assert len(calls) == 3
+    assert b.extract_part03_tables(parse_excerpt(), use_cache=True) == uncached_outputs
+    assert len(calls) == 6
+    assert b.extract_part03_tables(parse_excerpt(), use_cache=True) == uncached_outputs
+    assert len(calls) == 6
+    changed_excerpt = snippets.part03_excerpt.replace('<p>Issuer of Patient ID</p>', '<p>Issuer of the Patient ID</p>')
+    changed_outputs = b.extract_part03_tables(BeautifulSoup(changed_excerpt, 'html.parser'), use_cache=True)
+    assert len(calls) == 7
+    assert changed_outputs['raw_macro_tables.json']['table_10-18']['attributes'][0]['nameText'] == \
+        'Issuer of the Patient ID'
+    assert changed_outputs['raw_module_attribute_tables.json'] == uncached_outputs['raw_module_attribute_tables.json']
@@ -0,0 +1,83 @@
+import pytest
+
+import dicom_standard.cache as cache
+import dicom_standard.parse_lib as pl
+
+
+def counting_extractor(calls):
+    def extract(filepath):
+        calls.append(filepath)
+        with open(filepath) as html_file:
+            return {'length': len(html_file.read())}
+    return extract
+
+
+def test_cached_extraction_reuses_unchanged_files(tmpdir, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmpdir.join('cache')))
+    page = tmpdir.join('page.html')
+    page.write('<p>one</p>')
+    calls = []
+    extract = counting_extractor(calls)
+    assert cache.cached_extraction('stage', str(page), extract) == {'length': 10}
+    assert cache.cached_extraction('stage', str(page), extract) == {'length': 10}
+    assert len(calls) == 1
+    page.write('<p>three</p>')
+    assert cache.cached_extraction('stage', str(page), extract) == {'length': 12}
+    assert cache.cached_extraction('stage', str(page), extract, use_cache=False) == {'length': 12}
+    assert len(calls) == 3
+
+
+def test_cached_extraction_stream_reuses_items(tmpdir, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmpdir.join('cache')))
+    page = tmpdir.join('page.html')
+    page.write('<p>one</p>')
+    calls = []
+
+    def extract(filepath):
+        calls.append(filepath)
+        yield from ['a', 'b']
+    assert list(cache.cached_extraction_stream('stage', str(page), extract)) == ['a', 'b']
+    assert list(cache.cached_extraction_stream('stage', str(page), extract)) == ['a', 'b']
+    assert len(calls) == 1
+
+
+def test_result_cache_reuses_results_of_the_same_code_version(tmpdir, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmpdir))
+    calls = []
+
+    def compute(item):
+        calls.append(item)
+        return item.upper()
+
+    def run(items, code_version):
+        result_cache = cache.ResultCache('stage', code_version)
+        results = [result_cache.result(cache.content_digest(item), lambda: compute(item)) for item in items]
+        result_cache.save()
+        return results
+    assert run(['a', 'b', 'a'], '1') == ['A', 'B', 'A']
+    assert calls == ['a', 'b']
+    assert run(['b', 'c'], '1') == ['B', 'C']
+    assert calls == ['a', 'b', 'c']
+    # Only the results used by the latest run are kept.
+    assert run(['a'], '1') == ['A']
+    assert calls == ['a', 'b', 'c', 'a']
+    assert run(['a'], '2') == ['A']
+    assert calls == ['a', 'b', 'c', 'a', 'a']
+
+
+def test_evict_cache_entries_removes_least_recently_used(tmpdir):
+    for age, name in enumerate(['new', 'middle', 'old']):
+        entry = tmpdir.join(name + '.pickle')
+        entry.write('x' * 10)
+        entry.setmtime(1000 - age)
+    cache.evict_cache_entries(str(tmpdir), 20)
+    assert sorted(entry.purebasename for entry in tmpdir.listdir()) == ['middle', 'new']
+
+
+def test_processing_version_depends_on_the_parser(monkeypatch):
+    pytest.importorskip('lxml')
+    versions = set()
+    for parser_name in pl.HTML_PARSERS:
+        monkeypatch.setattr(pl, 'HTML_PARSER', parser_name)
+        versions.add(cache.processing_version())
+    assert len(versions) == len(pl.HTML_PARSERS)
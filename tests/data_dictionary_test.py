@@ -0,0 +1,53 @@
+import pytest
+
+from dicom_standard.data_dictionary import DataDictionary, data_dictionary_bytes, FULL_TAG_MASK
+
+attributes = {
+    '00100020': {'tag': '(0010,0020)', 'name': 'Patient ID', 'keyword': 'PatientID',
+                 'valueRepresentation': 'LO', 'valueMultiplicity': '1', 'retired': False},
+    '00100010': {'tag': '(0010,0010)', 'name': "Patient's Name", 'keyword': 'PatientName',
+                 'valueRepresentation': 'PN', 'valueMultiplicity': '1', 'retired': False},
+    '60xx3000': {'tag': '(60XX,3000)', 'name': 'Overlay Data', 'keyword': 'OverlayData',
+                 'valueRepresentation': 'OB or OW', 'valueMultiplicity': '1', 'retired': False},
+    '00280005': {'tag': '(0028,0005)', 'name': 'Image Dimensions', 'keyword': 'ImageDimensions',
+                 'valueRepresentation': 'US', 'valueMultiplicity': '1', 'retired': True},
+    'fffee000': {'tag': '(FFFE,E000)', 'name': 'Item', 'keyword': 'Item',
+                 'valueRepresentation': '', 'valueMultiplicity': '1', 'retired': False},
+}
+
+
+@pytest.fixture
+def dictionary_path(tmpdir):
+    dictionary_file = tmpdir.join('data_dictionary.bin')
+    dictionary_file.write_binary(data_dictionary_bytes(attributes))
+    return str(dictionary_file)
+
+
+def test_data_dictionary_lookups(dictionary_path):
+    with DataDictionary(dictionary_path) as dictionary:
+        assert [element.tag for element in dictionary] == [0x00100010, 0x00100020, 0x00280005, 0x60003000, 0xFFFEE000]
+        patient_name = dictionary.lookup('(0010,0010)')
+        assert patient_name.name == "Patient's Name"
+        assert (patient_name.valueRepresentation, patient_name.mask) == ('PN', FULL_TAG_MASK)
+        assert dictionary.lookup(0x00280005).retired
+        assert dictionary.lookup(0xFFFEE000).valueRepresentation == ''
+        assert dictionary.lookup(0x00100030) is None
+        assert dictionary.lookup(0xFFFFFFFF) is None
+        assert dictionary.lookup_keyword('PatientID').tag == 0x00100020
+        assert dictionary.lookup_keyword('OverlayData').mask == 0xFF00FFFF
+        assert dictionary.lookup_keyword('Missing') is None
+
+
+def test_data_dictionary_resolves_repeating_groups(dictionary_path):
+    with DataDictionary(dictionary_path) as dictionary:
+        assert dictionary.lookup(0x60003000).keyword == 'OverlayData'
+        assert dictionary.lookup('(6002,3000)').keyword == 'OverlayData'
+        assert dictionary.lookup(0x60013000) is None
+        assert dictionary.lookup(0x60023001) is None
+
+
+def test_data_dictionary_rejects_other_files(tmpdir):
+    other_file = tmpdir.join('attributes.json')
+    other_file.write('{"00100010": {}}')
+    with pytest.raises(ValueError):
+        DataDictionary(str(other_file))
@@ -0,0 +1,27 @@
+from dicom_standard.description_utils import (description_id, description_table, inline_descriptions,
+                                              reference_description, reference_descriptions)
+from dicom_standard.postprocess_mark_references import record_references_inside_pairs
+
+code_sequence_description = '<td><p>See <a href="#sect_8.8">Section 8.8</a>.</p></td>'
+
+
+def test_descriptions_round_trip():
+    pairs = [{'path': 'a:0008010', 'description': '<td>Code</td>', 'type': '1'},
+             {'path': 'b:0008010', 'description': '<td>Code</td>', 'type': '1'},
+             {'path': 'b:0008011', 'description': '<td>Meaning</td>', 'type': '1'}]
+    descriptions = description_table(pairs)
+    assert list(descriptions.values()) == ['<td>Code</td>', '<td>Meaning</td>']
+    assert list(descriptions.keys())[0] == description_id('<td>Code</td>')
+    referenced_pairs = reference_descriptions(pairs)
+    assert list(referenced_pairs[0].keys()) == ['path', 'descriptionId', 'type']
+    assert referenced_pairs[1]['descriptionId'] == referenced_pairs[0]['descriptionId']
+    assert inline_descriptions(referenced_pairs, descriptions) == pairs
+    assert list(map(reference_description, pairs)) == referenced_pairs
+
+
+def test_repeated_descriptions_are_marked_once():
+    pairs = [{'description': code_sequence_description}, {'description': code_sequence_description}]
+    marked_pairs = record_references_inside_pairs(pairs)
+    assert marked_pairs[0] == marked_pairs[1]
+    assert marked_pairs[0]['externalReferences'] == [{'sourceUrl': '#sect_8.8', 'title': 'Section 8.8'}]
+    assert marked_pairs[0]['externalReferences'][0] is not marked_pairs[1]['externalReferences'][0]
@@ -0,0 +1,33 @@
+import dicom_standard.parse_lib as pl
+import dicom_standard.parse_relations as pr
+from dicom_standard.document_index import table_index, chapter_index
+import tests.standard_snippets as snippets
+
+
+def test_table_index_lookups():
+    standard = pl.parse_html(snippets.part03_excerpt)
+    index = table_index(standard)
+    table_ids = ['table_10-18', 'table_A.2-1', 'table_C.7-1', 'table_C.7.1.4-1']
+    assert [pr.table_id(table) for table in index.tables] == table_ids
+    assert index.table('table_C.7-1') is standard.find('a', id='table_C.7-1').parent
+    assert index.table('table_missing') is None
+    assert index.table_with_title(pr.table_name(index.tables[0])) is index.tables[0]
+
+
+def test_table_index_is_built_once_per_document():
+    standard = pl.parse_html(snippets.part03_excerpt)
+    assert table_index(standard) is table_index(standard)
+    assert table_index(standard) is not table_index(pl.parse_html(snippets.part03_excerpt))
+
+
+def test_chapter_index_lookups():
+    standard = pl.parse_html(snippets.part03_excerpt)
+    index = chapter_index(standard)
+    assert list(index.chapters.keys()) == ['chapter_10', 'chapter_A', 'chapter_C', 'chapter_Z']
+    assert index.annex_ids() == ['chapter_A', 'chapter_C', 'chapter_Z']
+    assert index.section('sect_10.18') is standard.find('a', id='sect_10.18').find_parent('div', class_='section')
+    assert [pr.table_id(table) for table in index.tables_in_chapter('chapter_C')] == ['table_C.7-1', 'table_C.7.1.4-1']
+    assert [pr.table_id(table) for table in index.tables_in_section('sect_A.2')] == ['table_A.2-1']
+    assert index.tables_in_chapter('chapter_Z') == []
+    assert index.tables_in_chapter('chapter_missing') == []
+    assert chapter_index(standard) is index
@@ -2,7 +2,7 @@ import subprocess
 
 import pytest
 
-import dicom_standard.parse_lib as pl
+import dicom_standard.json_io as json_io
 
 
 @pytest.fixture(scope='module')
@@ -12,27 +12,27 @@ def make_standard():
 
 @pytest.fixture(scope='module')
 def ciods(make_standard):
-    return pl.read_json_to_dict('standard/ciods.json')
+    return json_io.read_json_to_dict('standard/ciods.json')
 
 
 @pytest.fixture(scope='module')
 def modules(make_standard):
-    return pl.read_json_to_dict('standard/modules.json')
+    return json_io.read_json_to_dict('standard/modules.json')
 
 
 @pytest.fixture(scope='module')
 def attributes(make_standard):
-    return pl.read_json_to_dict('standard/attributes.json')
+    return json_io.read_json_to_dict('standard/attributes.json')
 
 
 @pytest.fixture(scope='module')
 def ciod_module_relationship(make_standard):
-    return pl.read_json_to_dict('standard/ciod_to_modules.json')
+    return json_io.read_json_to_dict('standard/ciod_to_modules.json')
 
 
 @pytest.fixture(scope='module')
 def module_attribute_relationship(make_standard):
-    return pl.read_json_to_dict('standard/module_to_attributes.json')
+    return json_io.read_json_to_dict('standard/module_to_attributes.json')
 
 
 @pytest.mark.endtoend
@@ -0,0 +1,51 @@
+import sqlite3
+
+import pytest
+
+from dicom_standard.export_sqlite import export_standard, foreign_key_violations, write_database
+
+ciods = {'ct-image': {'id': 'ct-image', 'name': 'CT Image', 'linkToStandard': 'http://x#table_A.3-1',
+                      'description': '<p>Images from a <em>computed tomography</em> scanner.</p>'}}
+modules = {'patient': {'id': 'patient', 'name': 'Patient', 'linkToStandard': 'http://x#table_C.7-1',
+                       'description': '<p>Attributes of the patient.</p>'}}
+attributes = {
+    '00100010': {'tag': '(0010,0010)', 'name': "Patient's Name", 'keyword': 'PatientName',
+                 'valueRepresentation': 'PN', 'valueMultiplicity': '1', 'retired': False},
+}
+ciod_to_modules = [{'ciod': 'ct-image', 'module': 'patient', 'usage': 'M',
+                    'conditionalStatement': None, 'informationEntity': 'Patient'}]
+module_to_attributes = [
+    {'module': 'patient', 'path': 'patient:00100010', 'tag': '(0010,0010)', 'type': '2',
+     'linkToStandard': 'http://x#table_C.7-1', 'description': '<td><p>Full name of the patient.</p></td>',
+     'externalReferences': [{'sourceUrl': 'http://x#sect_C.7.1.1', 'title': 'Section C.7.1.1'}]},
+    {'module': 'patient', 'path': 'patient:00100021', 'tag': '(0010,0021)', 'type': '3',
+     'linkToStandard': 'http://x#table_C.7-1', 'description': '<td><p>Issuer of the patient ID.</p></td>',
+     'externalReferences': []},
+]
+
+
+def test_export_standard():
+    connection = sqlite3.connect(':memory:')
+    export_standard(connection, ciods, modules, attributes, ciod_to_modules, module_to_attributes)
+    assert connection.execute('''
+        SELECT ciod_modules.ciod, module_attributes.path FROM attributes
+        JOIN module_attributes ON module_attributes.attribute = attributes.id
+        JOIN ciod_modules ON ciod_modules.module = module_attributes.module
+        WHERE attributes.keyword = 'PatientName'
+    ''').fetchall() == [('ct-image', 'patient:00100010')]
+    assert connection.execute("SELECT title FROM external_references WHERE path = 'patient:00100010'").fetchall() == [
+        ('Section C.7.1.1',)]
+    assert connection.execute("SELECT kind, id FROM description_search WHERE description_search MATCH 'patient' "
+                              "ORDER BY id").fetchall() == [
+        ('module', 'patient'), ('module_attribute', 'patient:00100010'), ('module_attribute', 'patient:00100021')]
+    assert foreign_key_violations(connection) == {('module_attributes', 'attributes'): 1}
+
+
+def test_duplicate_paths_are_rejected(tmpdir):
+    database = tmpdir.join('standard.db')
+    database.write('previous export')
+    with pytest.raises(ValueError, match='patient:00100010'):
+        write_database(str(database), ciods, modules, attributes, ciod_to_modules,
+                       module_to_attributes + module_to_attributes[:1])
+    assert database.read() == 'previous export'
+    assert tmpdir.listdir() == [database]
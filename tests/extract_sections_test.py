@@ -1,6 +1,12 @@
+import io
+import json
+
 from bs4 import BeautifulSoup as bs
 
-from dicom_standard.extract_sections import extract_section_ids
+from dicom_standard.extract_sections import (extract_section_ids, extract_pages, normalize_sections,
+                                             referenced_id_anchors, stream_sections, write_sections_json)
+from dicom_standard.json_io import write_json
+import tests.standard_snippets as snippets
 
 
 def create_mock_standard(mock_standard_str):
@@ -25,3 +31,50 @@ def test_extract_section_ids():
     }
     section_ids = extract_section_ids(standard)
     assert expected_standard == stringify_mock_standard(section_ids)
+
+
+def parsed_sections(sections):
+    return {k: str(bs(v, 'html.parser')) for k, v in sections}
+
+
+def test_stream_sections_matches_parse_tree():
+    page = '<html><body><div class="book">' + snippets.cr_iod_section + '</div></body></html>'
+    expected_sections = normalize_sections(referenced_id_anchors(bs(page, 'html.parser')))
+    streamed_sections = list(stream_sections(page))
+    assert [section_id for section_id, _ in streamed_sections] == ['sect_A.2.1', 'sect_A.2.2', 'sect_A.2.3',
+                                                                   'table_A.2-1', 'sect_A.2']
+    assert parsed_sections(streamed_sections) == expected_sections
+
+
+def test_stream_sections_closes_unterminated_elements():
+    page = '<div><div><div class="table"><a id="table_1"></a><p>Unclosed<br>paragraph</div></div></div>'
+    assert list(stream_sections(page)) == [
+        ('table_1', '<div><div class="table"><a id="table_1"></a><p>Unclosed<br>paragraph</div></div>')
+    ]
+
+
+def test_write_sections_json_matches_write_json():
+    pages = [
+        ('part03.html', [('sect_1', '<div> "1"</div>'), ('table_1', '<div></div>')]),
+        ('part04.html', []),
+    ]
+    for output_format in ['pretty', 'compact']:
+        output = io.StringIO()
+        write_sections_json(iter(pages), output, output_format)
+        expected_output = io.StringIO()
+        write_json({page: dict(sections) for page, sections in pages}, output_format, expected_output)
+        assert output.getvalue() == expected_output.getvalue()
+
+
+def test_parallel_extraction_matches_serial_extraction(tmpdir):
+    pages = []
+    for page_name, section_id in [('part03.html', 'sect_A.2'), ('part04.html', 'sect_B.1'), ('part06.html', 'sect_6')]:
+        page = tmpdir.join(page_name)
+        page.write('<html><body>' + snippets.cr_iod_section.replace('sect_A.2', section_id) + '</body></html>')
+        pages.append(str(page))
+    serial_output = io.StringIO()
+    write_sections_json(extract_pages(pages, jobs=1), serial_output)
+    parallel_output = io.StringIO()
+    write_sections_json(extract_pages(pages, jobs=3), parallel_output)
+    assert parallel_output.getvalue() == serial_output.getvalue()
+    assert list(json.loads(parallel_output.getvalue()).keys()) == ['part03.html', 'part04.html', 'part06.html']
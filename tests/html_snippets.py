@@ -121,3 +121,43 @@ bothspan = '''
 </table>
 </div>
 '''
+
+staggered_rowspan = '''
+<div>
+<a id="staggered_rowspan"></a>
+<table frame="box" rules="all">
+<thead>
+<tr>
+    <th>IE</th><th>Module</th><th>Reference</th><th>Usage</th>
+</tr>
+</thead>
+<tbody>
+<tr>
+    <td>1</td><td>2</td><td rowspan="3">3</td><td>4</td>
+</tr>
+<tr>
+    <td rowspan="2">1</td><td>2</td><td>4</td>
+</tr>
+<tr>
+    <td>2</td><td>4</td>
+</tr>
+</tbody>
+</table>
+</div>
+'''
+
+overlong_rowspan = '''
+<div>
+<a id="overlong_rowspan"></a>
+<table frame="box" rules="all">
+<tbody>
+<tr>
+    <td>1</td><td>2</td><td rowspan="2">3</td>
+</tr>
+<tr>
+    <td>1</td>
+</tr>
+</tbody>
+</table>
+</div>
+'''
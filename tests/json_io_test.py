@@ -0,0 +1,57 @@
+import pytest
+
+import dicom_standard.json_io as json_io
+
+
+def test_json_formats_round_trip(tmpdir):
+    data = {'module': [{'tag': '(0010,0010)', 'name': 'Patient’s Name'}]}
+    for output_format in json_io.JSON_FORMATS:
+        json_file = tmpdir.join('data.' + output_format)
+        with open(str(json_file), 'w') as output:
+            json_io.write_json(data, output_format, output)
+        assert json_io.read_json_to_dict(str(json_file)) == data
+    assert '\n' not in tmpdir.join('data.compact').read()
+    assert tmpdir.join('data.gzip').read_binary().startswith(json_io.GZIP_MAGIC_NUMBER)
+
+
+def test_json_records_match_write_json(tmpdir):
+    records = [{'tag': '(0010,0010)', 'externalReferences': [{'title': 'Patient’s Name'}]}, {'tag': 12}, [], 3.5]
+    # gzip records the filename, so both files have the same name.
+    expected_file, records_file = tmpdir.mkdir('expected').join('data'), tmpdir.mkdir('records').join('data')
+    for output_format in json_io.JSON_FORMATS:
+        for data in [records, []]:
+            with open(str(expected_file), 'w') as output:
+                json_io.write_json(data, output_format, output)
+            with open(str(records_file), 'w') as output:
+                json_io.write_json_records(iter(data), output_format, output)
+            assert records_file.read_binary() == expected_file.read_binary()
+
+
+def test_json_records_round_trip(tmpdir, monkeypatch):
+    # Small blocks split the records, and the numbers, across blocks.
+    monkeypatch.setattr(json_io, 'JSON_READ_SIZE', 3)
+    records = [{'path': 'a:00100010', 'description': '<p>[1, 2]</p>\n'}, 12345, 1.5, 2e3, ' ] ', None]
+    for output_format in json_io.RECORD_FORMATS:
+        json_file = tmpdir.join('records.' + output_format)
+        with open(str(json_file), 'w') as output:
+            json_io.write_json_records(records, output_format, output)
+        assert list(json_io.read_json_records(str(json_file))) == records
+    assert len(tmpdir.join('records.jsonl').readlines()) == len(records)
+
+
+def test_read_json_records_reads_numbers_across_blocks(tmpdir):
+    json_file = tmpdir.join('numbers.json')
+    for number, value in [('12.5', 12.5), ('2e3', 2e3), ('-7', -7)]:
+        # The first block, read after the opening bracket, ends at each
+        # character of the number in turn.
+        for padding in range(json_io.JSON_READ_SIZE - len(number), json_io.JSON_READ_SIZE):
+            json_file.write('[' + ' ' * padding + number + ']')
+            assert list(json_io.read_json_records(str(json_file))) == [value]
+
+
+def test_read_json_records_rejects_malformed_arrays(tmpdir):
+    for malformed_json in ['[1 2]', '[1,]', '[1, 2']:
+        json_file = tmpdir.join('malformed.json')
+        json_file.write(malformed_json)
+        with pytest.raises(ValueError):
+            list(json_io.read_json_records(str(json_file)))
@@ -0,0 +1,45 @@
+import pytest
+
+import dicom_standard.json_io as json_io
+from dicom_standard.jsonl_index import read_index, read_rows, write_indexed_jsonl
+
+ciod_to_modules = [
+    {'ciod': 'ct-image', 'module': 'patient', 'usage': 'M'},
+    {'ciod': 'ct-image', 'module': 'general-study', 'usage': 'M'},
+    {'ciod': 'mr-image', 'module': 'patient', 'usage': 'M'},
+    {'ciod': 'mr-image', 'module': 'clinical-trial-subject', 'usage': 'U'},
+    {'ciod': 'cr-image', 'module': 'patient', 'usage': 'M', 'conditionalStatement': 'Patient’s Name'},
+]
+
+
+@pytest.fixture
+def jsonl_path(tmpdir):
+    jsonl_path = str(tmpdir.join('ciod_to_modules.jsonl'))
+    write_indexed_jsonl(iter(ciod_to_modules), jsonl_path, ['ciod', 'module'])
+    return jsonl_path
+
+
+def test_indexed_rows_match_the_table(jsonl_path):
+    index = read_index(jsonl_path)
+    for field in ['ciod', 'module']:
+        for value in {row[field] for row in ciod_to_modules}:
+            expected_rows = [row for row in ciod_to_modules if row[field] == value]
+            assert list(read_rows(jsonl_path, field, value, index)) == expected_rows
+    assert list(read_rows(jsonl_path, 'module', 'unknown', index)) == []
+
+
+def test_consecutive_rows_share_a_range(jsonl_path):
+    index = read_index(jsonl_path)
+    assert len(index['fields']['ciod']['ct-image']) == 1
+    assert len(index['fields']['module']['patient']) == 3
+
+
+def test_jsonl_is_streamed_in_order(jsonl_path):
+    assert list(json_io.read_json_records(jsonl_path)) == ciod_to_modules
+
+
+def test_out_of_date_index_is_rejected(jsonl_path):
+    with open(jsonl_path, 'a') as jsonl_file:
+        jsonl_file.write(json_io.json_line({'ciod': 'us-image', 'module': 'patient'}))
+    with pytest.raises(ValueError):
+        list(read_rows(jsonl_path, 'ciod', 'us-image'))
@@ -140,3 +140,71 @@ def test_insert_nested_macro():
     ]
 
     assert m.expand_macro_rows(mock_table, mock_macros) == expected_attributes
+
+
+def include_row(macro_id, marker=''):
+    return {
+        'name': '<td>{}Include <a href="#{}" class="xref">Table {}</a></td>'.format(marker, macro_id, macro_id),
+        'tag': 'None'
+    }
+
+
+def attribute_row(name, marker=''):
+    return {'name': '<td>{}{}</td>'.format(marker, name), 'tag': name}
+
+
+def test_expand_macro_rows_reuses_resolved_macros():
+    macros = {
+        'outer': {'linkToStandard': 'http://somelink#outer',
+                  'attributes': [attribute_row('a'), include_row('inner', '&gt;')]},
+        'inner': {'linkToStandard': 'http://somelink#inner',
+                  'attributes': [attribute_row('b')]},
+    }
+    table = {'linkToStandard': 'http://somelink#table',
+             'attributes': [include_row('outer'), include_row('inner', '&gt;')]}
+    resolved_macros = {}
+    expanded_attributes = m.expand_macro_rows(table, macros, resolved_macros)
+    assert expanded_attributes == [attribute_row('a'), attribute_row('b', '&gt;'), attribute_row('b', '&gt;')]
+    assert sorted(resolved_macros.keys()) == ['inner', 'outer']
+    assert macros['inner']['attributes'] == [attribute_row('b')]
+
+
+def test_expand_macro_rows_stops_include_cycles():
+    macros = {
+        'first': {'linkToStandard': 'http://somelink#first',
+                  'attributes': [attribute_row('a'), include_row('first'), include_row('second', '&gt;')]},
+        'second': {'linkToStandard': 'http://somelink#second',
+                   'attributes': [attribute_row('b'), include_row('first', '&gt;')]},
+    }
+    table = {'linkToStandard': 'http://somelink#table',
+             'attributes': [include_row('second'), include_row('first')]}
+    resolved_macros = {}
+    expanded_attributes = m.expand_macro_rows(table, macros, resolved_macros)
+    assert expanded_attributes == [
+        attribute_row('b'), attribute_row('a', '&gt;'),
+        attribute_row('a'), attribute_row('b', '&gt;'), attribute_row('a', '&gt;&gt;'),
+    ]
+    # The first expansion of 'first' was cut short by the loop back to
+    # 'second', so it is only resolved once it is included directly.
+    assert list(resolved_macros.keys()) == ['second', 'first']
+
+
+def test_expand_macro_rows_uses_recorded_fields():
+    macros = {
+        'inner': {'linkToStandard': 'http://somelink#inner',
+                  'attributes': [dict(attribute_row('b'), nameText='b', macroId=None)]},
+    }
+    table = {'linkToStandard': 'http://somelink#table',
+             'attributes': [dict(include_row('inner', '&gt;'), nameText='>Include Table inner', macroId='inner')]}
+    assert m.expand_macro_rows(table, macros) == [dict(attribute_row('b', '&gt;'), nameText='>b', macroId=None)]
+
+
+def test_macro_dependencies_include_nested_macros():
+    macros = {
+        'outer': {'attributes': [attribute_row('a'), include_row('inner', '&gt;')]},
+        'inner': {'attributes': [attribute_row('b'), include_row('outer')]},
+        'unused': {'attributes': [attribute_row('c')]},
+    }
+    table = {'attributes': [attribute_row('d'), include_row('outer')]}
+    assert m.macro_dependencies(table, macros) == ['inner', 'outer']
+    assert m.macro_dependencies({'attributes': [attribute_row('d')]}, macros) == []
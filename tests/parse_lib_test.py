@@ -13,3 +13,51 @@ def test_create_slug():
         "sample-test-evaluate"
     ]
     assert list(map(pl.create_slug, test_titles)) == expected_result
+
+
+description_cell = '''<td class="c" colspan="2"><p>See <a class="xref" href="#sect_C.7.6.1.1.5" title="x">Section C.7.6.1.1.5</a>, <a href="part04.html#table_B.5-1">Table B.5-1</a> and <a href="http://example.com/x">x</a>.</p>
+<a id="para_1"></a>
+<p><object data="figures/a.svg" type="image/svg+xml"><img src="figures/a.png"/></object> <img alt="b" src="figures/b.png"/></p></td>'''
+
+cleaned_description_cell = (
+    '<td colspan="2"><p>See <a href="http://dicom.nema.org/medical/dicom/current/output/chtml/part03/sect_C.7.6.html#sect_C.7.6.1.1.5"{target}>'
+    'Section C.7.6.1.1.5</a>, <a href="http://dicom.nema.org/medical/dicom/current/output/html/part04.html#table_B.5-1"{target}>'
+    'Table B.5-1</a> and <a href="http://example.com/x">x</a>.</p>\n'
+    '<p><img src="http://dicom.nema.org/medical/dicom/current/output/html/figures/a.svg"/> '
+    '<img src="http://dicom.nema.org/medical/dicom/current/output/html/figures/b.png"/></p></td>'
+)
+
+
+def test_clean_html():
+    assert pl.clean_html(description_cell) == cleaned_description_cell.format(target=' target="_blank"')
+    assert pl.clean_html(description_cell, new_tab_links=False) == cleaned_description_cell.format(target='')
+
+
+def test_clean_tag_matches_clean_html():
+    parsed_cell = pl.get_top_level_tag(pl.parse_html(description_cell))
+    assert pl.clean_tag(parsed_cell) == pl.clean_html(description_cell)
+
+
+def test_clean_html_replaces_top_level_svg_object():
+    svg_object = '<object data="figures/a.svg" type="image/svg+xml"><img src="figures/a.png"/></object>'
+    svg_img = '<img src="http://dicom.nema.org/medical/dicom/current/output/html/figures/a.svg"/>'
+    assert pl.clean_html(svg_object) == svg_img
+    assert pl.resolve_relative_resource_urls(svg_object) == svg_img
+
+
+def test_clean_html_joins_strings_around_removed_anchors():
+    assert pl.clean_html('<div>\n<a id="figure_1"></a>\n<div>x</div></div>') == '<div>\n<div>x</div></div>'
+    assert pl.clean_html('<p>x <a></a>\ny</p>') == '<p>x \ny</p>'
+    assert pl.clean_html('<pre> <a></a> </pre>') == '<pre>  </pre>'
+
+
+def test_text_from_simple_html_matches_parsed_text(monkeypatch):
+    simple_fragments = ['(0010,0010)', '1C', '<td><p>Patient&#8217;s Name</p></td>', '<p>a &amp; b</p>\n  <p>c<br/>d</p>',
+                        '<td>\n<p><a class="xref" href="#sect_C.7.1.1">Patient</a></p>\n</td>']
+    for fragment in simple_fragments:
+        assert pl.text_from_simple_html(fragment) is not None
+        for parser_name in pl.HTML_PARSERS:
+            monkeypatch.setattr(pl, 'HTML_PARSER', parser_name)
+            assert pl.text_from_html_string(fragment) == pl.fragment_root(pl.parse_html(fragment)).text.strip()
+    for fragment in ['<p>a<p>b', '<table><tr><td>x</td></tr></table>', '<a/>x', '<!-- x -->', 'a &amp b', 'a\r\nb']:
+        assert pl.text_from_simple_html(fragment) is None
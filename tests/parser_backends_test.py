@@ -0,0 +1,78 @@
+'''
+The JSON produced by the pipeline must not depend on the HTML parser
+selected in `parse_lib`.
+'''
+import json
+
+import pytest
+
+import dicom_standard.parse_lib as pl
+from dicom_standard import build
+from dicom_standard.extract_attributes import get_attribute_table, attribute_table_to_json
+from dicom_standard.extract_sections import stream_page_sections
+from dicom_standard.preprocess_modules_with_attributes import (expand_all_macros, preprocess_attribute_fields,
+                                                               expand_hierarchy)
+from dicom_standard.process_ciods import ciods_from_extracted_list
+from dicom_standard.process_ciod_module_relationship import define_all_relationships
+from dicom_standard.process_modules import modules_from_tables
+from dicom_standard.process_module_attribute_relationship import module_attr_relationship_table
+from dicom_standard.postprocess_mark_references import record_references_inside_pairs
+from dicom_standard.postprocess_save_references import find_reference_html_in_sections
+from dicom_standard.postprocess_update_reference_links import update_sourceurls
+import tests.standard_snippets as snippets
+
+
+def run_pipeline(part03_path, part06_path):
+    raw_tables = build.extract_part03_tables(pl.parse_html_file(part03_path))
+    raw_ciods = raw_tables['raw_ciod_module_tables.json']
+    tables_with_macros = expand_all_macros(raw_tables['raw_module_attribute_tables.json'],
+                                           raw_tables['raw_macro_tables.json'])
+    preprocessed_tables = expand_hierarchy(preprocess_attribute_fields(tables_with_macros))
+    pairs = record_references_inside_pairs(module_attr_relationship_table(preprocessed_tables))
+    sections = {'part03.html': dict(stream_page_sections(part03_path))}
+    references = find_reference_html_in_sections(pairs, sections)
+    return {
+        'ciods.json': ciods_from_extracted_list(raw_ciods),
+        'ciod_to_modules.json': define_all_relationships(raw_ciods),
+        'modules.json': modules_from_tables(preprocessed_tables),
+        'attributes.json': attribute_table_to_json(get_attribute_table(pl.parse_html_file(part06_path))),
+        'references.json': references,
+        'module_to_attributes.json': update_sourceurls(pairs, references),
+    }
+
+
+@pytest.fixture
+def standard_files(tmpdir):
+    part03 = tmpdir.join('part03.html')
+    part03.write(snippets.part03_excerpt)
+    part06 = tmpdir.join('part06.html')
+    part06.write('<html><body>' + snippets.properties_snippet + '</body></html>')
+    return str(part03), str(part06)
+
+
+def pipeline_json(monkeypatch, parser_name, standard_files):
+    monkeypatch.setattr(pl, 'HTML_PARSER', parser_name)
+    return {filename: json.dumps(data, indent=4, separators=(',', ':'))
+            for filename, data in run_pipeline(*standard_files).items()}
+
+
+def test_pipeline_output_is_identical_across_parsers(monkeypatch, standard_files):
+    pytest.importorskip('lxml')
+    reference_output = pipeline_json(monkeypatch, 'html.parser', standard_files)
+    assert len(json.loads(reference_output['module_to_attributes.json'])) == 8
+    assert len(json.loads(reference_output['references.json'])) == len(snippets.part03_referenced_sections)
+    for parser_name in pl.HTML_PARSERS:
+        assert pipeline_json(monkeypatch, parser_name, standard_files) == reference_output
+
+
+def test_set_html_parser_rejects_unknown_parsers():
+    with pytest.raises(ValueError):
+        pl.set_html_parser('html5lib')
+
+
+@pytest.mark.parametrize('parser_name', pl.HTML_PARSERS)
+def test_whitespace_only_html_is_kept(monkeypatch, parser_name):
+    monkeypatch.setattr(pl, 'HTML_PARSER', parser_name)
+    assert pl.clean_html(' ') == ' '
+    assert pl.clean_html('\n') == '\n'
+    assert pl.clean_html(' \n\t') == '\n'
@@ -0,0 +1,27 @@
+import benchmarks.pipeline_stages as ps
+from dicom_standard.document_index import INDEX_ATTRIBUTE_PREFIX
+
+
+def test_snippet_benchmarks_time_every_stage(monkeypatch):
+    monkeypatch.setattr(ps, 'MIN_BATCH_TIME', 0)
+    results = ps.run_benchmarks(ps.stage_benchmarks(ps.snippet_pages(), ps.snippet_tables()), repeat=2)
+    assert list(results.keys()) == [
+        'get_module_tables', 'expand_spans', 'expand_macro_rows', 'record_hierarchy_for_module', 'clean_html',
+        'normalize_sections', 'find_reference_html_in_sections', 'update_sourceurls']
+    assert all(len(result['runs']) == 2 and result['min'] <= result['median'] for result in results.values())
+
+
+def test_compare_results_flags_slower_stages():
+    def results(times):
+        return {'datasets': {'snippets': {name: {'min': time} for name, time in times.items()}}}
+    baseline = results({'clean_html': 1.0, 'expand_spans': 1.0})
+    comparisons = ps.compare_results(results({'clean_html': 1.1, 'expand_spans': 2.0, 'new_stage': 1.0}), baseline)
+    assert sorted(comparisons) == [('snippets', 'clean_html', 1.0, 1.1, False), ('snippets', 'expand_spans', 1.0, 2.0, True)]
+
+
+def test_module_table_runs_build_the_document_indexes():
+    benchmarks = {name: (prepare, run) for name, prepare, run in ps.stage_benchmarks(ps.snippet_pages())}
+    prepare, run = benchmarks['get_module_tables']
+    run(prepare())
+    standard = prepare()
+    assert not any(attribute.startswith(INDEX_ATTRIBUTE_PREFIX) for attribute in vars(standard))
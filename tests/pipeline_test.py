@@ -0,0 +1,105 @@
+import json
+import os
+
+import pytest
+
+import dicom_standard.cache as cache
+import dicom_standard.json_io as json_io
+from dicom_standard import pipeline
+from dicom_standard.data_dictionary import data_dictionary_bytes
+from tests.parser_backends_test import run_pipeline
+import tests.standard_snippets as snippets
+
+
+@pytest.fixture
+def standard_dir(tmpdir, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmpdir.join('cache')))
+    standard = tmpdir.mkdir('standard')
+    standard.join('part03.html').write(snippets.part03_excerpt)
+    standard.join('part06.html').write('<html><body>' + snippets.properties_snippet + '</body></html>')
+    return standard
+
+
+def build(standard_dir, output_dir, **options):
+    return pipeline.build_standard(str(standard_dir), str(output_dir), **options)
+
+
+def test_pipeline_matches_the_stages(standard_dir, tmpdir):
+    build(standard_dir, tmpdir.join('dist'))
+    expected_output = run_pipeline(str(standard_dir.join('part03.html')), str(standard_dir.join('part06.html')))
+    for filename, data in expected_output.items():
+        assert json_io.read_json_to_dict(str(tmpdir.join('dist', filename))) == data
+    attributes = expected_output['attributes.json']
+    assert tmpdir.join('dist', 'data_dictionary.bin').read_binary() == data_dictionary_bytes(attributes)
+
+
+def test_pipeline_in_worker_processes_matches_in_process(standard_dir, tmpdir):
+    build(standard_dir, tmpdir.join('in_process'), use_cache=False)
+    build(standard_dir, tmpdir.join('workers'), jobs=2, use_cache=False)
+    for stage in pipeline.pipeline_stages(['part03.html', 'part06.html']):
+        if stage.output_file is not None:
+            worker_output = tmpdir.join('workers', stage.output_file).read_binary()
+            assert worker_output == tmpdir.join('in_process', stage.output_file).read_binary()
+
+
+def test_unchanged_inputs_run_nothing(standard_dir, tmpdir, monkeypatch):
+    build(standard_dir, tmpdir.join('dist'))
+    # Touching a page does not change its content.
+    os.utime(str(standard_dir.join('part03.html')))
+
+    def fail(*args):
+        raise AssertionError('stage run despite a cached result')
+    monkeypatch.setattr(pipeline.StageResult, 'from_value', fail)
+    monkeypatch.setattr(pipeline.StageResult, 'value', fail)
+    assert build(standard_dir, tmpdir.join('dist'))['writtenFiles'] == []
+
+
+def test_changed_page_only_runs_dependent_stages(standard_dir, tmpdir):
+    first_keys = build(standard_dir, tmpdir.join('dist'))['keys']
+    standard_dir.join('part06.html').write('<html><body><p>Changed</p>' + snippets.properties_snippet + '</body></html>')
+    build_info = build(standard_dir, tmpdir.join('dist'))
+    changed_stages = {name for name, key in build_info['keys'].items() if key != first_keys[name]}
+    # The results of these stages are unchanged, so neither the stages after
+    # them nor the files of `dist` are run or written again.
+    assert changed_stages == {'attributes', 'sections:part06.html', 'references'}
+    assert build_info['writtenFiles'] == []
+
+
+def test_equal_results_do_not_run_dependent_stages(standard_dir, tmpdir):
+    first_keys = build(standard_dir, tmpdir.join('dist'))['keys']
+    # The paragraph is outside every table, so the extracted tables are equal.
+    standard_dir.join('part03.html').write(snippets.part03_excerpt.replace('</div></body>', '<p>Note</p></div></body>'))
+    keys = build(standard_dir, tmpdir.join('dist'))['keys']
+    assert keys['part03_tables'] != first_keys['part03_tables']
+    for stage_name in ['ciods', 'ciod_to_modules', 'preprocessed_modules_attributes']:
+        assert keys[stage_name] == first_keys[stage_name]
+
+
+def test_options_only_change_the_stages_reading_them(standard_dir, tmpdir):
+    first_keys = build(standard_dir, tmpdir.join('dist'))['keys']
+    keys = build(standard_dir, tmpdir.join('dist'), descriptions='reference')['keys']
+    assert {name for name, key in keys.items() if key != first_keys[name]} == {'module_to_attributes'}
+
+
+def test_modified_output_is_rewritten(standard_dir, tmpdir):
+    build(standard_dir, tmpdir.join('dist'))
+    modules = tmpdir.join('dist', 'modules.json')
+    expected_modules = modules.read()
+    modules.write('[]')
+    assert build(standard_dir, tmpdir.join('dist'))['writtenFiles'] == ['modules.json']
+    assert modules.read() == expected_modules
+
+
+def test_format_change_rewrites_outputs(standard_dir, tmpdir):
+    build(standard_dir, tmpdir.join('dist'))
+    written_files = build(standard_dir, tmpdir.join('dist'), output_format='compact')['writtenFiles']
+    assert 'modules.json' in written_files
+    modules = tmpdir.join('dist', 'modules.json').read()
+    assert '\n' not in modules
+    assert json.loads(modules)
+
+
+def test_missing_page_is_reported(tmpdir):
+    tmpdir.join('part03.html').write(snippets.part03_excerpt)
+    with pytest.raises(FileNotFoundError, match='part06.html'):
+        pipeline.build_standard(str(tmpdir), str(tmpdir.join('dist')))
@@ -1,6 +1,10 @@
 from bs4 import BeautifulSoup
 
+import dicom_standard.build as build
+import dicom_standard.cache as cache
+import dicom_standard.preprocess_modules_with_attributes as preprocess
 from dicom_standard.parse_lib import remove_attributes_from_html_tags
+import tests.standard_snippets as snippets
 
 
 def test_remove_attributes_from_tag():
@@ -20,3 +24,28 @@ def test_remove_attributes_from_tag():
     remove_attributes_from_html_tags(top_level_tag)
     assert top_level_tag.attrs == {}
     assert top_level_tag.find('a').attrs == {'href': 'coolsite'}
+
+
+def extracted_tables(part03_excerpt=snippets.part03_excerpt):
+    outputs = build.extract_part03_tables(BeautifulSoup(part03_excerpt, 'html.parser'))
+    return outputs['raw_module_attribute_tables.json'], outputs['raw_macro_tables.json']
+
+
+def test_preprocess_tables_reprocesses_modules_including_changed_macros(tmpdir, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmpdir))
+    calls = []
+    uncounted_preprocess_table = preprocess.preprocess_table
+
+    def preprocess_table(table, *args):
+        calls.append(table['id'])
+        return uncounted_preprocess_table(table, *args)
+    uncached_tables = preprocess.preprocess_tables(*extracted_tables())
+    monkeypatch.setattr(preprocess, 'preprocess_table', preprocess_table)
+    assert preprocess.preprocess_tables(*extracted_tables(), use_cache=True) == uncached_tables
+    assert preprocess.preprocess_tables(*extracted_tables(), use_cache=True) == uncached_tables
+    assert calls == ['patient']
+    # The module includes the changed macro through another macro.
+    changed_excerpt = snippets.part03_excerpt.replace('<p>Issuer of Patient ID</p>', '<p>Issuer of the Patient ID</p>')
+    changed_tables = preprocess.preprocess_tables(*extracted_tables(changed_excerpt), use_cache=True)
+    assert calls == ['patient', 'patient']
+    assert changed_tables != uncached_tables
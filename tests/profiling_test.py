@@ -0,0 +1,64 @@
+import argparse
+import json
+
+import pytest
+
+from dicom_standard import profiling
+
+
+def test_steps_do_nothing_unless_profiling():
+    assert profiling.PROFILER is None
+    with profiling.step('parse'):
+        pass
+    assert profiling.PROFILER is None
+
+
+def test_profile_argument_reports_each_step(tmpdir):
+    report_path = str(tmpdir.join('report.json'))
+    parser = argparse.ArgumentParser()
+    profiling.add_profile_argument(parser)
+    assert not profiling.parse_arguments(parser, []).profile
+    assert profiling.PROFILER is None
+    try:
+        assert profiling.parse_arguments(parser, ['--profile', '--profile-report', report_path]).profile
+        strings = []
+        for _ in range(2):
+            with profiling.step('cleaning'):
+                with profiling.step('span expansion'):
+                    strings.extend('x' * 1000 + str(i) for i in range(100))
+        profiling.PROFILER.write_report()
+    finally:
+        profiling.stop_profiling()
+    with open(report_path) as report_file:
+        report = json.load(report_file)
+    steps = {step['name']: step for step in report['steps']}
+    assert sorted(steps.keys()) == ['cleaning', 'span expansion']
+    assert steps['cleaning']['calls'] == 2
+    assert steps['cleaning']['wallTime'] >= steps['span expansion']['wallTime']
+    assert steps['span expansion']['allocatedBytes'] > 0
+    # Only steps outside of any other step list their top allocations.
+    assert any(allocation['location'].startswith(__file__) and allocation['sizeBytes'] > 200000
+               for allocation in steps['cleaning']['topAllocations'])
+    assert steps['span expansion']['topAllocations'] == []
+    assert len(strings) == 200
+
+
+def test_profile_flag_does_not_take_the_input(tmpdir):
+    stage_input = tmpdir.join('modules.json')
+    stage_input.write('[]')
+    parser = argparse.ArgumentParser()
+    parser.add_argument('module_attribute_tables')
+    parser.add_argument('output')
+    profiling.add_profile_argument(parser)
+    # The input is not taken as the report path, and profiling never starts
+    # when the arguments are invalid.
+    with pytest.raises(SystemExit):
+        profiling.parse_arguments(parser, ['--profile', str(stage_input)])
+    assert profiling.PROFILER is None
+    assert stage_input.read() == '[]'
+    try:
+        args = profiling.parse_arguments(parser, ['--profile', str(stage_input), 'output.json'])
+        assert args.module_attribute_tables == str(stage_input)
+        assert profiling.PROFILER is not None and profiling.PROFILER.report_path is None
+    finally:
+        profiling.stop_profiling()
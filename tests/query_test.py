@@ -0,0 +1,85 @@
+import dicom_standard.json_io as json_io
+from dicom_standard.description_utils import description_table, reference_descriptions
+from dicom_standard.query import load_standard
+
+
+def write_dist_files(dist_dir):
+    dist_files = {
+        'ciods.json': {'cr-image': {'id': 'cr-image', 'name': 'CR Image'},
+                       'ct-image': {'id': 'ct-image', 'name': 'CT Image'}},
+        'modules.json': {'patient': {'id': 'patient', 'name': 'Patient'},
+                         'ct-image': {'id': 'ct-image', 'name': 'CT Image'}},
+        'attributes.json': {
+            '00100010': {'tag': '(0010,0010)', 'keyword': 'PatientName', 'retired': False},
+            '00100020': {'tag': '(0010,0020)', 'keyword': 'PatientID', 'retired': False},
+            '00100026': {'tag': '(0010,0026)', 'keyword': 'SourcePatientGroupIdentificationSequence', 'retired': False},
+            '00280005': {'tag': '(0028,0005)', 'keyword': '', 'retired': True},
+            '60xx0010': {'tag': '(60XX,0010)', 'keyword': 'OverlayRows', 'retired': False},
+        },
+        'ciod_to_modules.json': [
+            {'ciod': 'cr-image', 'module': 'patient', 'usage': 'M'},
+            {'ciod': 'ct-image', 'module': 'patient', 'usage': 'M'},
+            {'ciod': 'ct-image', 'module': 'ct-image', 'usage': 'M'},
+        ],
+        'module_to_attributes.json': [
+            {'module': 'patient', 'path': 'patient:00100010', 'tag': '(0010,0010)'},
+            {'module': 'patient', 'path': 'patient:00100020', 'tag': '(0010,0020)'},
+            {'module': 'patient', 'path': 'patient:00100026', 'tag': '(0010,0026)'},
+            {'module': 'patient', 'path': 'patient:00100026:00100020', 'tag': '(0010,0020)'},
+            {'module': 'ct-image', 'path': 'ct-image:00100020', 'tag': '(0010,0020)'},
+            {'module': 'overlay-plane', 'path': 'overlay-plane:60xx0010', 'tag': '(60xx,0010)'},
+        ],
+    }
+    for filename, data in dist_files.items():
+        output_format = 'gzip' if filename == 'attributes.json' else 'pretty'
+        filepath = dist_dir.join(filename + ('.gz' if output_format == 'gzip' else ''))
+        with open(str(filepath), 'w') as output:
+            json_io.write_json(data, output_format, output)
+
+
+def test_standard_lookups(tmpdir):
+    write_dist_files(tmpdir)
+    standard = load_standard(str(tmpdir))
+    assert standard.ciod('ct-image')['name'] == 'CT Image'
+    assert standard.module('patient')['name'] == 'Patient'
+    assert standard.attribute('(0010,0010)')['keyword'] == 'PatientName'
+    assert standard.attribute(0x00100020) is standard.attribute_with_keyword('PatientID')
+    assert standard.attribute_with_keyword('') is None
+    assert [r['module'] for r in standard.ciod_modules('ct-image')] == ['patient', 'ct-image']
+    assert [r['ciod'] for r in standard.module_ciods('patient')] == ['cr-image', 'ct-image']
+    assert [pair['path'] for pair in standard.module_attributes('patient')][-1] == 'patient:00100026:00100020'
+    assert standard.module_attribute('ct-image:00100020')['module'] == 'ct-image'
+
+
+def test_attribute_relationships(tmpdir):
+    write_dist_files(tmpdir)
+    standard = load_standard(str(tmpdir))
+    assert [pair['path'] for pair in standard.attribute_usages('00100020')] == [
+        'patient:00100020', 'patient:00100026:00100020', 'ct-image:00100020']
+    assert standard.modules_with_attribute('(0010,0020)') == ['patient', 'ct-image']
+    assert standard.ciods_with_attribute('(0010,0020)') == ['cr-image', 'ct-image']
+    assert standard.ciods_with_attribute('(0028,0005)') == []
+    assert standard.module_attributes('missing') == []
+    assert standard.ciod('missing') is None
+
+
+def test_repeating_group_lookups(tmpdir):
+    write_dist_files(tmpdir)
+    standard = load_standard(str(tmpdir))
+    assert standard.attribute(0x60020010)['keyword'] == 'OverlayRows'
+    assert standard.attribute('(60xx,0010)')['keyword'] == 'OverlayRows'
+    assert standard.attribute(0x60010010) is None
+    assert standard.modules_with_attribute('(6004,0010)') == ['overlay-plane']
+
+
+def test_load_standard_with_referenced_descriptions(tmpdir):
+    write_dist_files(tmpdir)
+    pairs = json_io.read_json_to_dict(str(tmpdir.join('module_to_attributes.json')))
+    for pair in pairs:
+        pair['description'] = '<td>{}</td>'.format(pair['tag'])
+    with open(str(tmpdir.join('descriptions.json')), 'w') as output:
+        json_io.write_json(description_table(pairs), 'pretty', output)
+    with open(str(tmpdir.join('module_to_attributes.json')), 'w') as output:
+        json_io.write_json(reference_descriptions(pairs), 'pretty', output)
+    standard = load_standard(str(tmpdir))
+    assert standard.module_attribute('patient:00100010')['description'] == '<td>(0010,0010)</td>'
@@ -1,3 +1,6 @@
+import re
+
+
 macro_caller = '''
                 <div class="table">
                 <a id="calling_table"></a>
@@ -862,3 +865,92 @@ properties_snippet = '''
     </div>
 </div>
 '''
+
+issuer_of_patient_id_macro = '''
+ <div class="table">
+    <a id="table_10-18" shape="rect"></a>
+    <p class="title">
+       <strong>Table&nbsp;10-18.&nbsp;Issuer of Patient ID Macro Attributes</strong>
+    </p>
+    <div class="table-contents">
+       <table frame="box" rules="all">
+          <thead>
+             <tr valign="top">
+                <th align="center" rowspan="1" colspan="1"><p>Attribute Name</p></th>
+                <th align="center" rowspan="1" colspan="1"><p>Tag</p></th>
+                <th align="center" rowspan="1" colspan="1"><p>Type</p></th>
+                <th align="center" rowspan="1" colspan="1"><p>Attribute Description</p></th>
+             </tr>
+          </thead>
+          <tbody>
+             <tr valign="top">
+                <td align="left" rowspan="1" colspan="1"><p>Issuer of Patient ID</p></td>
+                <td align="center" rowspan="1" colspan="1"><p>(0010,0021)</p></td>
+                <td align="center" rowspan="1" colspan="1"><p>3</p></td>
+                <td align="left" rowspan="1" colspan="1">
+                   <p>Identifier of the Assigning Authority. See <a class="xref" href="#sect_10.18.1" shape="rect">Section&nbsp;10.18.1</a>.</p>
+                </td>
+             </tr>
+          </tbody>
+       </table>
+    </div>
+ </div>
+'''
+
+referenced_section_content = '''
+<p>Described in <a class="xref" href="#table_A.2-1" shape="rect">Table&nbsp;A.2-1</a> and
+<a class="link" href="ftp://medical.nema.org/MEDICAL/Dicom/2004/printed/04_03pu3.pdf" target="_top">PS3.3-2004</a>.</p>
+<div class="figure">
+   <a id="figure_C.7-1" shape="rect"></a>
+   <div class="figure-contents">
+      <div class="mediaobject">
+         <object data="figures/PS3.3_C.7-1.svg" type="image/svg+xml"><img src="figures/PS3.3_C.7-1.png" alt="C.7-1"/></object>
+      </div>
+   </div>
+</div>
+<p><a id="para_empty" shape="rect"></a><img src="figures/PS3.3_C.7-2.png" alt="C.7-2"/></p>
+'''
+
+
+def chapter_div(chapter_id, content):
+    return '''
+    <div class="chapter">
+       <div class="titlepage"><div><div>
+          <h1 class="title"><a id="{}" shape="rect"></a>Chapter</h1>
+       </div></div></div>
+       {}
+    </div>
+    '''.format(chapter_id, content)
+
+
+def section_div(section_id, content):
+    return '''
+    <div class="section">
+       <div class="titlepage"><div><div>
+          <h2 class="title"><a id="{}" shape="rect"></a>Section</h2>
+       </div></div></div>
+       <p>See <a class="xref" href="#table_C.7-1">Table C.7-1</a> for the attributes.</p>
+       {}
+    </div>
+    '''.format(section_id, content)
+
+
+def relative_links(html):
+    return html.replace('http://dicom.nema.org/medical/dicom/current/output/html/part03.html#', '#')
+
+
+def referenced_section_ids(html):
+    return sorted(set(re.findall(r'href="#(sect_[^"]+)"', html)))
+
+
+part03_module_tables = relative_links(macro_expand_caller + patient_group_macro)
+part03_referenced_sections = referenced_section_ids(part03_module_tables + issuer_of_patient_id_macro)
+part03_excerpt = ''.join([
+    '<html><body><div class="book">',
+    chapter_div('chapter_10', section_div('sect_10.18', issuer_of_patient_id_macro)),
+    chapter_div('chapter_A', relative_links(cr_iod_section)),
+    chapter_div('chapter_C', section_div('sect_C.7.1.1', part03_module_tables)),
+    chapter_div('chapter_Z', ''.join(section_div(section_id, referenced_section_content)
+                                     for section_id in part03_referenced_sections)),
+    '</div></body></html>',
+])
@@ -1,6 +1,7 @@
 '''
 Unit tests covering functions in `table_utils.py`.
 '''
+import pytest
 from bs4 import BeautifulSoup as bs
 
 import dicom_standard.table_utils as t
@@ -93,3 +94,20 @@ def test_expand_both():
         ['<td>1</td>', '<td>2</td>', '<td>3</td>', '<td>4</td>']
     ]
     assert t.stringify_table(table_list) == expected_table_list
+
+
+def test_expand_staggered_rowspans():
+    table = bs(tables.staggered_rowspan, 'html.parser')
+    table_list = t.expand_spans(t.tdiv_to_table_list(table))
+    expected_table_list = [
+        ['<td>1</td>', '<td>2</td>', '<td rowspan="1">3</td>', '<td>4</td>'],
+        ['<td rowspan="1">1</td>', '<td>2</td>', '<td rowspan="1">3</td>', '<td>4</td>'],
+        ['<td rowspan="1">1</td>', '<td>2</td>', '<td rowspan="1">3</td>', '<td>4</td>'],
+    ]
+    assert t.stringify_table(table_list) == expected_table_list
+
+
+def test_rowspan_beyond_row_raises():
+    table = bs(tables.overlong_rowspan, 'html.parser')
+    with pytest.raises(ValueError):
+        t.expand_spans(t.tdiv_to_table_list(table))
@@ -0,0 +1,26 @@
+import pytest
+
+from dicom_standard.tag_utils import slug_matcher, tag_slug
+
+
+def test_tag_slug():
+    for tag in ['(0010,0010)', '0010,0010', '00100010', ' (0010, 0010) ', 0x00100010]:
+        assert tag_slug(tag) == '00100010'
+    assert tag_slug('(0028,04X2)') == '002804x2'
+    assert tag_slug('(7FE0,0010)') == '7fe00010'
+    for tag in ['(0010,001)', 'PatientName', '(0010,0010', -1, 2**32]:
+        with pytest.raises(ValueError):
+            tag_slug(tag)
+
+
+def test_slug_matcher():
+    matcher = slug_matcher(['00100010', '60xx0010', '60xx3000', '002031xx', '1000xxx0', '1010xxxx'])
+    assert matcher.match(0x60020010) == '60xx0010'
+    assert matcher.match(0x601E3000) == '60xx3000'
+    assert matcher.match(0x00203105) == '002031xx'
+    assert matcher.match(0x10001230) == '1000xxx0'
+    assert matcher.match(0x10001231) is None
+    assert matcher.match(0x10101231) == '1010xxxx'
+    # Odd groups are private, so they never belong to a repeating group.
+    assert matcher.match(0x60010010) is None
+    assert matcher.match(0x00100010) is None
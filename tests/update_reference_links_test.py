@@ -0,0 +1,16 @@
+from dicom_standard.postprocess_update_reference_links import update_sourceurls
+
+
+def test_update_sourceurls_uses_first_matching_reference():
+    references = {
+        'part03.html#sect_C.7.1.1': '<div></div>',
+        'part04.html#sect_C.7.1.1': '<div></div>',
+        'part03.html#table_10-18': '<div></div>',
+    }
+    pairs = [{'externalReferences': [{'sourceUrl': '#sect_C.7.1.1'}, {'sourceUrl': '#table_10-18'}]},
+             {'externalReferences': [{'sourceUrl': '#sect_missing'}]}]
+    updated_pairs = update_sourceurls(pairs, references)
+    assert [[ref['sourceUrl'] for ref in pair['externalReferences']] for pair in updated_pairs] == [
+        ['part03.html#sect_C.7.1.1', 'part03.html#table_10-18'],
+        ['#sect_missing'],
+    ]